@@ -1,110 +1,976 @@
-from flask import Flask, request, jsonify
-import json
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+import hmac
 import time
 import requests
-from typing import Dict, Any, Optional, List
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from typing import Callable, Dict, Any, Optional, List, Tuple
 import os
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
 
 # Importar configurações
+from .artifacts import ArtifactStore, ArtifactTooLarge
+from .cache import get_cache
+from .circuit import STATE_VALUES, CircuitBreakers, CircuitOpen, get_breakers, is_failure, upstream_timeout
+from .compression import compress_response
 from .config import Config
+from .coordination import get_coordinator
+from .credentials import Credential, CredentialPool, get_credential_pool
+from .idempotency import IdempotencyConflict, SubmissionRegistry
+from .jobs import JOB_STATUSES, JobQueue
+from .metrics import (
+    active_waiters, http_latency, http_requests, poll_iterations, poll_ticks, registry as metrics_registry,
+    upstream_bytes, upstream_errors, upstream_latency, upstream_retries, upstream_throttled,
+)
+from .polling import TERMINAL_STATUSES, PollingStrategy, advance_marker, extract_status, make_strategy
+from .profiler import SamplingProfiler
+from .projection import Projection, parse_projection, project_task, projection_key
+from .ratelimit import (
+    UpstreamGovernor, UpstreamThrottled, background, get_governor, is_background, parse_retry_after, retry_delay,
+)
+from .serialization import BrowserUseJSONProvider, UpstreamPayload, dumps, dumps_bytes, loads, parse_upstream
+from .singleflight import SingleFlight
+from .stale import StaleStore, is_degraded
+from .task_index import TaskIndex, parse_timestamp
+from . import stale, timing
+from .upstream import UpstreamSession, get_session
+from .webhooks import WebhookDispatcher, validate_callback_url
 
 app = Flask(__name__)
+app.json_provider_class = BrowserUseJSONProvider
+app.json = BrowserUseJSONProvider(app)
 # CORS será gerenciado pelo Nginx
 
+# Respostas do upstream que valem nova tentativa
+RETRY_STATUSES = (429, 503)
+
+# Headers repassados pelo proxy de mídia/screenshots/GIF grandes demais para o download compartilhado
+PROXY_REQUEST_HEADERS = ('Range', 'If-Range', 'If-None-Match', 'If-Modified-Since', 'Accept-Encoding')
+PROXY_RESPONSE_HEADERS = (
+    'Content-Length', 'Content-Range', 'Content-Encoding', 'Accept-Ranges', 'ETag', 'Last-Modified', 'Cache-Control',
+)
+
+
+class UpstreamStream:
+    """Resposta do upstream lida em chunks; ocupa uma vaga do governor até close()"""
+    
+    def __init__(self, response: requests.Response, release):
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self._release = release
+    
+    def iter_chunks(self, chunk_size: int = None) -> Any:
+        # Bytes como vieram (sem descompactar): Content-Encoding e Content-Length continuam válidos
+        yield from self.response.raw.stream(chunk_size or Config.PROXY_CHUNK_SIZE, decode_content=False)
+    
+    def close(self) -> None:
+        release, self._release = self._release, None
+        try:
+            self.response.close()
+        finally:
+            if release is not None:
+                release()
+
 
 class BrowserUseAPI:
     """Cliente para interagir com a API Browser Use"""
     
-    def __init__(self, api_key: str = None):
-        self.api_key = api_key or Config.BROWSER_USE_API_KEY
-        self.headers = {'Authorization': f'Bearer {self.api_key}'}
+    def __init__(self, api_key: str = None, session: UpstreamSession = None, cache=None,
+                 governor: UpstreamGovernor = None, credentials: CredentialPool = None,
+                 breakers: CircuitBreakers = None):
+        # Uma chave explícita forma um pool próprio; sem ela, o pool de BROWSER_USE_API_KEYS
+        self._credentials = credentials or (CredentialPool([api_key]) if api_key else None)
+        self._session = session
+        self._cache = cache
+        self._governor = governor
+        self._breakers = breakers
+        # Leituras idênticas simultâneas compartilham uma única chamada ao upstream
+        self.single_flight = SingleFlight()
+        # Última resposta boa de cada leitura, servida com o upstream degradado
+        self.stale = StaleStore()
+        # Tasks já finalizadas: seus dados nunca mais mudam
+        self._terminal_ids: 'OrderedDict[str, bool]' = OrderedDict()
+        self._terminal_lock = threading.Lock()
+        # Índice local de tasks alimentado pelas submissões e leituras (opcional)
+        self.task_index = None
+        # Artefatos de tasks finalizadas gravados em disco (opcional)
+        self.artifacts = None
+    
+    @property
+    def session(self) -> UpstreamSession:
+        """Sessão com pool de conexões (compartilhada por padrão)"""
+        return self._session or get_session()
+    
+    @property
+    def governor(self) -> UpstreamGovernor:
+        """Limites de taxa e de concorrência das chamadas (compartilhado por padrão)"""
+        return self._governor or get_governor()
+    
+    @property
+    def cache(self):
+        """Cache de respostas (compartilhado por padrão)"""
+        return self._cache or get_cache()
+    
+    @property
+    def credentials(self) -> CredentialPool:
+        """Chaves de API e associação task -> chave (compartilhado por padrão)"""
+        return self._credentials or get_credential_pool()
+    
+    @property
+    def breakers(self) -> CircuitBreakers:
+        """Circuit breakers por classe de endpoint (compartilhados por padrão)"""
+        return self._breakers or get_breakers()
+    
+    def _mark_terminal(self, task_id: str) -> None:
+        with self._terminal_lock:
+            known = task_id in self._terminal_ids
+            self._terminal_ids[task_id] = True
+            self._terminal_ids.move_to_end(task_id)
+            while len(self._terminal_ids) > Config.CACHE_MAX_ENTRIES:
+                self._terminal_ids.popitem(last=False)
+        if not known:
+            self.credentials.finished(task_id)
+    
+    def _task_ttl(self, task_id: str) -> Optional[float]:
+        """TTL dos dados de uma task: permanente (None) se ela já terminou"""
+        with self._terminal_lock:
+            terminal = task_id in self._terminal_ids
+        return None if terminal else Config.CACHE_RUNNING_TTL
+    
+    def _cached(self, key: str, ttl: Optional[float], operation: str, path: str, **kwargs) -> Dict[str, Any]:
+        """Consulta o cache antes de ir ao upstream"""
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        def fetch() -> Dict[str, Any]:
+            result = self._request('GET', path, operation, **kwargs)
+            self.cache.set(key, result, ttl)
+            return result
+        
+        return self._read(key, fetch, operation)
+    
+    def _read(self, key: str, fetch: Callable[[], Any], operation: str) -> Any:
+        """Leitura coalescida; com o upstream degradado, devolve a última resposta boa e atualiza em segundo plano"""
+        try:
+            result = self.single_flight.do(key, fetch, operation)
+        except requests.exceptions.RequestException as e:
+            # Polling e atualizações precisam do estado atual: só usuários recebem dados velhos
+            entry = self.stale.get(key) if self.stale.enabled and not is_background() and is_degraded(e) else None
+            if entry is None:
+                raise
+            value, age = entry
+            self.stale.refresh(key, fetch)
+            stale.mark_served(age)
+            return value
+        self.stale.put(key, result)
+        return result
+    
+    def invalidate_task(self, task_id: str) -> None:
+        """Remove do cache os dados de uma task (após stop/pause/resume)"""
+        self.cache.delete(f'task:{task_id}', f'status:{task_id}')
+    
+    def _send(self, method: str, path: str, operation: str, credential: Credential, **kwargs) -> requests.Response:
+        """Uma chamada ao upstream com a chave indicada, dentro dos limites do governor e do circuito"""
+        endpoint_class = self.governor.classify(operation)
+        breaker = self.breakers.get(endpoint_class)
+        # Circuito aberto: falha na hora, sem entrar na fila do governor
+        probe = breaker.allow() if breaker is not None else 0
+        failed = None
+        try:
+            queued_at = time.perf_counter()
+            try:
+                self.governor.acquire(endpoint_class)
+            except UpstreamThrottled:
+                upstream_throttled.inc(endpoint_class, 'acquire_timeout')
+                raise
+            self.credentials.record_request(credential)
+            start = time.perf_counter()
+            timing.record('queue', start - queued_at)
+            kwargs.setdefault('timeout', upstream_timeout(endpoint_class))
+            try:
+                response = self.session.request(
+                    method, f'{Config.BROWSER_USE_BASE_URL}{path}', headers=credential.headers, **kwargs
+                )
+            except requests.exceptions.RequestException as e:
+                failed = is_failure(e)
+                upstream_errors.inc(operation, type(e).__name__)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                upstream_latency.observe(elapsed, operation)
+                timing.record('upstream', elapsed)
+                self.governor.release(endpoint_class)
+            failed = is_failure(status_code=response.status_code)
+        finally:
+            if breaker is not None:
+                breaker.record(failed, probe)
+        upstream_bytes.inc(operation, amount=len(response.content))
+        if response.status_code >= 400:
+            upstream_errors.inc(operation, f'http_{response.status_code}')
+        return response
+    
+    def _task_credential(self, task_id: str) -> Credential:
+        """Chave da task; uma task desconhecida é localizada antes pela consulta de status"""
+        credential = self.credentials.pinned(task_id)
+        if credential is None:
+            self.get_task_status(task_id)
+            credential = self.credentials.for_task(task_id)
+        return credential
+    
+    def stream(self, path: str, operation: str, headers: Dict[str, str] = None, task_id: str = None) -> UpstreamStream:
+        """Abre um GET no upstream sem carregar o corpo em memória, repetindo 429/503"""
+        attempt = 0
+        while True:
+            credential = self._task_credential(task_id) if task_id else self.credentials.default
+            stream = self._open_stream(path, operation, credential, headers)
+            if stream.status_code not in RETRY_STATUSES or attempt >= Config.UPSTREAM_MAX_RETRIES:
+                break
+            stream.close()
+            delay = retry_delay(stream.response, attempt)
+            upstream_retries.inc(operation, str(stream.status_code))
+            if stream.status_code == 429 and self.credentials.throttled(credential, delay):
+                self.governor.pause(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+        
+        if stream.status_code >= 400:
+            try:
+                stream.response.raise_for_status()
+            finally:
+                stream.close()
+        return stream
+    
+    def _open_stream(self, path: str, operation: str, credential: Credential,
+                     headers: Optional[Dict[str, str]]) -> UpstreamStream:
+        endpoint_class = self.governor.classify(operation)
+        breaker = self.breakers.get(endpoint_class)
+        probe = breaker.allow() if breaker is not None else 0
+        failed = None
+        try:
+            queued_at = time.perf_counter()
+            try:
+                self.governor.acquire(endpoint_class)
+            except UpstreamThrottled:
+                upstream_throttled.inc(endpoint_class, 'acquire_timeout')
+                raise
+            self.credentials.record_request(credential)
+            start = time.perf_counter()
+            timing.record('queue', start - queued_at)
+            try:
+                response = self.session.request(
+                    'GET', f'{Config.BROWSER_USE_BASE_URL}{path}', headers={**credential.headers, **(headers or {})},
+                    stream=True, timeout=upstream_timeout(endpoint_class),
+                )
+            except requests.exceptions.RequestException as e:
+                failed = is_failure(e)
+                self.governor.release(endpoint_class)
+                upstream_errors.inc(operation, type(e).__name__)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                upstream_latency.observe(elapsed, operation)
+                timing.record('upstream', elapsed)
+            failed = is_failure(status_code=response.status_code)
+        finally:
+            if breaker is not None:
+                breaker.record(failed, probe)
+        
+        if response.status_code >= 400:
+            upstream_errors.inc(operation, f'http_{response.status_code}')
+        return UpstreamStream(response, lambda: self.governor.release(endpoint_class))
+    
+    def is_terminal(self, task_id: str) -> bool:
+        """Se a task já foi vista em um status final"""
+        return self._task_ttl(task_id) is None
+    
+    def _locate(self, method: str, path: str, operation: str, task_id: str, credential: Credential,
+                response: requests.Response, **kwargs) -> requests.Response:
+        """Task sem chave associada: registra a chave que a encontrou (em um 404, procura nas demais)"""
+        if response.status_code != 404:
+            if response.status_code < 400:
+                self.credentials.pin(task_id, credential, running=False)
+            return response
+        for other in self.credentials.others(credential):
+            found = self._send(method, path, operation, other, **kwargs)
+            if found.status_code != 404:
+                self.credentials.pin(task_id, other, running=False)
+                return found
+        return response
+    
+    def _attempt(self, method: str, path: str, operation: str, task_id: Optional[str],
+                 credential: Credential, **kwargs) -> requests.Response:
+        response = self._send(method, path, operation, credential, **kwargs)
+        if task_id is not None and self.credentials.pooled and self.credentials.pinned(task_id) is None:
+            response = self._locate(method, path, operation, task_id, credential, response, **kwargs)
+        return response
+    
+    def _request(self, method: str, path: str, operation: str, task_id: str = None,
+                 credential: Credential = None, **kwargs) -> Dict[str, Any]:
+        """Executa uma requisição ao upstream, repetindo 429/503 (e falhas de conexão em leituras)"""
+        submission = operation == 'run_task'
+        attempt = 0
+        while True:
+            if submission:
+                # Cada tentativa escolhe a chave de novo: um 429 desvia a submissão para outra chave
+                credential = self.credentials.acquire()
+            elif credential is None:
+                credential = self.credentials.for_task(task_id) if task_id else self.credentials.default
+            created = None
+            try:
+                try:
+                    response = self._attempt(method, path, operation, task_id, credential, **kwargs)
+                except requests.exceptions.ConnectionError:
+                    # Uma submissão pode ter sido aceita antes da falha: só leituras são repetidas
+                    if method != 'GET' or attempt >= Config.UPSTREAM_MAX_RETRIES:
+                        raise
+                    response = None
+                
+                if response is not None and (
+                    response.status_code not in RETRY_STATUSES or attempt >= Config.UPSTREAM_MAX_RETRIES
+                ):
+                    response.raise_for_status()
+                    with timing.phase('parse'):
+                        result = parse_upstream(response.content)
+                    if submission:
+                        created = result.get('id')
+                    return result
+            finally:
+                if submission:
+                    self.credentials.release(credential, created)
+            
+            delay = retry_delay(response, attempt)
+            upstream_retries.inc(operation, str(response.status_code) if response is not None else 'connection')
+            if response is not None and response.status_code == 429:
+                upstream_throttled.inc(self.governor.classify(operation), 'upstream_429')
+                if self.credentials.throttled(credential, delay):
+                    # Todas as chaves no limite: todas as chamadas esperam, não só esta
+                    self.governor.pause(delay)
+                elif submission:
+                    # Outra chave ainda tem cota: desvia sem esperar nem gastar uma tentativa
+                    continue
+                else:
+                    time.sleep(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
     
     def run_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Executa uma nova task"""
-        response = requests.post(f'{Config.BROWSER_USE_BASE_URL}/run-task', headers=self.headers, json=task_data)
-        response.raise_for_status()
-        return response.json()
+        """Executa uma nova task (na chave menos carregada do pool)"""
+        result = self._request('POST', '/run-task', 'run_task', json=task_data)
+        if self.task_index is not None:
+            self.task_index.record_submission(result, task_data)
+        return result
     
-    def get_task(self, task_id: str) -> Dict[str, Any]:
+    def get_task(self, task_id: str, use_cache: bool = True) -> Dict[str, Any]:
         """Obtém detalhes completos da task"""
-        response = requests.get(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}', headers=self.headers)
-        response.raise_for_status()
-        return response.json()
-    
+        key = f'task:{task_id}'
+        
+        def fetch() -> Dict[str, Any]:
+            details = self._request('GET', f'/task/{task_id}', 'get_task', task_id)
+            if details.get('status') in TERMINAL_STATUSES:
+                self._mark_terminal(task_id)
+            if self.task_index is not None:
+                self.task_index.observe(details)
+            self.cache.set(key, details, self._task_ttl(task_id))
+            return details
+        
+        if not use_cache:
+            # Leitura obrigatoriamente nova: não pega carona em uma chamada iniciada antes
+            return fetch()
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        return self._read(key, fetch, 'get_task')
+
+    def get_task_projection(self, task_id: str, projection: Projection) -> Dict[str, Any]:
+        """Obtém os detalhes da task recortados (campos e página de steps)"""
+        key = projection_key(task_id, projection)
+        if self._task_ttl(task_id) is None:
+            # Projeção de task finalizada nunca muda: guarda o JSON já recortado
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        details = self.get_task(task_id)
+        projected = project_task(details, projection)
+        if details.get('status') in TERMINAL_STATUSES:
+            projected = UpstreamPayload(projected, dumps_bytes(projected))
+            self.cache.set(key, projected, None)
+        return projected
+
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """Obtém apenas o status da task"""
-        response = requests.get(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}/status', headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        key = f'status:{task_id}'
+        if self._task_ttl(task_id) is None:
+            # Status final nunca muda: evita ir ao upstream
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        def fetch() -> Dict[str, Any]:
+            result = self._request('GET', f'/task/{task_id}/status', 'get_task_status', task_id)
+            if self.task_index is not None:
+                self.task_index.observe_status(task_id, extract_status(result))
+            if extract_status(result) in TERMINAL_STATUSES:
+                self._mark_terminal(task_id)
+                self.cache.set(key, result, None)
+            return result
+        
+        return self._read(key, fetch, 'get_task_status')
     
     def stop_task(self, task_id: str) -> Dict[str, Any]:
         """Para uma task em execução"""
-        response = requests.put(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}/stop', headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        result = self._request('PUT', f'/task/{task_id}/stop', 'stop_task', task_id)
+        self.invalidate_task(task_id)
+        self.credentials.finished(task_id)
+        return result
     
     def pause_task(self, task_id: str) -> Dict[str, Any]:
         """Pausa uma task em execução"""
-        response = requests.put(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}/pause', headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        result = self._request('PUT', f'/task/{task_id}/pause', 'pause_task', task_id)
+        self.invalidate_task(task_id)
+        return result
     
     def resume_task(self, task_id: str) -> Dict[str, Any]:
         """Resume uma task pausada"""
-        response = requests.put(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}/resume', headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        result = self._request('PUT', f'/task/{task_id}/resume', 'resume_task', task_id)
+        self.invalidate_task(task_id)
+        return result
     
-    def list_tasks(self, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
-        """Lista todas as tasks"""
+    def list_tasks(self, limit: int = 10, offset: int = 0, credential: Credential = None,
+                   use_cache: bool = True) -> Dict[str, Any]:
+        """Lista as tasks de uma chave (a padrão se não indicada)"""
+        credential = credential or self.credentials.default
         params = {'limit': limit, 'offset': offset}
-        response = requests.get(f'{Config.BROWSER_USE_BASE_URL}/tasks', headers=self.headers, params=params)
-        response.raise_for_status()
-        return response.json()
-    
-    def get_task_media(self, task_id: str) -> Dict[str, Any]:
-        """Obtém mídia da task"""
-        response = requests.get(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}/media', headers=self.headers)
-        response.raise_for_status()
-        return response.json()
-    
-    def get_task_screenshots(self, task_id: str) -> Dict[str, Any]:
-        """Obtém screenshots da task"""
-        response = requests.get(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}/screenshots', headers=self.headers)
-        response.raise_for_status()
-        return response.json()
-    
-    def get_task_gif(self, task_id: str) -> Dict[str, Any]:
-        """Obtém GIF da task"""
-        response = requests.get(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}/gif', headers=self.headers)
-        response.raise_for_status()
-        return response.json()
-    
-    def wait_for_completion(self, task_id: str, poll_interval: int = None, timeout: int = None) -> Dict[str, Any]:
+        if use_cache:
+            key = f'tasks:{limit}:{offset}' if credential is self.credentials.default else f'tasks:{credential.id}:{limit}:{offset}'
+            result = self._cached(key, Config.CACHE_LIST_TTL, 'list_tasks', '/tasks', credential=credential, params=params)
+        else:
+            result = self._request('GET', '/tasks', 'list_tasks', credential=credential, params=params)
+        if self.credentials.pooled:
+            items = result.get('tasks', []) if isinstance(result, dict) else result
+            self.credentials.pin_many((item['id'] for item in items if item.get('id')), credential)
+        return result
+    
+    def get_task_artifact(self, task_id: str, kind: str) -> Optional[Dict[str, Any]]:
+        """
+        Mídia, screenshots ou GIF de task finalizada gravados em disco (metadados do arquivo)
+        
+        Leitores simultâneos compartilham um único download (single-flight, com
+        novas tentativas em 429/503) e as leituras seguintes não vão ao upstream.
+        Retorna None quando o artefato deve ser repassado em chunks: task ainda
+        em execução, armazenamento desativado ou disco indisponível. Corpos
+        acima de ARTIFACTS_MAX_BYTES levantam ArtifactTooLarge.
+        """
+        if self.artifacts is None or not self.artifacts.enabled:
+            return None
+        stored = self.artifacts.lookup(task_id, kind)
+        if stored is not None:
+            return stored
+        if not self.is_terminal(task_id):
+            # Status ainda desconhecido neste processo: a consulta leve marca a task se já terminou
+            self.get_task_status(task_id)
+            if not self.is_terminal(task_id):
+                return None
+        operation = f'get_task_{kind}'
+        
+        def fetch() -> Optional[Dict[str, Any]]:
+            upstream = self.stream(f'/task/{task_id}/{kind}', operation, {'Accept-Encoding': 'identity'}, task_id)
+            try:
+                return self.artifacts.store(task_id, kind, upstream.headers, upstream.iter_chunks())
+            finally:
+                # A vaga do governor volta assim que o corpo foi gravado, não ao fim do envio ao cliente
+                upstream.close()
+        
+        return self.single_flight.do(f'{kind}:{task_id}', fetch, operation)
+    
+    def poll_tick(self, task_id: str, strategy: PollingStrategy) -> Any:
+        """Consulta usada a cada tick de polling (status leve ou task completa, conforme a estratégia)"""
+        endpoint = strategy.next_endpoint()
+        poll_ticks.inc(endpoint)
+        if endpoint == 'task':
+            return self.get_task(task_id, use_cache=False)
+        return self.get_task_status(task_id)
+    
+    def wait_for_completion(self, task_id: str, poll_interval: int = None, timeout: int = None,
+                            strategy: PollingStrategy = None) -> Dict[str, Any]:
         """Aguarda a conclusão da task com timeout"""
         # Usar valores padrão da configuração se não fornecidos
-        if poll_interval is None:
-            poll_interval = Config.DEFAULT_POLL_INTERVAL
         if timeout is None:
             timeout = Config.DEFAULT_TIMEOUT
+        if strategy is None:
+            strategy = make_strategy(poll_interval=poll_interval)
             
         start_time = time.time()
+        last_marker = None
+        polls = 0
+        active_waiters.inc()
+        try:
+            while True:
+                if time.time() - start_time > timeout:
+                    raise TimeoutError(f"Task {task_id} não foi concluída em {timeout} segundos")
+                
+                payload = self.poll_tick(task_id, strategy)
+                polls += 1
+                status = extract_status(payload)
+                
+                if status in TERMINAL_STATUSES:
+                    poll_iterations.observe(polls)
+                    # Detalhes completos só são buscados uma vez, ao final
+                    return payload if strategy.last_endpoint == 'task' else self.get_task(task_id, use_cache=False)
+                
+                last_marker, progressed = advance_marker(last_marker, payload)
+                delay = strategy.next_delay(progressed)
+                time.sleep(delay)
+                timing.record('poll_sleep', delay)
+        finally:
+            active_waiters.dec()
+
+
+class _TaskWatch:
+    """Estado compartilhado de uma task acompanhada pelo poller"""
+    
+    def __init__(self, task_id: str, lock: threading.Lock):
+        self.task_id = task_id
+        self.condition = threading.Condition(lock)
+        # Intervalo máximo pedido explicitamente por cada waiter (None = estratégia decide)
+        self.subscribers: Dict[Future, Optional[float]] = {}
+        # Streams de eventos: recebem os detalhes completos a cada consulta (callback chamado fora do lock)
+        self.listeners: Dict[Future, Callable[[], None]] = {}
+        self.details: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self.strategy = make_strategy()
+        self.status: Optional[str] = None
+        self.marker: Optional[tuple] = None
+        self.polls = 0
+        self.started_at = time.time()
+        # Com coordenação entre réplicas: "leader" faz o polling, "follower" acompanha o estado publicado
+        self.role: Optional[str] = None
+
+
+class TaskPoller:
+    """Mantém um único loop de polling por task e distribui o resultado aos waiters"""
+    
+    def __init__(self, client: BrowserUseAPI, coordinator=None):
+        self.client = client
+        self._coordinator = coordinator
+        self._lock = threading.Lock()
+        self._watches: Dict[str, _TaskWatch] = {}
+        self.coordination_errors = 0
+    
+    @property
+    def coordinator(self):
+        """Coordenação entre réplicas (COORDINATION_BACKEND; None se desativada)"""
+        return self._coordinator or get_coordinator()
+    
+    def watch(self, task_id: str, poll_interval: float = None,
+              on_update: Callable[[], None] = None) -> Future:
+        """Inscreve um waiter; o Future é resolvido com os detalhes finais da task
+
+        Com on_update, o waiter acompanha também o progresso: enquanto houver
+        um inscrito assim, cada consulta busca a task completa e on_update é
+        chamado (de outra thread) a cada mudança e na conclusão; os detalhes
+        mais recentes ficam em latest().
+        """
+        future = Future()
+        with self._lock:
+            watch = self._watches.get(task_id)
+            if watch is None:
+                watch = _TaskWatch(task_id, self._lock)
+                self._watches[task_id] = watch
+                threading.Thread(target=self._run, args=(watch,), name=f'poller-{task_id}', daemon=True).start()
+            watch.subscribers[future] = poll_interval
+            if on_update is not None:
+                watch.listeners[future] = on_update
+            # Para o Server-Timing: consultas feitas enquanto este waiter esteve inscrito
+            future.poll_state = (watch, watch.polls)
+            # Um intervalo menor pedido por um novo waiter vale imediatamente
+            watch.condition.notify_all()
+        if on_update is not None:
+            future.add_done_callback(lambda _: on_update())
+        return future
+    
+    def release(self, task_id: str, future: Future) -> None:
+        """Remove um waiter; o polling para quando não restam inscritos"""
+        with self._lock:
+            watch = self._watches.get(task_id)
+            if watch is not None and watch.subscribers.pop(future, None) is not None:
+                watch.listeners.pop(future, None)
+                watch.condition.notify_all()
+    
+    def latest(self, future: Future) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Versão e detalhes mais recentes vistos pelo poller para um waiter inscrito com on_update"""
+        watch = future.poll_state[0]
+        with self._lock:
+            return watch.version, watch.details
+    
+    def wait(self, task_id: str, poll_interval: float = None, timeout: float = None) -> Dict[str, Any]:
+        """Aguarda a conclusão da task compartilhando o polling com outros waiters"""
+        if timeout is None:
+            timeout = Config.DEFAULT_TIMEOUT
+        
+        future = self.watch(task_id, poll_interval)
+        started_at = time.perf_counter()
+        active_waiters.inc()
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"Task {task_id} não foi concluída em {timeout} segundos")
+        finally:
+            active_waiters.dec()
+            self.release(task_id, future)
+            timing.record('poll_wait', time.perf_counter() - started_at, self.observed_polls(future))
+    
+    @staticmethod
+    def observed_polls(future: Future) -> int:
+        """Consultas ao upstream feitas pelo poller enquanto o waiter esteve inscrito"""
+        watch, polls_before = future.poll_state
+        return watch.polls - polls_before
+    
+    def status(self, task_id: str) -> Optional[str]:
+        """Último status observado para a task, se ela estiver sendo acompanhada"""
+        with self._lock:
+            watch = self._watches.get(task_id)
+            return watch.status if watch else None
+    
+    def subscriber_counts(self) -> Dict[str, int]:
+        """Número de waiters inscritos por task ativa"""
+        with self._lock:
+            return {task_id: len(watch.subscribers) for task_id, watch in self._watches.items()}
+    
+    def stats(self) -> Dict[str, Any]:
+        """Resumo das tasks acompanhadas pelo poller"""
+        with self._lock:
+            tasks = {
+                task_id: {
+                    'subscribers': len(watch.subscribers),
+                    'polls': watch.polls,
+                    'role': watch.role,
+                    'status': watch.status,
+                    'watching_for': round(time.time() - watch.started_at, 3),
+                }
+                for task_id, watch in self._watches.items()
+            }
+        coordinator = self.coordinator
+        return {
+            'active_tasks': len(tasks),
+            'subscribers': sum(t['subscribers'] for t in tasks.values()),
+            'coordination': None if coordinator is None else {
+                **coordinator.stats(), 'errors': self.coordination_errors,
+            },
+            'tasks': tasks,
+        }
+    
+    def _finish(self, watch: _TaskWatch, result: Dict[str, Any] = None, error: BaseException = None) -> None:
+        if error is None:
+            poll_iterations.observe(watch.polls)
+        with self._lock:
+            self._watches.pop(watch.task_id, None)
+            futures = list(watch.subscribers)
+            watch.subscribers.clear()
+            watch.listeners.clear()
+        for future in futures:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+    
+    @staticmethod
+    def _delay_cap(watch: _TaskWatch, delay: float) -> float:
+        explicit = [interval for interval in watch.subscribers.values() if interval is not None]
+        return min([delay] + explicit)
+    
+    def _run(self, watch: _TaskWatch) -> None:
+        # Polling é trabalho de segundo plano: leituras de usuários passam na frente
+        with background():
+            self._poll(watch)
+    
+    def _coordinate(self, operation, *args, fallback=None):
+        """Chamada ao backend de coordenação; em falha, a réplica segue sozinha"""
+        try:
+            return operation(*args)
+        except Exception:
+            with self._lock:
+                self.coordination_errors += 1
+            return fallback
+    
+    def _poll(self, watch: _TaskWatch) -> None:
+        strategy = watch.strategy
         while True:
-            if time.time() - start_time > timeout:
-                raise TimeoutError(f"Task {task_id} não foi concluída em {timeout} segundos")
+            leader = True
+            with self._lock:
+                streaming = bool(watch.listeners)
+            if streaming:
+                # O estado publicado entre réplicas não traz os steps: com streams inscritos
+                # a réplica consulta sozinha (um poll por task no processo, repassado a todos)
+                coordinator = None
+            else:
+                coordinator = self.coordinator
+            if coordinator is not None:
+                # Outra réplica pode já ter publicado o resultado final
+                state = self._coordinate(coordinator.state, watch.task_id)
+                if state is not None:
+                    with self._lock:
+                        watch.status = state.get('status')
+                    if state.get('result') is not None:
+                        self._finish(watch, result=state['result'])
+                        return
+                # Sem backend disponível, cada réplica faz o próprio polling
+                leader = self._coordinate(coordinator.acquire, watch.task_id, fallback=True)
+                watch.role = 'leader' if leader else 'follower'
             
-            task_details = self.get_task(task_id)
-            status = task_details['status']
-            
-            if status in ['finished', 'failed', 'stopped']:
-                return task_details
-            
-            time.sleep(poll_interval)
+            if leader:
+                delay = self._poll_tick(watch, strategy, coordinator)
+                if delay is None:
+                    return
+            else:
+                delay = Config.COORDINATION_FOLLOW_INTERVAL
+            if not self._sleep(watch, delay, coordinator, leader):
+                if leader and coordinator is not None:
+                    self._coordinate(coordinator.release, watch.task_id)
+                return
+    
+    def _poll_tick(self, watch: _TaskWatch, strategy: PollingStrategy, coordinator) -> Optional[float]:
+        """Uma consulta ao upstream; retorna a espera até a próxima ou None se a task terminou"""
+        with self._lock:
+            streaming = bool(watch.listeners)
+        try:
+            if streaming:
+                # Streams precisam dos steps: a task completa é buscada uma vez e repassada a todos
+                poll_ticks.inc('task')
+                payload = self.client.get_task(watch.task_id, use_cache=False)
+                full = True
+            else:
+                payload = self.client.poll_tick(watch.task_id, strategy)
+                full = strategy.last_endpoint == 'task'
+            status = extract_status(payload)
+            details = None
+            if status in TERMINAL_STATUSES:
+                # Detalhes completos só são buscados uma vez, ao final
+                details = payload if full else self.client.get_task(watch.task_id, use_cache=False)
+        except CircuitOpen as e:
+            # Upstream degradado: os waiters continuam aguardando e o polling volta quando o circuito admitir testes
+            return e.retry_after
+        except requests.exceptions.RequestException as e:
+            if self.client.breakers.enabled and is_degraded(e):
+                # Falha passageira: o circuito limita as consultas e o timeout de cada waiter limita a espera
+                return strategy.next_delay(False)
+            self._fail(watch, e, coordinator)
+            return None
+        except Exception as e:
+            self._fail(watch, e, coordinator)
+            return None
+        
+        with self._lock:
+            watch.marker, progressed = advance_marker(watch.marker, payload)
+            watch.status = status
+            watch.polls += 1
+            listeners = []
+            if full and (progressed or watch.details is None):
+                watch.details = payload
+                watch.version += 1
+                listeners = list(watch.listeners.values())
+        for on_update in listeners:
+            on_update()
+        
+        if coordinator is not None and (progressed or details is not None or watch.polls == 1):
+            self._coordinate(coordinator.publish, watch.task_id, {'status': status, 'result': details})
+        if details is not None:
+            if coordinator is not None:
+                self._coordinate(coordinator.release, watch.task_id)
+            self._finish(watch, result=details)
+            return None
+        return strategy.next_delay(progressed)
+    
+    def _fail(self, watch: _TaskWatch, error: BaseException, coordinator) -> None:
+        if coordinator is not None:
+            # As seguidoras assumem e fazem a própria consulta em vez de herdar o erro
+            self._coordinate(coordinator.release, watch.task_id)
+        self._finish(watch, error=error)
+    
+    def _sleep(self, watch: _TaskWatch, delay: float, coordinator, leader: bool) -> bool:
+        """Espera até o próximo tick; retorna False (e encerra a task) quando não restam waiters"""
+        if coordinator is not None and not leader:
+            # Seguidora: acorda com a publicação da líder
+            self._coordinate(coordinator.wait, watch.task_id, delay)
+            with self._lock:
+                if watch.subscribers:
+                    return True
+                self._watches.pop(watch.task_id, None)
+                return False
+        
+        deadline = time.time() + delay
+        renew_at = time.time() + Config.COORDINATION_LEASE_TTL / 3
+        while True:
+            with self._lock:
+                deadline = min(deadline, time.time() + self._delay_cap(watch, delay))
+                while watch.subscribers:
+                    remaining = min(deadline, renew_at if coordinator is not None else deadline) - time.time()
+                    if remaining <= 0:
+                        break
+                    watch.condition.wait(remaining)
+                    # Um novo waiter pode ter pedido um intervalo menor
+                    deadline = min(deadline, time.time() + self._delay_cap(watch, delay))
+                if not watch.subscribers:
+                    # Último waiter saiu: encerra o polling desta task
+                    self._watches.pop(watch.task_id, None)
+                    return False
+            if time.time() >= deadline:
+                return True
+            # Espera maior que o lease: renova fora do lock do poller
+            if not self._coordinate(coordinator.acquire, watch.task_id, fallback=True):
+                # Lease perdido (expirou e outra réplica assumiu): deixa de consultar o
+                # upstream e volta ao laço, que segue como seguidora da nova líder
+                watch.role = 'follower'
+                return True
+            renew_at = time.time() + Config.COORDINATION_LEASE_TTL / 3
 
 
 # Instância global do cliente
 browser_api = BrowserUseAPI()
 
+# Poller compartilhado entre todos os waiters do processo (e entre réplicas, com COORDINATION_BACKEND)
+task_poller = TaskPoller(browser_api)
+
+# Fila durável de jobs (workers iniciados sob demanda)
+job_queue = JobQueue(browser_api, task_poller)
+
+# Entrega de callbacks de conclusão (dispatchers iniciados sob demanda)
+webhook_dispatcher = WebhookDispatcher(task_poller)
+
+# Artefatos de tasks finalizadas em disco (ARTIFACTS_ENABLED)
+artifact_store = ArtifactStore()
+
+# Reservas de submissões idempotentes (Idempotency-Key e dedup por conteúdo)
+submissions = SubmissionRegistry()
+
+# Profiler por amostragem disparado pelo endpoint de administração (PROFILER_ENABLED)
+profiler = SamplingProfiler()
+
+# Índice local de tasks para listagens filtradas (TASK_INDEX_ENABLED)
+task_index = TaskIndex(browser_api)
+if task_index.enabled:
+    browser_api.task_index = task_index
+browser_api.artifacts = artifact_store
+
+
+def _poller_gauges() -> Dict[tuple, float]:
+    counts = task_poller.subscriber_counts()
+    return {('tasks',): len(counts), ('subscribers',): sum(counts.values())}
+
+
+metrics_registry.register_callback(
+    'browser_use_poller_active', 'Tasks acompanhadas pelo poller e seus waiters', ('kind',), _poller_gauges)
+
+
+def _credential_gauges() -> Dict[tuple, float]:
+    gauges = {}
+    for key in browser_api.credentials.stats()['keys']:
+        gauges[(key['id'], 'running_tasks')] = key['running_tasks']
+        gauges[(key['id'], 'pending_submissions')] = key['pending_submissions']
+        gauges[(key['id'], 'recent_429')] = key['recent_429']
+    return gauges
+
+
+metrics_registry.register_callback(
+    'browser_use_credential_load', 'Carga de cada chave do pool de credenciais', ('credential', 'kind'),
+    _credential_gauges)
+
+
+def _circuit_gauges() -> Dict[tuple, float]:
+    stats = browser_api.breakers.stats()
+    return {
+        (name,): STATE_VALUES[breaker['state']] for name, breaker in stats.items() if isinstance(breaker, dict)
+    }
+
+
+metrics_registry.register_callback(
+    'browser_use_circuit_state', 'Estado do circuito por classe de endpoint (0 fechado, 1 meio-aberto, 2 aberto)',
+    ('endpoint_class',), _circuit_gauges)
+
+
+def _upstream_error(e: Exception) -> tuple:
+    """
+    Converte uma falha do upstream em (payload, status HTTP, headers); limites viram 429 e circuito aberto, 503
+    
+    Aceita exceções do requests e do httpx (modo ASGI): ambas expõem a resposta em e.response.
+    """
+    if isinstance(e, CircuitOpen):
+        seconds = max(1, int(e.retry_after + 0.999))
+        return {
+            'error': f'API Browser Use indisponível no momento: {str(e)}',
+            'retry_after': seconds,
+        }, 503, {'Retry-After': str(seconds)}
+
+    retry_after = None
+    if isinstance(e, UpstreamThrottled):
+        retry_after = e.retry_after
+    else:
+        response = getattr(e, 'response', None)
+        if response is not None and response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get('Retry-After')) or Config.UPSTREAM_RETRY_DELAY
+    
+    if retry_after is None:
+        return {'error': f'Erro na API Browser Use: {str(e)}'}, 500, {}
+    seconds = max(1, int(retry_after + 0.999))
+    return {
+        'error': f'Limite de requisições da API Browser Use atingido: {str(e)}',
+        'retry_after': seconds,
+    }, 429, {'Retry-After': str(seconds)}
+
+
+def _upstream_error_response(e: requests.exceptions.RequestException):
+    payload, status_code, headers = _upstream_error(e)
+    return jsonify(payload), status_code, headers
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started_at = time.perf_counter()
+    timing.start()
+    stale.reset()
+
+
+@app.after_request
+def _server_timing(response):
+    # Registrado antes dos demais: roda por último e inclui a compressão
+    server_timing = timing.finish()
+    if server_timing:
+        response.headers['Server-Timing'] = server_timing
+    return response
+
+
+@app.after_request
+def _stale_headers(response):
+    age = stale.served_age()
+    if age is not None:
+        # Resposta montada com dados velhos (upstream degradado): idade do dado mais antigo
+        response.headers['X-Stale'] = 'true'
+        response.headers['Age'] = str(int(age))
+    return response
+
+
+@app.after_request
+def _record_request_metrics(response):
+    started_at = g.pop('request_started_at', None)
+    if started_at is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        http_requests.inc(request.method, route, str(response.status_code))
+        http_latency.observe(time.perf_counter() - started_at, request.method, route)
+    return response
+
+
+@app.after_request
+def _compress_response(response):
+    with timing.phase('compress'):
+        return compress_response(response, request.headers.get('Accept-Encoding', ''))
+
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -116,6 +982,109 @@ def health_check():
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _admin_denied():
+    """Resposta de erro se o profiler está desativado ou o token não confere (None se autorizado)"""
+    token = request.headers.get('X-Admin-Token', '')
+    if not profiler.enabled or not Config.PROFILER_TOKEN:
+        return jsonify({'error': 'Profiler desativado'}), 404
+    if not hmac.compare_digest(token.encode('utf-8'), Config.PROFILER_TOKEN.encode('utf-8')):
+        return jsonify({'error': 'Token de administração inválido'}), 403
+    return None
+
+
+def _profile_pending(session: Dict[str, Any]):
+    seconds = max(1, int(session['ready_at'] - time.time() + 0.999))
+    location = f"/api/v1/admin/profile/{session['session']}"
+    return jsonify({
+        'session': session['session'],
+        'status': 'running',
+        'ready_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(session['ready_at'])),
+        'result_url': location,
+    }), 202, {'Location': location, 'Retry-After': str(seconds)}
+
+
+@app.route('/api/v1/admin/profile', methods=['POST'])
+def profile_workers():
+    """
+    Dispara a amostragem das pilhas de todos os workers por N segundos
+
+    Responde 202 na hora; o resultado (collapsed stacks para flamegraph) fica
+    em GET /api/v1/admin/profile/<sessão> quando a amostragem termina.
+    """
+    denied = _admin_denied()
+    if denied is not None:
+        return denied
+    
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval', Config.PROFILER_INTERVAL))
+    except ValueError:
+        return jsonify({'error': 'Parâmetros "seconds" e "interval" devem ser números'}), 400
+    if not 0 < seconds <= Config.PROFILER_MAX_DURATION or not 0.001 <= interval <= 1:
+        return jsonify({
+            'error': f'"seconds" deve estar entre 0 e {Config.PROFILER_MAX_DURATION:g} e "interval" entre 0.001 e 1'
+        }), 400
+    
+    try:
+        session = profiler.trigger(seconds, interval)
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+    return _profile_pending(session)
+
+
+@app.route('/api/v1/admin/profile/<session>', methods=['GET'])
+def profile_result(session: str):
+    """Resultado de uma sessão do profiler (202 com Retry-After enquanto os workers amostram)"""
+    denied = _admin_denied()
+    if denied is not None:
+        return denied
+    
+    try:
+        result = profiler.collect(session)
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+    if result is None:
+        return jsonify({'error': 'Sessão do profiler não encontrada'}), 404
+    if 'stacks' not in result:
+        return _profile_pending(result)
+    return Response(result['stacks'], mimetype='text/plain', headers={'X-Profiler-Workers': str(result['workers'])})
+
+
+@app.route('/api/v1/upstream/pool', methods=['GET'])
+def upstream_pool_stats():
+    """Métricas de utilização do pool de conexões com o upstream e do governor"""
+    return jsonify({
+        **browser_api.session.stats(),
+        'governor': browser_api.governor.stats(),
+        'single_flight': browser_api.single_flight.stats(),
+        'idempotency': submissions.stats(),
+        'credentials': browser_api.credentials.stats(),
+        'circuits': browser_api.breakers.stats(),
+        'stale': browser_api.stale.stats(),
+    })
+
+
+@app.route('/api/v1/poller', methods=['GET'])
+def poller_stats():
+    """Tasks acompanhadas pelo poller compartilhado e seus waiters"""
+    return jsonify(task_poller.stats())
+
+
+@app.route('/api/v1/cache/stats', methods=['GET'])
+def cache_stats():
+    """Contadores do cache de respostas (hits, misses, evicções)"""
+    try:
+        return jsonify(browser_api.cache.stats())
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
 @app.route('/api/v1/run-task', methods=['POST'])
 def run_task():
     """
@@ -135,61 +1104,220 @@ def run_task():
         "highlight_elements": true,
         "included_file_names": ["string"],
         "wait_for_completion": false,
-        "timeout": 300
+        "timeout": 300,
+        "callback_url": "https://exemplo.com/webhook",
+        "dedup": false
     }
+    
+    Header opcional Idempotency-Key: repetições com a mesma chave devolvem a mesma task.
     """
     try:
-        data = request.get_json()
-        
-        if not data or 'task' not in data:
-            return jsonify({'error': 'Campo "task" é obrigatório'}), 400
-        
-        # Extrai parâmetros específicos da nossa API
-        wait_for_completion = data.pop('wait_for_completion', False)
-        timeout = data.pop('timeout', Config.DEFAULT_TIMEOUT)
+        payload, status_code = _submit_task(request.get_json(), request.headers.get('Idempotency-Key'))
+        headers = {'Retry-After': str(payload['retry_after'])} if 'retry_after' in payload else {}
+        if payload.get('reused'):
+            headers['Idempotent-Replayed'] = 'true'
+        return jsonify(payload), status_code, headers
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
+def _reusable_task(task_id: str) -> bool:
+    """Task duplicada só é reaproveitada se ainda está em andamento ou terminou com sucesso"""
+    try:
+        status = extract_status(browser_api.get_task_status(task_id))
+    except requests.exceptions.RequestException:
+        return False
+    return status not in ('failed', 'stopped')
+
+
+def _parse_flag(value: Any) -> Optional[bool]:
+    """Booleano do corpo: true/false em JSON ou como texto; None para qualquer outro valor"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    return None
+
+
+class _TaskSubmission:
+    """
+    Corpo de /run-task validado, comum aos modos síncrono e ASGI
+    
+    Os dois modos só trocam a submissão ao upstream e a espera; extração dos
+    parâmetros, validação, callback e formato das respostas ficam aqui.
+    """
+    
+    def __init__(self, data: Dict[str, Any], idempotency_key: str = None):
+        data = dict(data)
+        self.wait_for_completion = data.pop('wait_for_completion', False)
+        self.timeout = data.pop('timeout', Config.DEFAULT_TIMEOUT)
+        self.callback_url = data.pop('callback_url', None)
+        body_key = data.pop('idempotency_key', None)
+        self.idempotency_key = idempotency_key or body_key
+        self.dedup = _parse_flag(data.pop('dedup', Config.IDEMPOTENCY_DEDUP))
+        # O que sobra é repassado ao upstream
+        self.task = data
+    
+    @classmethod
+    def parse(cls, data: Any, idempotency_key: str = None) -> Tuple[Optional['_TaskSubmission'], Optional[str]]:
+        """Retorna (submissão, None) ou (None, mensagem de erro para um 400)"""
+        if not isinstance(data, dict) or 'task' not in data:
+            return None, 'Campo "task" é obrigatório'
+        submission = cls(data, idempotency_key)
+        if submission.dedup is None:
+            return None, 'Campo "dedup" deve ser booleano (true ou false)'
+        if submission.callback_url is not None:
+            error = validate_callback_url(submission.callback_url)
+            if error:
+                return None, error
+        return submission, None
+    
+    def accepted(self, task_id: str) -> None:
+        """Task submetida (ou reaproveitada): o resultado final será enviado via POST para a URL de callback"""
+        if self.callback_url:
+            webhook_dispatcher.register(task_id, self.callback_url)
+    
+    def created(self, task_id: str, reused: bool) -> tuple:
+        """Resposta sem espera: apenas o ID da task"""
+        response = {
+            'task_id': task_id,
+            'status': 'created',
+            'message': 'Task criada com sucesso. Use /api/v1/task/{task_id} para acompanhar o progresso.'
+        }
+        if self.callback_url:
+            response['callback_url'] = self.callback_url
+        if reused:
+            response['reused'] = True
+        return response, 200
+    
+    @staticmethod
+    def waited(outcome: tuple, reused: bool) -> tuple:
+        """Resposta com espera: o resultado de _completed_response/_timeout_response"""
+        payload, status_code = outcome
+        if reused:
+            payload['reused'] = True
+        return payload, status_code
+
+
+def _completed_response(task_id: str, result: Any) -> tuple:
+    return {'task_id': task_id, 'status': 'completed', 'result': result}, 200
+
+
+def _timeout_response(task_id: str, error: str, partial_result: Any) -> tuple:
+    return {'task_id': task_id, 'status': 'timeout', 'error': error, 'partial_result': partial_result}, 408
+
+
+def _submit_task(data: Any, idempotency_key: str = None) -> tuple:
+    """Valida, submete e opcionalmente aguarda uma task; retorna (payload, status HTTP)"""
+    try:
+        submission, error = _TaskSubmission.parse(data, idempotency_key)
+        if error:
+            return {'error': error}, 400
         
-        # Executa a task
-        result = browser_api.run_task(data)
+        # Executa a task (ou reaproveita uma submissão idêntica)
+        try:
+            result, reused = submissions.submit(
+                submission.task, browser_api.run_task, idempotency_key=submission.idempotency_key,
+                dedup=submission.dedup, reusable=_reusable_task,
+            )
+        except IdempotencyConflict as e:
+            return {'error': str(e)}, 422
         task_id = result['id']
+        submission.accepted(task_id)
         
-        if wait_for_completion:
-            # Aguarda conclusão e retorna resultado completo
-            try:
-                final_result = browser_api.wait_for_completion(task_id, timeout=timeout)
-                return jsonify({
-                    'task_id': task_id,
-                    'status': 'completed',
-                    'result': final_result
-                })
-            except TimeoutError as e:
-                return jsonify({
-                    'task_id': task_id,
-                    'status': 'timeout',
-                    'error': str(e),
-                    'partial_result': browser_api.get_task(task_id)
-                }), 408
-        else:
-            # Retorna apenas o ID da task
-            return jsonify({
-                'task_id': task_id,
-                'status': 'created',
-                'message': 'Task criada com sucesso. Use /api/v1/task/{task_id} para acompanhar o progresso.'
-            })
+        if not submission.wait_for_completion:
+            return submission.created(task_id, reused)
+        # Aguarda conclusão e retorna resultado completo
+        try:
+            outcome = _completed_response(task_id, task_poller.wait(task_id, timeout=submission.timeout))
+        except TimeoutError as e:
+            outcome = _timeout_response(task_id, str(e), browser_api.get_task(task_id))
+        return submission.waited(outcome, reused)
     
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        payload, status_code, _ = _upstream_error(e)
+        return payload, status_code
+    except Exception as e:
+        return {'error': f'Erro interno: {str(e)}'}, 500
+
+
+def _read_batch_items() -> List[Any]:
+    """Lê o lote como array JSON, objeto {"tasks": [...]} ou NDJSON (uma task por linha)"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonlines'):
+        return [loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+    data = request.get_json()
+    if isinstance(data, dict):
+        data = data.get('tasks')
+    if not isinstance(data, list):
+        raise ValueError('Body deve ser um array de tasks, {"tasks": [...]} ou NDJSON')
+    return data
+
+
+@app.route('/api/v1/run-tasks', methods=['POST'])
+def run_tasks():
+    """
+    Submete um lote de tasks com concorrência limitada
+    
+    Cada item aceita os mesmos campos de /api/v1/run-task (incluindo
+    wait_for_completion e timeout). A resposta é NDJSON, uma linha por item
+    na ordem em que terminam: {"index": n, "http_status": 200, ...}
+    """
+    try:
+        try:
+            items = _read_batch_items()
+        except ValueError as e:
+            # Inclui JSON/NDJSON malformado e corpo que não é UTF-8
+            return jsonify({'error': f'Lote inválido: {str(e)}'}), 400
+        except (BadRequest, UnsupportedMediaType) as e:
+            # get_json(): JSON malformado ou Content-Type que não é JSON nem NDJSON
+            return jsonify({'error': f'Lote inválido: {e.description}'}), 400
+        
+        if not items:
+            return jsonify({'error': 'Lote vazio'}), 400
+        if len(items) > Config.BATCH_MAX_ITEMS:
+            return jsonify({'error': f'Lote excede o limite de {Config.BATCH_MAX_ITEMS} tasks'}), 400
+        
+        concurrency = request.args.get('concurrency', Config.BATCH_MAX_WORKERS, type=int)
+        workers = max(1, min(concurrency, Config.BATCH_MAX_WORKERS, len(items)))
+        
+        def generate():
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+            try:
+                futures = {executor.submit(_submit_task, item): index for index, item in enumerate(items)}
+                for future in as_completed(futures):
+                    payload, status_code = future.result()
+                    yield dumps({'index': futures[future], 'http_status': status_code, **payload}) + '\n'
+            finally:
+                # Cliente desconectado: descarta os itens ainda não iniciados
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers={
+            'X-Accel-Buffering': 'no',
+        })
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 
 @app.route('/api/v1/task/<task_id>', methods=['GET'])
 def get_task(task_id: str):
-    """Obtém detalhes completos da task"""
+    """
+    Obtém detalhes da task
+
+    Query params opcionais: fields=status,output, steps_since=<n>, steps_limit=<k>.
+    """
     try:
-        result = browser_api.get_task(task_id)
+        try:
+            projection = parse_projection(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if projection is None:
+            result = browser_api.get_task(task_id)
+        else:
+            result = browser_api.get_task_projection(task_id, projection)
         return jsonify(result)
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
@@ -201,7 +1329,43 @@ def get_task_status(task_id: str):
         result = browser_api.get_task_status(task_id)
         return jsonify(result)
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
+@app.route('/api/v1/tasks/status', methods=['POST'])
+def get_tasks_status():
+    """
+    Obtém o status de várias tasks em uma única requisição
+    
+    Body esperado: {"task_ids": ["string"]} ou um array de ids.
+    Ids repetidos são consultados uma única vez.
+    """
+    try:
+        data = request.get_json()
+        task_ids = data.get('task_ids') if isinstance(data, dict) else data
+        if not isinstance(task_ids, list) or not all(isinstance(t, str) for t in task_ids):
+            return jsonify({'error': 'Campo "task_ids" deve ser uma lista de ids'}), 400
+        
+        unique_ids = list(dict.fromkeys(task_ids))
+        if len(unique_ids) > Config.BATCH_STATUS_MAX_IDS:
+            return jsonify({'error': f'Máximo de {Config.BATCH_STATUS_MAX_IDS} ids por requisição'}), 400
+        
+        statuses = {}
+        errors = {}
+        if unique_ids:
+            workers = min(Config.BATCH_MAX_WORKERS, len(unique_ids))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='status') as executor:
+                futures = {executor.submit(browser_api.get_task_status, task_id): task_id for task_id in unique_ids}
+                for future in as_completed(futures):
+                    task_id = futures[future]
+                    try:
+                        statuses[task_id] = extract_status(future.result())
+                    except requests.exceptions.RequestException as e:
+                        errors[task_id] = f'Erro na API Browser Use: {str(e)}'
+        
+        return jsonify({'statuses': statuses, 'errors': errors})
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
@@ -213,7 +1377,7 @@ def stop_task(task_id: str):
         result = browser_api.stop_task(task_id)
         return jsonify(result)
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
@@ -225,7 +1389,7 @@ def pause_task(task_id: str):
         result = browser_api.pause_task(task_id)
         return jsonify(result)
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
@@ -237,33 +1401,131 @@ def resume_task(task_id: str):
         result = browser_api.resume_task(task_id)
         return jsonify(result)
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 
 @app.route('/api/v1/tasks', methods=['GET'])
 def list_tasks():
-    """Lista todas as tasks"""
+    """
+    Lista tasks
+    
+    Com o índice local (TASK_INDEX_ENABLED): filtros status=a,b, model, domain,
+    created_after/created_before (ISO 8601 ou epoch), sort=[-]created_at|[-]finished_at,
+    limit e cursor. Com offset (ou sem o índice) a listagem do upstream é repassada;
+    enquanto o índice aquece, também as listagens sem filtros.
+    """
     try:
         limit = request.args.get('limit', 10, type=int)
+        if task_index.enabled and 'offset' not in request.args:
+            return _list_indexed_tasks(limit)
         offset = request.args.get('offset', 0, type=int)
         result = browser_api.list_tasks(limit=limit, offset=offset)
         return jsonify(result)
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
+@app.route('/api/v1/tasks/index', methods=['GET'])
+def task_index_stats():
+    """Estado do índice local de tasks"""
+    try:
+        return jsonify(task_index.stats())
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 
+def _list_indexed_tasks(limit: int):
+    """Consulta o índice local (milissegundos, independente do total de tasks)"""
+    task_index.start()
+    if task_index.warming:
+        return _list_tasks_while_warming(limit)
+    bounds = {}
+    for name in ('created_after', 'created_before'):
+        raw = request.args.get(name)
+        if raw:
+            bounds[name] = parse_timestamp(raw)
+            if bounds[name] is None:
+                return jsonify({'error': f'Parâmetro "{name}" deve ser uma data ISO 8601 ou epoch'}), 400
+    statuses = [s.strip() for s in request.args.get('status', '').split(',') if s.strip()]
+    try:
+        result = task_index.query(
+            statuses=statuses,
+            model=request.args.get('model'),
+            domain=request.args.get('domain'),
+            sort=request.args.get('sort', '-created_at'),
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            **bounds,
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    result['index'] = task_index.sync_state()
+    return jsonify(result)
+
+
+def _list_tasks_while_warming(limit: int):
+    """Índice sem a primeira sincronização completa: nunca responde uma lista vazia como se fosse o resultado"""
+    state = task_index.sync_state()
+    filtered = any(request.args.get(name) for name in
+                   ('status', 'model', 'domain', 'created_after', 'created_before', 'sort', 'cursor'))
+    if filtered:
+        seconds = max(1, int(Config.TASK_INDEX_SYNC_INTERVAL))
+        return jsonify({
+            'error': 'Índice de tasks em aquecimento; filtros disponíveis após a primeira sincronização',
+            'retry_after': seconds,
+            'index': state,
+        }), 503, {'Retry-After': str(seconds)}
+    # Sem filtros, a listagem do upstream responde o mesmo pedido
+    result = browser_api.list_tasks(limit=limit)
+    if isinstance(result, dict):
+        result = {**result, 'index': state}
+    return jsonify(result)
+
+
+def _proxy_artifact(task_id: str, kind: str) -> Response:
+    """Serve o artefato de task finalizada do disco; os demais são repassados do upstream em chunks"""
+    if artifact_store.enabled:
+        stored = artifact_store.lookup(task_id, kind)
+        if stored is not None:
+            return artifact_store.serve(stored)
+    
+    try:
+        stored = browser_api.get_task_artifact(task_id, kind)
+    except ArtifactTooLarge:
+        stored = None
+    if stored is not None:
+        return artifact_store.serve(stored)
+    return _stream_artifact(task_id, kind)
+
+
+def _stream_artifact(task_id: str, kind: str) -> Response:
+    """Repassa o corpo do upstream em chunks; a vaga do governor fica ocupada até o fim da transferência"""
+    headers = {name: request.headers[name] for name in PROXY_REQUEST_HEADERS if name in request.headers}
+    if 'Accept-Encoding' not in headers:
+        headers['Accept-Encoding'] = 'identity'
+    
+    upstream = browser_api.stream(f'/task/{task_id}/{kind}', f'get_task_{kind}', headers, task_id)
+    response = Response(
+        stream_with_context(upstream.iter_chunks()),
+        status=upstream.status_code,
+        content_type=upstream.headers.get('Content-Type', 'application/octet-stream'),
+        headers={name: upstream.headers[name] for name in PROXY_RESPONSE_HEADERS if name in upstream.headers},
+    )
+    response.call_on_close(upstream.close)
+    return response
+
+
 @app.route('/api/v1/task/<task_id>/media', methods=['GET'])
 def get_task_media(task_id: str):
     """Obtém mídia da task"""
     try:
-        result = browser_api.get_task_media(task_id)
-        return jsonify(result)
+        return _proxy_artifact(task_id, 'media')
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
@@ -272,10 +1534,9 @@ def get_task_media(task_id: str):
 def get_task_screenshots(task_id: str):
     """Obtém screenshots da task"""
     try:
-        result = browser_api.get_task_screenshots(task_id)
-        return jsonify(result)
+        return _proxy_artifact(task_id, 'screenshots')
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
@@ -284,10 +1545,9 @@ def get_task_screenshots(task_id: str):
 def get_task_gif(task_id: str):
     """Obtém GIF da task"""
     try:
-        result = browser_api.get_task_gif(task_id)
-        return jsonify(result)
+        return _proxy_artifact(task_id, 'gif')
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
@@ -297,23 +1557,200 @@ def wait_for_task_completion(task_id: str):
     """Aguarda a conclusão de uma task específica"""
     try:
         timeout = request.args.get('timeout', Config.DEFAULT_TIMEOUT, type=int)
-        poll_interval = request.args.get('poll_interval', Config.DEFAULT_POLL_INTERVAL, type=int)
+        poll_interval = request.args.get('poll_interval', type=int)
         
-        result = browser_api.wait_for_completion(task_id, poll_interval=poll_interval, timeout=timeout)
-        return jsonify({
-            'task_id': task_id,
-            'status': 'completed',
-            'result': result
-        })
+        result = task_poller.wait(task_id, poll_interval=poll_interval, timeout=timeout)
+        payload, status_code = _completed_response(task_id, result)
+        return jsonify(payload), status_code
     except TimeoutError as e:
-        return jsonify({
-            'task_id': task_id,
-            'status': 'timeout',
-            'error': str(e),
-            'partial_result': browser_api.get_task(task_id)
-        }), 408
+        payload, status_code = _timeout_response(task_id, str(e), browser_api.get_task(task_id))
+        return jsonify(payload), status_code
+    except requests.exceptions.RequestException as e:
+        return _upstream_error_response(e)
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
+def _format_event(fmt: str, event: str, cursor: int, data: Any) -> str:
+    """Serializa um evento como SSE ou como uma linha NDJSON"""
+    if fmt == 'ndjson':
+        return dumps({'event': event, 'cursor': cursor, 'data': data}) + '\n'
+    return f'id: {cursor}\nevent: {event}\ndata: {dumps(data)}\n\n'
+
+
+class _EventCursor:
+    """Converte snapshots sucessivos da task em eventos: apenas steps novos e transições de status"""
+    
+    def __init__(self, fmt: str, cursor: int):
+        self.fmt = fmt
+        self.cursor = cursor
+        self.status: Optional[str] = None
+        self.finished = False
+    
+    def event(self, event: str, data: Any) -> str:
+        return _format_event(self.fmt, event, self.cursor, data)
+    
+    def events(self, details: Dict[str, Any]) -> List[str]:
+        events = []
+        steps = details.get('steps') or []
+        # O cursor torna o diff O(steps novos), sem comparar a lista inteira
+        for index in range(self.cursor, len(steps)):
+            events.append(_format_event(self.fmt, 'step', index + 1, steps[index]))
+        self.cursor = max(self.cursor, len(steps))
+        
+        status = details.get('status')
+        if status != self.status:
+            events.append(self.event('status', {'status': status}))
+            self.status = status
+        if status in TERMINAL_STATUSES:
+            events.append(self.event('end', {'status': status, 'output': details.get('output')}))
+            self.finished = True
+        return events
+    
+    def keep_alive(self) -> Optional[str]:
+        # Comentário SSE mantém a conexão viva e detecta clientes desconectados
+        return ': keep-alive\n\n' if self.fmt == 'sse' else None
+
+
+def _task_events(task_id: str, details: Dict[str, Any], cursor: int, fmt: str,
+                 poll_interval: Optional[float], timeout: float):
+    """Emite os steps novos e as transições de status a partir do polling compartilhado da task"""
+    stream = _EventCursor(fmt, cursor)
+    yield from stream.events(details)
+    if stream.finished:
+        return
+    
+    # Todos os streams (e waiters) da task compartilham um único poll por tick
+    updated = threading.Event()
+    future = task_poller.watch(task_id, poll_interval, on_update=updated.set)
+    deadline = time.time() + timeout
+    version = 0
+    try:
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                yield stream.event('timeout', {'status': stream.status})
+                return
+            if not updated.wait(min(remaining, Config.EVENTS_KEEPALIVE_INTERVAL)):
+                keep_alive = stream.keep_alive()
+                if keep_alive:
+                    yield keep_alive
+                continue
+            updated.clear()
+            
+            if future.done():
+                try:
+                    details = future.result()
+                except requests.exceptions.RequestException as e:
+                    yield stream.event('error', {'error': f'Erro na API Browser Use: {str(e)}'})
+                    return
+                except Exception as e:
+                    yield stream.event('error', {'error': f'Erro interno: {str(e)}'})
+                    return
+            else:
+                latest_version, latest = task_poller.latest(future)
+                if latest is None or latest_version == version:
+                    continue
+                version, details = latest_version, latest
+            yield from stream.events(details)
+            if stream.finished:
+                return
+    finally:
+        task_poller.release(task_id, future)
+
+
+@app.route('/api/v1/task/<task_id>/events', methods=['GET'])
+def stream_task_events(task_id: str):
+    """
+    Transmite os steps novos e as mudanças de status da task
+    
+    Query params: format=sse|ndjson, since=<nº de steps já recebidos>,
+    timeout=<s>, poll_interval=<s>. Em SSE, o header Last-Event-ID retoma do cursor.
+    """
+    try:
+        fmt = request.args.get('format', 'sse')
+        if fmt not in ('sse', 'ndjson'):
+            return jsonify({'error': 'Parâmetro "format" deve ser "sse" ou "ndjson"'}), 400
+        
+        since = request.args.get('since', type=int)
+        if since is None:
+            since = request.headers.get('Last-Event-ID', 0, type=int)
+        timeout = request.args.get('timeout', Config.DEFAULT_TIMEOUT, type=int)
+        poll_interval = request.args.get('poll_interval', type=int)
+        
+        # Primeira consulta fora do stream para que erros virem respostas HTTP normais
+        details = browser_api.get_task(task_id, use_cache=False)
+        
+        events = _task_events(task_id, details, max(since, 0), fmt, poll_interval, timeout)
+        mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/event-stream'
+        return Response(stream_with_context(events), mimetype=mimetype, headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        })
     except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Erro na API Browser Use: {str(e)}'}), 500
+        return _upstream_error_response(e)
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
+@app.route('/api/v1/webhooks/deliveries', methods=['GET'])
+def webhook_deliveries():
+    """Estatísticas e entregas recentes de callbacks"""
+    return jsonify(webhook_dispatcher.stats())
+
+
+@app.route('/api/v1/jobs', methods=['POST'])
+def enqueue_job():
+    """
+    Enfileira uma task para execução em segundo plano
+    
+    Aceita o mesmo body de /api/v1/run-task; "timeout" limita o tempo que o
+    job acompanha a task. Retorna imediatamente com o id do job.
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict) or 'task' not in data:
+            return jsonify({'error': 'Campo "task" é obrigatório'}), 400
+        
+        data = dict(data)
+        data.pop('wait_for_completion', None)
+        timeout = data.pop('timeout', None)
+        
+        job = job_queue.enqueue(data, timeout=timeout)
+        return jsonify({
+            'job_id': job['id'],
+            'status': job['status'],
+            'message': 'Job enfileirado. Use /api/v1/jobs/{job_id} para acompanhar.'
+        }), 202
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
+@app.route('/api/v1/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    """Obtém o estado e o resultado final de um job"""
+    try:
+        job = job_queue.store.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job não encontrado'}), 404
+        return jsonify(job)
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+
+@app.route('/api/v1/jobs', methods=['GET'])
+def list_jobs():
+    """Lista jobs (mais recentes primeiro), opcionalmente filtrando por status"""
+    try:
+        status = request.args.get('status')
+        if status and status not in JOB_STATUSES:
+            return jsonify({'error': f'Status inválido. Use um de: {", ".join(JOB_STATUSES)}'}), 400
+        limit = request.args.get('limit', 50, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        return jsonify({
+            'jobs': job_queue.store.list(status=status, limit=limit, offset=offset),
+            'queue': job_queue.stats(),
+        })
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
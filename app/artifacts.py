@@ -0,0 +1,203 @@
+"""
+Armazenamento local (em disco) de artefatos de tasks finalizadas
+
+Mídia, screenshots e GIF de uma task finalizada nunca mudam. Na primeira
+leitura o corpo vindo do upstream é gravado em disco (um único download para
+os leitores simultâneos) e todas as leituras são servidas do arquivo com
+send_file (sendfile/wsgi.file_wrapper, Range e ETag tratados pelo Werkzeug)
+ou delegadas ao nginx via X-Accel-Redirect. Artefatos de tasks em execução
+(ou com o armazenamento desativado) nunca ficam inteiros em memória: são
+repassados do upstream em chunks. O diretório é limitado em idade
+e em tamanho total: os artefatos menos lidos são removidos primeiro.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from flask import Response, request, send_file
+
+from .config import Config
+
+ARTIFACT_KINDS = ('media', 'screenshots', 'gif')
+
+
+class ArtifactTooLarge(Exception):
+    """Corpo maior que ARTIFACTS_MAX_BYTES: não é gravado em disco, apenas repassado em chunks"""
+
+
+def _etag_header(etag: str) -> str:
+    # Metadados antigos guardavam o ETag sem aspas
+    return etag if etag.startswith(('"', 'W/"')) else f'"{etag}"'
+
+
+def _check_length(headers: Mapping[str, str], max_bytes: int) -> None:
+    expected = headers.get('Content-Length')
+    if expected is not None and expected.isdigit() and int(expected) > max_bytes:
+        raise ArtifactTooLarge(f'Artefato de {expected} bytes excede ARTIFACTS_MAX_BYTES')
+
+
+class ArtifactStore:
+    """Artefatos de tasks finalizadas gravados em disco"""
+
+    def __init__(self, root: str = None, enabled: bool = None, max_bytes: int = None, max_total_bytes: int = None,
+                 max_age: float = None):
+        self.root = root or Config.ARTIFACTS_DIR
+        self.enabled = Config.ARTIFACTS_ENABLED if enabled is None else enabled
+        self.max_bytes = max_bytes or Config.ARTIFACTS_MAX_BYTES
+        self.max_total_bytes = max_total_bytes or Config.ARTIFACTS_MAX_TOTAL_BYTES
+        self.max_age = Config.ARTIFACTS_TTL if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+        self._sweeping = False
+        self.removed = 0
+
+    def _relative_path(self, task_id: str, kind: str) -> str:
+        # Ids vêm da URL: o nome do arquivo é um hash, nunca o id em si
+        digest = hashlib.sha256(task_id.encode('utf-8')).hexdigest()
+        return os.path.join(digest[:2], f'{digest}.{kind}')
+
+    def _paths(self, task_id: str, kind: str) -> tuple:
+        data_path = os.path.join(self.root, self._relative_path(task_id, kind))
+        return data_path, f'{data_path}.json'
+
+    def lookup(self, task_id: str, kind: str) -> Optional[Dict[str, Any]]:
+        """Metadados do artefato gravado (None se ainda não existe)"""
+        data_path, meta_path = self._paths(task_id, kind)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            accessed_at = os.stat(data_path).st_mtime
+        except OSError:
+            return None
+        if time.time() - accessed_at > Config.ARTIFACTS_SWEEP_INTERVAL:
+            # O mtime marca o último uso: a limpeza remove primeiro os menos lidos
+            try:
+                os.utime(data_path)
+            except OSError:
+                pass
+        meta['path'] = data_path
+        meta['relative_path'] = self._relative_path(task_id, kind)
+        return meta
+
+    def store(self, task_id: str, kind: str, headers: Mapping[str, str],
+              chunks: Iterable[bytes]) -> Optional[Dict[str, Any]]:
+        """Grava o corpo inteiro e publica o arquivo; None se o disco não estiver disponível"""
+        _check_length(headers, self.max_bytes)
+        data_path, meta_path = self._paths(task_id, kind)
+        directory = os.path.dirname(data_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        except OSError:
+            return None
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ArtifactTooLarge(f'Artefato excede ARTIFACTS_MAX_BYTES ({self.max_bytes} bytes)')
+                    f.write(chunk)
+                    digest.update(chunk)
+
+            expected = headers.get('Content-Length')
+            if expected is not None and expected.isdigit() and int(expected) != size:
+                raise IOError(f'Corpo incompleto do upstream ({size} de {expected} bytes)')
+            meta = {
+                'content_type': headers.get('Content-Type', 'application/octet-stream'),
+                # ETag do upstream exatamente como veio (forte ou fraco)
+                'etag': headers.get('ETag') or f'"{digest.hexdigest()}"',
+                'size': size,
+                'stored_at': time.time(),
+            }
+            with open(f'{meta_path}.tmp', 'w') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, data_path)
+            os.replace(f'{meta_path}.tmp', meta_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self._maybe_sweep()
+        return self.lookup(task_id, kind)
+
+    def _maybe_sweep(self) -> None:
+        with self._lock:
+            if self._sweeping or time.time() - self._swept_at < Config.ARTIFACTS_SWEEP_INTERVAL:
+                return
+            self._sweeping = True
+        threading.Thread(target=self._sweep_in_background, name='artifacts-sweep', daemon=True).start()
+
+    def _sweep_in_background(self) -> None:
+        try:
+            self.sweep()
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._sweeping = False
+                self._swept_at = time.time()
+
+    def sweep(self) -> int:
+        """Remove artefatos sem uso há mais de ARTIFACTS_TTL e, acima de ARTIFACTS_MAX_TOTAL_BYTES, os menos lidos"""
+        entries: List[tuple] = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(('.json', '.tmp')):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        removed = 0
+        for accessed_at, size, path in entries:
+            expired = self.max_age > 0 and now - accessed_at > self.max_age
+            if not expired and total <= self.max_total_bytes:
+                break
+            # Metadados primeiro: lookup() deixa de encontrar o artefato antes do arquivo sumir
+            for target in (f'{path}.json', path):
+                try:
+                    os.unlink(target)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+        with self._lock:
+            self.removed += removed
+        return removed
+
+    def serve(self, meta: Dict[str, Any]) -> Response:
+        """Resposta para um artefato gravado (Range, If-None-Match e If-Modified-Since incluídos)"""
+        if Config.ARTIFACTS_ACCEL_REDIRECT:
+            # O nginx lê o arquivo e faz a transferência (location interna apontando para ARTIFACTS_DIR)
+            response = Response(status=200, content_type=meta['content_type'])
+            response.headers['X-Accel-Redirect'] = Config.ARTIFACTS_ACCEL_REDIRECT.rstrip('/') + '/' + \
+                meta['relative_path'].replace(os.sep, '/')
+            response.headers['ETag'] = _etag_header(meta['etag'])
+            return response
+
+        response = send_file(
+            os.path.abspath(meta['path']),
+            mimetype=meta['content_type'],
+            conditional=False,
+            etag=False,
+            max_age=Config.ARTIFACTS_MAX_AGE,
+        )
+        # set_etag() colocaria aspas de novo e tornaria forte um ETag fraco
+        response.headers['ETag'] = _etag_header(meta['etag'])
+        response.headers['X-Artifact-Source'] = 'disk'
+        return response.make_conditional(request, accept_ranges=True, complete_length=meta['size'])
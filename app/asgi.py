@@ -0,0 +1,621 @@
+"""
+Modo de execução assíncrono (ASGI) da API Browser Use
+
+As esperas longas (/wait, /events e run-task com wait_for_completion=true)
+rodam como corrotinas; as demais rotas são delegadas ao app Flask através de um adaptador
+WSGI -> ASGI. Executar com:
+
+    uvicorn app.asgi:application --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+import httpx
+import requests
+from asgiref.sync import SyncToAsync
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from .api import (
+    RETRY_STATUSES, _completed_response, _EventCursor, _reusable_task, _TaskSubmission, _timeout_response,
+    _upstream_error, app as flask_app, profiler, submissions, task_index, task_poller,
+)
+from .circuit import get_breakers, is_failure, upstream_timeout
+from .config import Config
+from .credentials import Credential, CredentialPool, get_credential_pool
+from .idempotency import IdempotencyConflict
+from .metrics import (
+    active_waiters, http_latency, http_requests, poll_iterations, poll_ticks, upstream_bytes, upstream_errors,
+    upstream_latency, upstream_retries, upstream_throttled,
+)
+from .polling import TERMINAL_STATUSES, PollingStrategy, advance_marker, extract_status, make_strategy
+from .ratelimit import UpstreamGovernor, UpstreamThrottled, get_governor, retry_delay
+from .serialization import dumps_bytes, loads, parse_upstream
+from .singleflight import AsyncSingleFlight
+from . import timing
+
+WAIT_ROUTE = re.compile(r'^/api/v1/task/(?P<task_id>[^/]+)/wait/?$')
+EVENTS_ROUTE = re.compile(r'^/api/v1/task/(?P<task_id>[^/]+)/events/?$')
+RUN_TASK_ROUTE = '/api/v1/run-task'
+
+# Equivalentes do requests.exceptions.ConnectionError: a requisição não obteve resposta do upstream
+_CONNECTION_ERRORS = (httpx.ConnectTimeout, httpx.NetworkError, httpx.RemoteProtocolError)
+
+
+async def _acquire(governor: UpstreamGovernor, endpoint_class: str) -> None:
+    """Espera uma vaga do governor fora do event loop"""
+    acquiring = asyncio.ensure_future(asyncio.to_thread(governor.acquire, endpoint_class))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        # A vaga ainda pode ser concedida depois do cancelamento: devolve assim que sair
+        acquiring.add_done_callback(
+            lambda f: f.cancelled() or f.exception() is not None or governor.release(endpoint_class))
+        raise
+
+
+class AsyncBrowserUseAPI:
+    """Cliente assíncrono (httpx) para a API Browser Use"""
+
+    def __init__(self, api_key: str = None, credentials: CredentialPool = None):
+        self._credentials = credentials or (CredentialPool([api_key]) if api_key else None)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.single_flight = AsyncSingleFlight()
+
+    @property
+    def credentials(self) -> CredentialPool:
+        """Chaves de API e associação task -> chave (o mesmo pool do cliente síncrono)"""
+        return self._credentials or get_credential_pool()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente httpx com pool de conexões (criado sob demanda)"""
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=Config.HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=Config.HTTP_POOL_MAXSIZE,
+            )
+            timeout = httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+            try:
+                self._client = httpx.AsyncClient(
+                    base_url=Config.BROWSER_USE_BASE_URL,
+                    limits=limits,
+                    timeout=timeout,
+                    http2=Config.HTTP2_ENABLED,
+                )
+            except ImportError:
+                # HTTP/2 requer o pacote opcional "h2" (pip install 'httpx[http2]')
+                self._client = httpx.AsyncClient(
+                    base_url=Config.BROWSER_USE_BASE_URL,
+                    limits=limits,
+                    timeout=timeout,
+                )
+        return self._client
+
+    async def _send(self, method: str, path: str, operation: str, credential: Credential,
+                    **kwargs) -> httpx.Response:
+        # Mesmo governor do modo síncrono: as esperas passam pelo poller, aqui ficam submissões e leituras de usuários
+        governor = get_governor()
+        endpoint_class = governor.classify(operation)
+        breaker = get_breakers().get(endpoint_class)
+        probe = breaker.allow() if breaker is not None else 0
+        connect_timeout, read_timeout = upstream_timeout(endpoint_class)
+        kwargs.setdefault('timeout', httpx.Timeout(read_timeout, connect=connect_timeout))
+        queued_at = time.perf_counter()
+        try:
+            await _acquire(governor, endpoint_class)
+        except BaseException as e:
+            # Sem vaga (ou cancelada na fila): a chamada não chegou ao upstream
+            if breaker is not None:
+                breaker.record(None, probe)
+            if isinstance(e, UpstreamThrottled):
+                upstream_throttled.inc(endpoint_class, 'acquire_timeout')
+            raise
+        self.credentials.record_request(credential)
+        start = time.perf_counter()
+        timing.record('queue', start - queued_at)
+        try:
+            response = await self.client.request(method, path, headers=credential.headers, **kwargs)
+        except httpx.HTTPError as e:
+            if breaker is not None:
+                # Timeouts e falhas de conexão/protocolo contam como upstream degradado
+                breaker.record(isinstance(e, httpx.TransportError), probe)
+            upstream_errors.inc(operation, type(e).__name__)
+            raise
+        except BaseException:
+            # Cancelamento da corrotina: libera a vaga de teste sem registrar resultado
+            if breaker is not None:
+                breaker.record(None, probe)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            upstream_latency.observe(elapsed, operation)
+            timing.record('upstream', elapsed)
+            governor.release(endpoint_class)
+        if breaker is not None:
+            breaker.record(is_failure(status_code=response.status_code), probe)
+        upstream_bytes.inc(operation, amount=len(response.content))
+        if response.status_code >= 400:
+            upstream_errors.inc(operation, f'http_{response.status_code}')
+        return response
+
+    async def _attempt(self, method: str, path: str, operation: str, task_id: Optional[str],
+                       credential: Credential, **kwargs) -> httpx.Response:
+        pool = self.credentials
+        response = await self._send(method, path, operation, credential, **kwargs)
+        if task_id is not None and pool.pooled and pool.pinned(task_id) is None:
+            # Task sem chave associada: registra a chave que a encontrou (em um 404, procura nas demais)
+            if response.status_code == 404:
+                for other in pool.others(credential):
+                    found = await self._send(method, path, operation, other, **kwargs)
+                    if found.status_code != 404:
+                        credential, response = other, found
+                        break
+            if response.status_code < 400:
+                await asyncio.to_thread(pool.pin, task_id, credential, False)
+        return response
+
+    async def _request(self, method: str, path: str, operation: str, task_id: str = None,
+                       credential: Credential = None, **kwargs) -> Dict[str, Any]:
+        """Executa uma requisição ao upstream, repetindo 429/503 (e falhas de conexão em leituras)"""
+        pool = self.credentials
+        submission = operation == 'run_task'
+        attempt = 0
+        while True:
+            if submission:
+                # Cada tentativa escolhe a chave de novo: um 429 desvia a submissão para outra chave
+                credential = await asyncio.to_thread(pool.acquire)
+            elif credential is None:
+                credential = pool.for_task(task_id) if task_id else pool.default
+            created = None
+            try:
+                try:
+                    response = await self._attempt(method, path, operation, task_id, credential, **kwargs)
+                except _CONNECTION_ERRORS:
+                    # Uma submissão pode ter sido aceita antes da falha: só leituras são repetidas
+                    if method != 'GET' or attempt >= Config.UPSTREAM_MAX_RETRIES:
+                        raise
+                    response = None
+
+                if response is not None and (
+                    response.status_code not in RETRY_STATUSES or attempt >= Config.UPSTREAM_MAX_RETRIES
+                ):
+                    response.raise_for_status()
+                    with timing.phase('parse'):
+                        result = parse_upstream(response.content)
+                    if submission:
+                        created = result.get('id')
+                    return result
+            finally:
+                if submission:
+                    await asyncio.to_thread(pool.release, credential, created)
+
+            delay = retry_delay(response, attempt)
+            upstream_retries.inc(operation, str(response.status_code) if response is not None else 'connection')
+            if response is not None and response.status_code == 429:
+                governor = get_governor()
+                upstream_throttled.inc(governor.classify(operation), 'upstream_429')
+                if pool.throttled(credential, delay):
+                    # Todas as chaves no limite: todas as chamadas do processo esperam, não só esta
+                    governor.pause(delay)
+                elif submission:
+                    # Outra chave ainda tem cota: desvia sem esperar nem gastar uma tentativa
+                    continue
+                else:
+                    await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    async def run_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa uma nova task (na chave menos carregada do pool)"""
+        return await self._request('POST', '/run-task', 'run_task', json=task_data)
+
+    async def get_task(self, task_id: str, coalesce: bool = True) -> Dict[str, Any]:
+        """Obtém detalhes completos da task"""
+        if not coalesce:
+            # Leitura obrigatoriamente nova: não pega carona em uma chamada iniciada antes
+            return await self._request('GET', f'/task/{task_id}', 'get_task', task_id)
+        return await self.single_flight.do(
+            f'task:{task_id}', lambda: self._request('GET', f'/task/{task_id}', 'get_task', task_id), 'get_task'
+        )
+
+    async def get_task_status(self, task_id: str) -> Dict[str, Any]:
+        """Obtém apenas o status da task"""
+        return await self.single_flight.do(
+            f'status:{task_id}',
+            lambda: self._request('GET', f'/task/{task_id}/status', 'get_task_status', task_id),
+            'get_task_status',
+        )
+
+    async def poll_tick(self, task_id: str, strategy: PollingStrategy) -> Any:
+        """Consulta usada a cada tick de polling (status leve ou task completa, conforme a estratégia)"""
+        endpoint = strategy.next_endpoint()
+        poll_ticks.inc(endpoint)
+        if endpoint == 'task':
+            return await self.get_task(task_id)
+        return await self.get_task_status(task_id)
+
+    async def wait_for_completion(self, task_id: str, poll_interval: float = None, timeout: float = None,
+                                  strategy: PollingStrategy = None) -> Dict[str, Any]:
+        """Aguarda a conclusão da task sem bloquear o event loop"""
+        if timeout is None:
+            timeout = Config.DEFAULT_TIMEOUT
+        if strategy is None:
+            strategy = make_strategy(poll_interval=poll_interval)
+
+        start_time = time.time()
+        last_marker = None
+        polls = 0
+        active_waiters.inc()
+        try:
+            while True:
+                if time.time() - start_time > timeout:
+                    raise TimeoutError(f"Task {task_id} não foi concluída em {timeout} segundos")
+
+                payload = await self.poll_tick(task_id, strategy)
+                polls += 1
+                if extract_status(payload) in TERMINAL_STATUSES:
+                    poll_iterations.observe(polls)
+                    if self.credentials.pooled:
+                        await asyncio.to_thread(self.credentials.finished, task_id)
+                    return payload if strategy.last_endpoint == 'task' else await self.get_task(task_id, coalesce=False)
+
+                last_marker, progressed = advance_marker(last_marker, payload)
+                delay = strategy.next_delay(progressed)
+                await asyncio.sleep(delay)
+                timing.record('poll_sleep', delay)
+        finally:
+            active_waiters.dec()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Instância global do cliente assíncrono
+async_browser_api = AsyncBrowserUseAPI()
+
+def _closing(wsgi_app):
+    """Garante close() do corpo da resposta, que o WsgiToAsgi não chama (PEP 3333)
+
+    Sem isso, recursos liberados em call_on_close (vagas do governor e
+    conexões do proxy de mídia) nunca voltariam ao pool.
+    """
+    def application(environ, start_response):
+        body = wsgi_app(environ, start_response)
+        try:
+            yield from body
+        finally:
+            close = getattr(body, 'close', None)
+            if close is not None:
+                close()
+    return application
+
+
+_wsgi_executor = ThreadPoolExecutor(max_workers=Config.ASGI_WSGI_THREADS, thread_name_prefix='wsgi')
+
+
+class _PooledWsgiInstance(WsgiToAsgiInstance):
+    # O padrão do asgiref (thread_sensitive=True) serializa todas as requisições WSGI em uma única thread
+    run_wsgi_app = SyncToAsync(
+        WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False, executor=_wsgi_executor
+    )
+
+
+class _PooledWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi que atende as requisições em um pool de threads próprio"""
+
+    async def __call__(self, scope, receive, send):
+        await _PooledWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+# Rotas não assíncronas continuam sendo atendidas pelo Flask
+wsgi_application = _PooledWsgiToAsgi(_closing(flask_app))
+
+
+async def _send_json(send: Callable[..., Awaitable[None]], payload: Any, status: int = 200,
+                     headers: Dict[str, str] = None) -> None:
+    with timing.phase('serialize'):
+        body = dumps_bytes(payload)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+        ] + [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _instrumented(send: Callable[..., Awaitable[None]], method: str, route: str) -> Callable[..., Awaitable[None]]:
+    """Envolve send() para registrar as métricas (e o Server-Timing) das rotas atendidas fora do Flask"""
+    started_at = time.perf_counter()
+    timing.start()
+
+    async def wrapped(message: dict) -> None:
+        if message['type'] == 'http.response.start':
+            http_requests.inc(method, route, str(message['status']))
+            http_latency.observe(time.perf_counter() - started_at, method, route)
+            server_timing = timing.finish()
+            if server_timing:
+                message = {**message, 'headers': [*message['headers'], (b'server-timing', server_timing.encode('latin-1'))]}
+        await send(message)
+
+    return wrapped
+
+
+async def _read_body(receive: Callable[[], Awaitable[dict]]) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+def _replay_body(body: bytes) -> Callable[[], Awaitable[dict]]:
+    """Reentrega ao Flask o corpo já consumido da requisição"""
+    sent = False
+
+    async def receive() -> dict:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # Nenhuma mensagem adicional: aguarda até a conexão ser encerrada
+        await asyncio.Event().wait()
+
+    return receive
+
+
+def _header(scope: dict, name: str) -> Optional[str]:
+    wanted = name.lower().encode('latin-1')
+    for key, value in scope.get('headers', []):
+        if key.lower() == wanted:
+            return value.decode('latin-1')
+    return None
+
+
+def _query_number(scope: dict, name: str, default: Optional[float]) -> Optional[float]:
+    values = parse_qs(scope.get('query_string', b'').decode('latin-1')).get(name)
+    if not values:
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        return default
+
+
+async def _wait_response(task_id: str, poll_interval: float, timeout: float) -> tuple:
+    """Executa a espera e monta (payload, status) igual ao modo síncrono"""
+    # O polling é compartilhado com os demais waiters da mesma task
+    future = task_poller.watch(task_id, poll_interval)
+    started_at = time.perf_counter()
+    active_waiters.inc()
+    try:
+        result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        return _completed_response(task_id, result)
+    except asyncio.TimeoutError:
+        return _timeout_response(
+            task_id, f"Task {task_id} não foi concluída em {timeout} segundos", await async_browser_api.get_task(task_id)
+        )
+    finally:
+        active_waiters.dec()
+        task_poller.release(task_id, future)
+        timing.record('poll_wait', time.perf_counter() - started_at, task_poller.observed_polls(future))
+
+
+async def wait_for_task_completion(scope, receive, send, task_id: str) -> None:
+    """Aguarda a conclusão de uma task específica (corrotina)"""
+    try:
+        timeout = _query_number(scope, 'timeout', Config.DEFAULT_TIMEOUT)
+        poll_interval = _query_number(scope, 'poll_interval', None)
+        payload, status = await _wait_response(task_id, poll_interval, timeout)
+        await _send_json(send, payload, status)
+    except (requests.exceptions.RequestException, httpx.HTTPError) as e:
+        payload, status, headers = _upstream_error(e)
+        await _send_json(send, payload, status, headers)
+    except Exception as e:
+        await _send_json(send, {'error': f'Erro interno: {str(e)}'}, 500)
+
+
+def _query_value(scope: dict, name: str, default: Optional[str]) -> Optional[str]:
+    values = parse_qs(scope.get('query_string', b'').decode('latin-1')).get(name)
+    return values[0] if values else default
+
+
+async def _disconnected(receive: Callable[[], Awaitable[dict]]) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream_task_events(scope, receive, send, task_id: str) -> None:
+    """Transmite os steps novos e as mudanças de status da task (corrotina inscrita no poller compartilhado)"""
+    fmt = _query_value(scope, 'format', 'sse')
+    if fmt not in ('sse', 'ndjson'):
+        await _send_json(send, {'error': 'Parâmetro "format" deve ser "sse" ou "ndjson"'}, 400)
+        return
+    since = _query_number(scope, 'since', None)
+    if since is None:
+        last_event_id = _header(scope, 'Last-Event-ID')
+        since = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    timeout = _query_number(scope, 'timeout', Config.DEFAULT_TIMEOUT)
+    poll_interval = _query_number(scope, 'poll_interval', None)
+
+    try:
+        # Primeira consulta fora do stream para que erros virem respostas HTTP normais
+        details = await async_browser_api.get_task(task_id, coalesce=False)
+    except (requests.exceptions.RequestException, httpx.HTTPError) as e:
+        payload, status, headers = _upstream_error(e)
+        await _send_json(send, payload, status, headers)
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'application/x-ndjson' if fmt == 'ndjson' else b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+
+    async def emit(chunks) -> None:
+        for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+
+    stream = _EventCursor(fmt, max(since, 0))
+    await emit(stream.events(details))
+    if stream.finished:
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    loop = asyncio.get_running_loop()
+    updated = asyncio.Event()
+
+    def on_update() -> None:
+        # Chamado pela thread do poller
+        try:
+            loop.call_soon_threadsafe(updated.set)
+        except RuntimeError:
+            pass
+
+    future = task_poller.watch(task_id, poll_interval, on_update=on_update)
+    disconnect = asyncio.ensure_future(_disconnected(receive))
+    deadline = time.time() + timeout
+    version = 0
+    try:
+        while not stream.finished:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                await emit([stream.event('timeout', {'status': stream.status})])
+                break
+            waiter = asyncio.ensure_future(updated.wait())
+            done, _ = await asyncio.wait(
+                {waiter, disconnect}, timeout=min(remaining, Config.EVENTS_KEEPALIVE_INTERVAL),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            waiter.cancel()
+            if disconnect in done:
+                return
+            if waiter not in done:
+                keep_alive = stream.keep_alive()
+                if keep_alive:
+                    await emit([keep_alive])
+                continue
+            updated.clear()
+
+            if future.done():
+                try:
+                    details = future.result()
+                except requests.exceptions.RequestException as e:
+                    await emit([stream.event('error', {'error': f'Erro na API Browser Use: {str(e)}'})])
+                    break
+                except Exception as e:
+                    await emit([stream.event('error', {'error': f'Erro interno: {str(e)}'})])
+                    break
+            else:
+                latest_version, latest = task_poller.latest(future)
+                if latest is None or latest_version == version:
+                    continue
+                version, details = latest_version, latest
+            await emit(stream.events(details))
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnect.cancel()
+        task_poller.release(task_id, future)
+
+
+async def run_task(scope, receive, send) -> None:
+    """Executa uma task; espera a conclusão como corrotina quando solicitado"""
+    body = await _read_body(receive)
+    try:
+        data = loads(body) if body else None
+    except ValueError:
+        data = None
+
+    if not isinstance(data, dict) or not data.get('wait_for_completion'):
+        # Sem espera: o fluxo síncrono existente atende a requisição
+        await wsgi_application(scope, _replay_body(body), send)
+        return
+
+    send = _instrumented(send, 'POST', RUN_TASK_ROUTE)
+    submission, error = _TaskSubmission.parse(data, _header(scope, 'Idempotency-Key'))
+    if error:
+        await _send_json(send, {'error': error}, 400)
+        return
+
+    try:
+        # A reserva (SQLite, possivelmente aguardando outra submissão) roda fora do event loop
+        task_id, reservation = await asyncio.to_thread(
+            submissions.claim, submission.task, submission.idempotency_key, submission.dedup, _reusable_task
+        )
+        reused = task_id is not None
+        if not reused:
+            try:
+                result = await async_browser_api.run_task(submission.task)
+            except BaseException:
+                if reservation is not None:
+                    await asyncio.to_thread(submissions.abandon, reservation)
+                raise
+            task_id = result['id']
+            if reservation is not None:
+                await asyncio.to_thread(submissions.complete, reservation, task_id)
+            if task_index.enabled:
+                await asyncio.to_thread(task_index.record_submission, result, submission.task)
+        submission.accepted(task_id)
+        payload, status = submission.waited(await _wait_response(task_id, None, submission.timeout), reused)
+        await _send_json(send, payload, status, {'Idempotent-Replayed': 'true'} if reused else None)
+    except IdempotencyConflict as e:
+        await _send_json(send, {'error': str(e)}, 422)
+    except (requests.exceptions.RequestException, httpx.HTTPError) as e:
+        payload, status, headers = _upstream_error(e)
+        await _send_json(send, payload, status, headers)
+    except Exception as e:
+        await _send_json(send, {'error': f'Erro interno: {str(e)}'}, 500)
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # uvicorn --workers N: cada processo observa os disparos do profiler
+            profiler.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_browser_api.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send) -> None:
+    """Aplicação ASGI: esperas assíncronas + demais rotas via Flask"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+
+    if scope['type'] == 'http':
+        path = scope['path']
+        method = scope['method']
+
+        match = WAIT_ROUTE.match(path)
+        if match and method == 'GET':
+            send = _instrumented(send, method, '/api/v1/task/<task_id>/wait')
+            await wait_for_task_completion(scope, receive, send, match.group('task_id'))
+            return
+        match = EVENTS_ROUTE.match(path)
+        if match and method == 'GET':
+            send = _instrumented(send, method, '/api/v1/task/<task_id>/events')
+            await stream_task_events(scope, receive, send, match.group('task_id'))
+            return
+        if path == RUN_TASK_ROUTE and method == 'POST':
+            await run_task(scope, receive, send)
+            return
+
+    await wsgi_application(scope, receive, send)
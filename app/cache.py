@@ -0,0 +1,183 @@
+"""
+Cache de respostas do upstream (LRU em memória com TTL ou Redis opcional)
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .config import Config
+from .serialization import dumps_bytes, encoded_size, parse_upstream
+
+
+class ResponseCache:
+    """Cache LRU thread-safe com TTL por entrada e limites de entradas e bytes"""
+
+    backend = 'memory'
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None):
+        self.max_entries = max_entries or Config.CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or Config.CACHE_MAX_BYTES
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retorna o valor em cache ou None (ausente ou expirado)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= now:
+                self._remove(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        """Armazena um valor; ttl=None mantém a entrada até ser removida por LRU"""
+        size = encoded_size(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                evicted_key, evicted = next(iter(self._entries.items()))
+                self._remove(evicted_key, evicted[2])
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._remove(key, entry[2])
+
+    def _remove(self, key: str, size: int) -> None:
+        del self._entries[key]
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.backend,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class RedisResponseCache:
+    """Cache compartilhado em Redis (a política de evicção fica a cargo do servidor)"""
+
+    backend = 'redis'
+
+    def __init__(self, url: str = None, prefix: str = 'browser-use:cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requer o pacote 'redis' (pip install redis)")
+        self._redis = redis.Redis.from_url(url or Config.REDIS_URL)
+        self._prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._redis.get(self._prefix + key)
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return parse_upstream(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        # Entradas "permanentes" recebem o TTL de tasks finalizadas para não crescer sem limite
+        ttl = ttl if ttl is not None else Config.CACHE_TERMINAL_TTL
+        self._redis.set(self._prefix + key, dumps_bytes(value), px=max(int(ttl * 1000), 1))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._redis.delete(*(self._prefix + key for key in keys))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        info = self._redis.info('stats')
+        lookups = hits + misses
+        return {
+            'backend': self.backend,
+            'entries': self._redis.dbsize(),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'evictions': info.get('evicted_keys', 0),
+            'expirations': info.get('expired_keys', 0),
+        }
+
+
+class NullCache:
+    """Cache desabilitado (CACHE_BACKEND=none)"""
+
+    backend = 'none'
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        pass
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': self.backend}
+
+
+def create_cache(backend: str = None):
+    """Cria o backend de cache configurado em CACHE_BACKEND"""
+    backend = (backend or Config.CACHE_BACKEND).lower()
+    if backend == 'memory':
+        return ResponseCache()
+    if backend == 'redis':
+        return RedisResponseCache()
+    if backend == 'none':
+        return NullCache()
+    raise ValueError(f"Backend de cache desconhecido: {backend}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Retorna o cache compartilhado do processo (criado sob demanda)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache()
+    return _cache
@@ -0,0 +1,191 @@
+"""
+Circuit breaker das chamadas ao upstream, por classe de endpoint
+
+Cada classe do governor (submit, read, poll) tem o próprio circuito:
+
+- fechado: chamadas passam; CIRCUIT_FAILURE_THRESHOLD falhas seguidas
+  (timeouts, erros de conexão ou respostas 5xx) abrem o circuito;
+- aberto: chamadas falham na hora com CircuitOpen (503 com Retry-After) por
+  CIRCUIT_OPEN_SECONDS, sem ocupar workers esperando um upstream degradado;
+- meio-aberto: até CIRCUIT_HALF_OPEN_PROBES chamadas de teste passam; um
+  sucesso de um teste fecha o circuito, uma falha o abre de novo. Chamadas
+  autorizadas antes da abertura não decidem nada ao terminar.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+from .config import Config
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Valor das métricas por estado (0 = fechado)
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(requests.exceptions.RequestException):
+    """Circuito aberto: a chamada nem foi feita ao upstream"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_failure(error: Optional[BaseException] = None, status_code: int = None) -> bool:
+    """Se o resultado de uma chamada indica upstream degradado (conta para abrir o circuito)"""
+    if error is not None:
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+    return status_code is not None and status_code >= 500
+
+
+class CircuitBreaker:
+    """Estado de um circuito (thread-safe)"""
+
+    def __init__(self, name: str, failure_threshold: int = None, open_seconds: float = None,
+                 half_open_probes: int = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.CIRCUIT_FAILURE_THRESHOLD
+        self.open_seconds = open_seconds or Config.CIRCUIT_OPEN_SECONDS
+        self.half_open_probes = half_open_probes or Config.CIRCUIT_HALF_OPEN_PROBES
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        # Cada abertura inicia uma geração; os testes do meio-aberto carregam a geração que os admitiu
+        self._generation = 0
+        self._counters = {'opened': 0, 'rejected': 0, 'failures': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> int:
+        """
+        Autoriza uma chamada ou levanta CircuitOpen
+
+        Retorna o token do teste (a geração da abertura, sempre > 0) se a
+        chamada é um teste do estado meio-aberto, ou 0; toda chamada
+        autorizada termina em record(), que recebe esse valor.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == CLOSED:
+                return 0
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return self._generation
+            self._counters['rejected'] += 1
+            retry_after = max(self.open_seconds - (now - self._opened_at), 1.0) if state == OPEN else 1.0
+        raise CircuitOpen(f'Circuito aberto para chamadas "{self.name}" ao upstream', retry_after)
+
+    def record(self, failed: Optional[bool], probe: int = 0) -> None:
+        """Resultado da chamada: True (falha), False (sucesso) ou None (sem resultado, ex.: fila do governor)"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            # Só o teste admitido neste meio-aberto conta; tokens de gerações anteriores são chamadas comuns
+            probe = bool(probe) and state == HALF_OPEN and probe == self._generation
+            if probe:
+                self._probes = max(0, self._probes - 1)
+            if failed is None:
+                return
+            if not failed:
+                # Sucesso atrasado de uma chamada anterior à abertura não fecha o circuito: no
+                # meio-aberto só o teste decide
+                if state == CLOSED:
+                    self._failures = 0
+                elif probe:
+                    self._failures = 0
+                    self._state = CLOSED
+                return
+            self._counters['failures'] += 1
+            self._failures += 1
+            # No meio-aberto só o resultado dos testes decide; falhas atrasadas não reabrem o circuito
+            if probe or (state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._generation += 1
+                self._counters['opened'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'open_for': round(max(0.0, self.open_seconds - (now - self._opened_at)), 3) if state == OPEN else 0.0,
+                **self._counters,
+            }
+
+
+class CircuitBreakers:
+    """Um circuito por classe de endpoint (criados sob demanda)"""
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = Config.CIRCUIT_ENABLED if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint_class: str) -> Optional[CircuitBreaker]:
+        """Circuito da classe (None se os circuitos estão desativados)"""
+        if not self.enabled:
+            return None
+        breaker = self._breakers.get(endpoint_class)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(endpoint_class, CircuitBreaker(endpoint_class))
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {'enabled': self.enabled, **{name: breaker.stats() for name, breaker in breakers.items()}}
+
+
+def upstream_timeout(endpoint_class: str) -> tuple:
+    """(connect, read) das chamadas de uma classe de endpoint"""
+    read = {
+        'submit': Config.UPSTREAM_TIMEOUT_SUBMIT,
+        'read': Config.UPSTREAM_TIMEOUT_READ,
+        'poll': Config.UPSTREAM_TIMEOUT_POLL,
+    }.get(endpoint_class, Config.HTTP_READ_TIMEOUT)
+    return Config.HTTP_CONNECT_TIMEOUT, read
+
+
+_breakers: Optional[CircuitBreakers] = None
+_breakers_lock = threading.Lock()
+
+
+def get_breakers() -> CircuitBreakers:
+    """Retorna os circuitos compartilhados do processo (criados sob demanda)"""
+    global _breakers
+    if _breakers is None:
+        with _breakers_lock:
+            if _breakers is None:
+                _breakers = CircuitBreakers()
+    return _breakers
+
+
+def _reset_after_fork() -> None:
+    # Cada worker observa o upstream pelas próprias chamadas
+    global _breakers, _breakers_lock
+    _breakers = None
+    _breakers_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,83 @@
+"""
+Compressão das respostas na própria aplicação (gzip ou brotli)
+
+Para implantações sem nginx na frente. Respostas em streaming (SSE, NDJSON,
+proxy de mídia), arquivos servidos com send_file, respostas parciais e
+corpos já codificados não são tocados.
+"""
+import gzip
+from typing import Optional
+
+from flask import Response
+
+from .config import Config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/problem+json', 'text/plain', 'text/html')
+
+
+def _accepted_encodings(header: str) -> dict:
+    encodings = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            encodings[name.lower()] = quality
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Escolhe a codificação suportada de maior preferência (brotli vence empates)"""
+    accepted = _accepted_encodings(accept_encoding or '')
+    wildcard = accepted.get('*', 0.0)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_response(response: Response, accept_encoding: str) -> Response:
+    """Comprime o corpo da resposta conforme o Accept-Encoding do cliente"""
+    if (
+        not Config.COMPRESSION_ENABLED
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.status_code != 200
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < Config.COMPRESSION_MIN_SIZE:
+        return response
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(data, quality=Config.COMPRESSION_BROTLI_QUALITY)
+    else:
+        body = gzip.compress(data, compresslevel=Config.COMPRESSION_GZIP_LEVEL)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # O corpo mudou: a ETag forte do original deixa de valer byte a byte
+        response.set_etag(etag, weak=True)
+    return response
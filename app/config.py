@@ -29,6 +29,10 @@ class Config:
     
     # API Browser Use
     BROWSER_USE_API_KEY: Optional[str] = os.getenv('BROWSER_USE_API_KEY')
+    # Pool de chaves (separadas por vírgula); sem ele, só BROWSER_USE_API_KEY
+    BROWSER_USE_API_KEYS: list = [
+        key.strip() for key in os.getenv('BROWSER_USE_API_KEYS', '').split(',') if key.strip()
+    ] or [key for key in [os.getenv('BROWSER_USE_API_KEY')] if key]
     BROWSER_USE_BASE_URL: str = os.getenv('BROWSER_USE_BASE_URL', 'https://api.browser-use.com/api/v1')
     
     # Flask
@@ -38,20 +42,182 @@ class Config:
     # Timeouts e intervalos
     DEFAULT_TIMEOUT: int = int(os.getenv('DEFAULT_TIMEOUT', 300))
     DEFAULT_POLL_INTERVAL: int = int(os.getenv('DEFAULT_POLL_INTERVAL', 2))
-    
+
+    # Estratégia de polling: "adaptive" (backoff com jitter) ou "fixed"
+    POLL_STRATEGY: str = os.getenv('POLL_STRATEGY', 'adaptive')
+    POLL_TICK_ENDPOINT: str = os.getenv('POLL_TICK_ENDPOINT', 'status')
+    POLL_INITIAL_INTERVAL: float = float(os.getenv('POLL_INITIAL_INTERVAL', 1))
+    POLL_MAX_INTERVAL: float = float(os.getenv('POLL_MAX_INTERVAL', 45))
+    POLL_BACKOFF_FACTOR: float = float(os.getenv('POLL_BACKOFF_FACTOR', 3))
+    POLL_JITTER: float = float(os.getenv('POLL_JITTER', 0.2))
+    POLL_FAST_POLLS: int = int(os.getenv('POLL_FAST_POLLS', 0))
+    POLL_PROGRESS_EVERY: int = int(os.getenv('POLL_PROGRESS_EVERY', 6))
+    # Intervalo máximo sem eventos antes de um keep-alive nos streams SSE de /events
+    EVENTS_KEEPALIVE_INTERVAL: float = float(os.getenv('EVENTS_KEEPALIVE_INTERVAL', 15))
+
+    # Pool de conexões HTTP com o upstream
+    HTTP_POOL_CONNECTIONS: int = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))
+    HTTP_POOL_MAXSIZE: int = int(os.getenv('HTTP_POOL_MAXSIZE', 100))
+    HTTP_POOL_BLOCK: bool = os.getenv('HTTP_POOL_BLOCK', 'False').lower() == 'true'
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+    HTTP_READ_TIMEOUT: float = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+    HTTP2_ENABLED: bool = os.getenv('HTTP2_ENABLED', 'False').lower() == 'true'
+
+    # Controle de vazão das chamadas ao upstream (taxas em req/s; 0 = sem limite)
+    UPSTREAM_RATE_LIMIT: float = float(os.getenv('UPSTREAM_RATE_LIMIT', 0))
+    UPSTREAM_RATE_BURST: float = float(os.getenv('UPSTREAM_RATE_BURST', 0))
+    UPSTREAM_SUBMIT_RATE_LIMIT: float = float(os.getenv('UPSTREAM_SUBMIT_RATE_LIMIT', 0))
+    UPSTREAM_READ_RATE_LIMIT: float = float(os.getenv('UPSTREAM_READ_RATE_LIMIT', 0))
+    UPSTREAM_POLL_RATE_LIMIT: float = float(os.getenv('UPSTREAM_POLL_RATE_LIMIT', 0))
+    UPSTREAM_MAX_IN_FLIGHT: int = int(os.getenv('UPSTREAM_MAX_IN_FLIGHT', 64))
+    UPSTREAM_SUBMIT_MAX_IN_FLIGHT: int = int(os.getenv('UPSTREAM_SUBMIT_MAX_IN_FLIGHT', 16))
+    UPSTREAM_READ_MAX_IN_FLIGHT: int = int(os.getenv('UPSTREAM_READ_MAX_IN_FLIGHT', 48))
+    UPSTREAM_POLL_MAX_IN_FLIGHT: int = int(os.getenv('UPSTREAM_POLL_MAX_IN_FLIGHT', 32))
+    UPSTREAM_ACQUIRE_TIMEOUT: float = float(os.getenv('UPSTREAM_ACQUIRE_TIMEOUT', 30))
+    UPSTREAM_MAX_RETRIES: int = int(os.getenv('UPSTREAM_MAX_RETRIES', 3))
+    UPSTREAM_RETRY_DELAY: float = float(os.getenv('UPSTREAM_RETRY_DELAY', 1))
+    UPSTREAM_RETRY_MAX_DELAY: float = float(os.getenv('UPSTREAM_RETRY_MAX_DELAY', 30))
+    UPSTREAM_RETRY_JITTER: float = float(os.getenv('UPSTREAM_RETRY_JITTER', 0.2))
+    # Timeout de leitura por classe de endpoint (o de conexão é HTTP_CONNECT_TIMEOUT)
+    UPSTREAM_TIMEOUT_SUBMIT: float = float(os.getenv('UPSTREAM_TIMEOUT_SUBMIT', 30))
+    UPSTREAM_TIMEOUT_READ: float = float(os.getenv('UPSTREAM_TIMEOUT_READ', 10))
+    UPSTREAM_TIMEOUT_POLL: float = float(os.getenv('UPSTREAM_TIMEOUT_POLL', 10))
+
+    # Circuit breaker por classe de endpoint
+    CIRCUIT_ENABLED: bool = os.getenv('CIRCUIT_ENABLED', 'True').lower() == 'true'
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+    CIRCUIT_OPEN_SECONDS: float = float(os.getenv('CIRCUIT_OPEN_SECONDS', 10))
+    CIRCUIT_HALF_OPEN_PROBES: int = int(os.getenv('CIRCUIT_HALF_OPEN_PROBES', 1))
+
+    # Última resposta boa das leituras, servida com o upstream degradado (stale-while-revalidate)
+    STALE_ENABLED: bool = os.getenv('STALE_ENABLED', 'True').lower() == 'true'
+    STALE_MAX_AGE: float = float(os.getenv('STALE_MAX_AGE', 3600))
+    STALE_MAX_ENTRIES: int = int(os.getenv('STALE_MAX_ENTRIES', 2000))
+    STALE_MAX_BYTES: int = int(os.getenv('STALE_MAX_BYTES', 64 * 1024 * 1024))
+    STALE_REFRESH_INTERVAL: float = float(os.getenv('STALE_REFRESH_INTERVAL', 5))
+
+    # Submissão em lote
+    BATCH_MAX_WORKERS: int = int(os.getenv('BATCH_MAX_WORKERS', 16))
+    BATCH_MAX_ITEMS: int = int(os.getenv('BATCH_MAX_ITEMS', 1000))
+    BATCH_STATUS_MAX_IDS: int = int(os.getenv('BATCH_STATUS_MAX_IDS', 500))
+
+    # Fila local de jobs (SQLite)
+    JOBS_DB_PATH: str = os.getenv('JOBS_DB_PATH', 'data/jobs.db')
+    JOBS_AUTOSTART: bool = os.getenv('JOBS_AUTOSTART', 'True').lower() == 'true'
+    JOBS_WORKERS: int = int(os.getenv('JOBS_WORKERS', 4))
+    JOBS_MAX_IN_FLIGHT: int = int(os.getenv('JOBS_MAX_IN_FLIGHT', 50))
+    JOBS_TASK_TIMEOUT: float = float(os.getenv('JOBS_TASK_TIMEOUT', 3600))
+    JOBS_MAX_ATTEMPTS: int = int(os.getenv('JOBS_MAX_ATTEMPTS', 5))
+    JOBS_RETRY_DELAY: float = float(os.getenv('JOBS_RETRY_DELAY', 2))
+    JOBS_HEARTBEAT_INTERVAL: float = float(os.getenv('JOBS_HEARTBEAT_INTERVAL', 5))
+    JOBS_IDLE_POLL_INTERVAL: float = float(os.getenv('JOBS_IDLE_POLL_INTERVAL', 1))
+
+    # Pool de credenciais: associação task -> chave e escolha da chave por carga
+    CREDENTIALS_DB_PATH: str = os.getenv('CREDENTIALS_DB_PATH', 'data/credentials.db')
+    CREDENTIALS_THROTTLE_WINDOW: float = float(os.getenv('CREDENTIALS_THROTTLE_WINDOW', 60))
+    CREDENTIALS_THROTTLE_PENALTY: float = float(os.getenv('CREDENTIALS_THROTTLE_PENALTY', 5))
+    CREDENTIALS_TASK_TTL: float = float(os.getenv('CREDENTIALS_TASK_TTL', 3600))
+    CREDENTIALS_MAX_PINS: int = int(os.getenv('CREDENTIALS_MAX_PINS', 1000000))
+
+    # Submissões idempotentes (Idempotency-Key) e deduplicação por conteúdo
+    IDEMPOTENCY_DB_PATH: str = os.getenv('IDEMPOTENCY_DB_PATH', 'data/idempotency.db')
+    IDEMPOTENCY_KEY_TTL: float = float(os.getenv('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+    IDEMPOTENCY_DEDUP: bool = os.getenv('IDEMPOTENCY_DEDUP', 'False').lower() == 'true'
+    IDEMPOTENCY_DEDUP_WINDOW: float = float(os.getenv('IDEMPOTENCY_DEDUP_WINDOW', 600))
+    IDEMPOTENCY_PENDING_TIMEOUT: float = float(os.getenv('IDEMPOTENCY_PENDING_TIMEOUT', 60))
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', 100000))
+
+    # Índice local de tasks (SQLite) para listagens com filtros e cursor
+    TASK_INDEX_ENABLED: bool = os.getenv('TASK_INDEX_ENABLED', 'False').lower() == 'true'
+    TASK_INDEX_DB_PATH: str = os.getenv('TASK_INDEX_DB_PATH', 'data/tasks.db')
+    TASK_INDEX_SYNC_INTERVAL: float = float(os.getenv('TASK_INDEX_SYNC_INTERVAL', 30))
+    TASK_INDEX_FULL_SYNC_INTERVAL: float = float(os.getenv('TASK_INDEX_FULL_SYNC_INTERVAL', 6 * 3600))
+    TASK_INDEX_PAGE_SIZE: int = int(os.getenv('TASK_INDEX_PAGE_SIZE', 100))
+    TASK_INDEX_MAX_PAGES: int = int(os.getenv('TASK_INDEX_MAX_PAGES', 1000))
+
+    # Callbacks (webhooks) de conclusão de tasks
+    WEBHOOK_WORKERS: int = int(os.getenv('WEBHOOK_WORKERS', 4))
+    WEBHOOK_BATCH_SIZE: int = int(os.getenv('WEBHOOK_BATCH_SIZE', 20))
+    WEBHOOK_MAX_ATTEMPTS: int = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', 6))
+    WEBHOOK_RETRY_DELAY: float = float(os.getenv('WEBHOOK_RETRY_DELAY', 2))
+    WEBHOOK_TIMEOUT: float = float(os.getenv('WEBHOOK_TIMEOUT', 10))
+    WEBHOOK_WATCH_TIMEOUT: float = float(os.getenv('WEBHOOK_WATCH_TIMEOUT', 3600))
+    WEBHOOK_WATCHDOG_INTERVAL: float = float(os.getenv('WEBHOOK_WATCHDOG_INTERVAL', 5))
+    WEBHOOK_POOL_CONNECTIONS: int = int(os.getenv('WEBHOOK_POOL_CONNECTIONS', 20))
+    WEBHOOK_HISTORY: int = int(os.getenv('WEBHOOK_HISTORY', 1000))
+    WEBHOOK_RECENT_LIMIT: int = int(os.getenv('WEBHOOK_RECENT_LIMIT', 50))
+    WEBHOOK_SECRET: Optional[str] = os.getenv('WEBHOOK_SECRET')
+
+    # Cache de respostas: "memory", "redis" ou "none"
+    CACHE_BACKEND: str = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_MAX_ENTRIES: int = int(os.getenv('CACHE_MAX_ENTRIES', 2000))
+    CACHE_MAX_BYTES: int = int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    CACHE_RUNNING_TTL: float = float(os.getenv('CACHE_RUNNING_TTL', 2))
+    CACHE_TERMINAL_TTL: float = float(os.getenv('CACHE_TERMINAL_TTL', 7 * 24 * 3600))
+    CACHE_LIST_TTL: float = float(os.getenv('CACHE_LIST_TTL', 2))
+    REDIS_URL: str = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Coordenação do polling entre réplicas: "redis", "sqlite" ou vazio (desativada)
+    COORDINATION_BACKEND: str = os.getenv('COORDINATION_BACKEND', '')
+    COORDINATION_REDIS_URL: Optional[str] = os.getenv('COORDINATION_REDIS_URL')
+    COORDINATION_PREFIX: str = os.getenv('COORDINATION_PREFIX', 'browser-use:coord:')
+    COORDINATION_DB_PATH: str = os.getenv('COORDINATION_DB_PATH', 'data/coordination.db')
+    COORDINATION_LEASE_TTL: float = float(os.getenv('COORDINATION_LEASE_TTL', 15))
+    COORDINATION_FOLLOW_INTERVAL: float = float(os.getenv('COORDINATION_FOLLOW_INTERVAL', 1))
+    COORDINATION_STATE_TTL: float = float(os.getenv('COORDINATION_STATE_TTL', 600))
+
+    # Proxy de mídia/screenshots/GIF e artefatos de tasks finalizadas em disco
+    PROXY_CHUNK_SIZE: int = int(os.getenv('PROXY_CHUNK_SIZE', 64 * 1024))
+    ARTIFACTS_ENABLED: bool = os.getenv('ARTIFACTS_ENABLED', 'True').lower() == 'true'
+    ARTIFACTS_DIR: str = os.getenv('ARTIFACTS_DIR', 'data/artifacts')
+    ARTIFACTS_MAX_BYTES: int = int(os.getenv('ARTIFACTS_MAX_BYTES', 100 * 1024 * 1024))
+    ARTIFACTS_MAX_AGE: int = int(os.getenv('ARTIFACTS_MAX_AGE', 86400))
+    # Limpeza do diretório: tamanho total, tempo sem leitura (0 = sem limite) e intervalo mínimo entre varreduras
+    ARTIFACTS_MAX_TOTAL_BYTES: int = int(os.getenv('ARTIFACTS_MAX_TOTAL_BYTES', 10 * 1024 * 1024 * 1024))
+    ARTIFACTS_TTL: float = float(os.getenv('ARTIFACTS_TTL', 7 * 86400))
+    ARTIFACTS_SWEEP_INTERVAL: float = float(os.getenv('ARTIFACTS_SWEEP_INTERVAL', 60))
+    ARTIFACTS_ACCEL_REDIRECT: str = os.getenv('ARTIFACTS_ACCEL_REDIRECT', '')
+
+    # Serialização JSON ("auto" usa orjson se instalado) e compressão das respostas
+    JSON_PROVIDER: str = os.getenv('JSON_PROVIDER', 'auto')
+    COMPRESSION_ENABLED: bool = os.getenv('COMPRESSION_ENABLED', 'False').lower() == 'true'
+    COMPRESSION_MIN_SIZE: int = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+
+    # Métricas (/metrics no formato do Prometheus)
+    METRICS_ENABLED: bool = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    # Header Server-Timing com os tempos por fase de cada requisição
+    SERVER_TIMING_ENABLED: bool = os.getenv('SERVER_TIMING_ENABLED', 'False').lower() == 'true'
+
+    # Profiler por amostragem sob demanda (/api/v1/admin/profile, protegido por PROFILER_TOKEN)
+    PROFILER_ENABLED: bool = os.getenv('PROFILER_ENABLED', 'False').lower() == 'true'
+    PROFILER_TOKEN: Optional[str] = os.getenv('PROFILER_TOKEN')
+    PROFILER_DIR: str = os.getenv('PROFILER_DIR', 'data/profiler')
+    PROFILER_INTERVAL: float = float(os.getenv('PROFILER_INTERVAL', 0.01))
+    PROFILER_MAX_DURATION: float = float(os.getenv('PROFILER_MAX_DURATION', 60))
+    PROFILER_WATCH_INTERVAL: float = float(os.getenv('PROFILER_WATCH_INTERVAL', 1))
+    PROFILER_COLLECT_GRACE: float = float(os.getenv('PROFILER_COLLECT_GRACE', 1))
+    PROFILER_RESULT_TTL: float = float(os.getenv('PROFILER_RESULT_TTL', 3600))
+
+    # Modo de servidor: "sync" (Flask/WSGI) ou "asgi" (esperas assíncronas)
+    SERVER_MODE: str = os.getenv('SERVER_MODE', 'sync').lower()
+    # Threads que atendem as rotas do Flask no modo ASGI
+    ASGI_WSGI_THREADS: int = int(os.getenv('ASGI_WSGI_THREADS', 32))
+
     @classmethod
     def validate(cls) -> None:
         """Valida se todas as configurações obrigatórias estão presentes"""
-        if not cls.BROWSER_USE_API_KEY:
+        if not cls.BROWSER_USE_API_KEYS:
             raise ValueError(
-                "BROWSER_USE_API_KEY não está configurada. "
+                "BROWSER_USE_API_KEY (ou BROWSER_USE_API_KEYS) não está configurada. "
                 "Configure a variável de ambiente ou crie um arquivo .env"
             )
     
     @classmethod
     def get_headers(cls) -> dict:
-        """Retorna headers para requisições à API Browser Use"""
-        return {'Authorization': f'Bearer {cls.BROWSER_USE_API_KEY}'}
+        """Retorna headers para requisições à API Browser Use (primeira chave do pool, a padrão)"""
+        return {'Authorization': f'Bearer {cls.BROWSER_USE_API_KEYS[0]}'}
 
 # Validar configurações na importação
 Config.validate()
@@ -0,0 +1,293 @@
+"""
+Coordenação do polling de tasks entre réplicas
+
+Sem coordenação, cada instância atrás do nginx (e cada worker do gunicorn)
+acompanha sozinha as tasks dos próprios waiters: escalar horizontalmente
+multiplica as consultas ao upstream. Com COORDINATION_BACKEND, cada task tem
+um único líder — quem detém o lease (COORDINATION_LEASE_TTL) — que faz o
+polling e publica cada mudança de status; as demais réplicas acompanham o
+estado publicado sem chamar o upstream. Se o líder morre, o lease expira e uma
+das seguidoras assume.
+
+Backends:
+
+- "redis": lease com SET NX PX, renovação e liberação atômicas (Lua), estado
+  em uma chave com TTL e notificação das seguidoras por PUBLISH.
+- "sqlite": o mesmo protocolo em um arquivo SQLite (modo WAL), para várias
+  instâncias no mesmo host ou testes; as seguidoras consultam a versão do
+  estado em vez de receber notificações.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from .config import Config
+from .serialization import dumps_bytes, loads
+
+# Intervalo entre consultas da versão do estado no backend SQLite
+_SQLITE_WAIT_STEP = 0.1
+# Limpeza de leases e estados vencidos a cada N publicações
+_PRUNE_EVERY = 100
+
+
+def _replica_id() -> str:
+    """Identificador único do processo (host, pid e sufixo aleatório)"""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+_ACQUIRE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+if current == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCoordinator:
+    """Leases e estado publicado em Redis (ou compatível), com notificação por pub/sub"""
+
+    backend = 'redis'
+
+    def __init__(self, url: str = None, prefix: str = None):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("COORDINATION_BACKEND=redis requer o pacote 'redis' (pip install redis)")
+        self._redis = redis.Redis.from_url(url or Config.COORDINATION_REDIS_URL or Config.REDIS_URL)
+        self._prefix = prefix or Config.COORDINATION_PREFIX
+        self._channel = f'{self._prefix}events'
+        self._acquire = self._redis.register_script(_ACQUIRE_SCRIPT)
+        self._release = self._redis.register_script(_RELEASE_SCRIPT)
+        self.owner = _replica_id()
+        # Notificações recebidas por task (só das tasks com seguidoras aguardando)
+        self._condition = threading.Condition()
+        self._generations: Dict[str, int] = {}
+        self._waiting: Counter = Counter()
+        self._listening = False
+
+    def acquire(self, task_id: str) -> bool:
+        """Obtém ou renova o lease da task; True se esta réplica é a líder"""
+        ttl_ms = int(Config.COORDINATION_LEASE_TTL * 1000)
+        return bool(self._acquire(keys=[f'{self._prefix}lease:{task_id}'], args=[self.owner, ttl_ms]))
+
+    def release(self, task_id: str) -> None:
+        self._release(keys=[f'{self._prefix}lease:{task_id}'], args=[self.owner])
+
+    def publish(self, task_id: str, state: Dict[str, Any]) -> None:
+        """Grava o estado da task e avisa as seguidoras"""
+        ttl_ms = int(Config.COORDINATION_STATE_TTL * 1000)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.set(f'{self._prefix}state:{task_id}', dumps_bytes(state), px=ttl_ms)
+        pipe.publish(self._channel, task_id)
+        pipe.execute()
+
+    def state(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._redis.get(f'{self._prefix}state:{task_id}')
+        return loads(raw) if raw is not None else None
+
+    def wait(self, task_id: str, timeout: float) -> None:
+        """Aguarda uma publicação sobre a task (ou o timeout)"""
+        self._ensure_listener()
+        with self._condition:
+            self._waiting[task_id] += 1
+            generation = self._generations.get(task_id, 0)
+            try:
+                self._condition.wait_for(lambda: self._generations.get(task_id, 0) != generation, timeout)
+            finally:
+                self._waiting[task_id] -= 1
+                if self._waiting[task_id] <= 0:
+                    del self._waiting[task_id]
+                    self._generations.pop(task_id, None)
+
+    def _ensure_listener(self) -> None:
+        with self._condition:
+            if self._listening:
+                return
+            self._listening = True
+        threading.Thread(target=self._listen, name='coordination-listener', daemon=True).start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+                for message in pubsub.listen():
+                    task_id = message['data'].decode('utf-8')
+                    with self._condition:
+                        if task_id in self._waiting:
+                            self._generations[task_id] = self._generations.get(task_id, 0) + 1
+                            self._condition.notify_all()
+            except Exception:
+                # Conexão perdida: as seguidoras continuam pelo timeout até reconectar
+                time.sleep(1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': self.backend, 'replica': self.owner}
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    task_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS states (
+    task_id TEXT PRIMARY KEY,
+    state BLOB NOT NULL,
+    version INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteCoordinator:
+    """Leases e estado publicado em SQLite (réplicas no mesmo host)"""
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.COORDINATION_DB_PATH
+        self.owner = _replica_id()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._published = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if not self._schema_ready:
+                conn.executescript(_SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, task_id: str) -> bool:
+        """Obtém ou renova o lease da task; True se esta réplica é a líder"""
+        now = time.time()
+        cursor = self._conn().execute(
+            'INSERT INTO leases (task_id, owner, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (task_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+            'WHERE leases.owner = excluded.owner OR leases.expires_at <= ?',
+            (task_id, self.owner, now + Config.COORDINATION_LEASE_TTL, now),
+        )
+        return cursor.rowcount > 0
+
+    def release(self, task_id: str) -> None:
+        self._conn().execute('DELETE FROM leases WHERE task_id = ? AND owner = ?', (task_id, self.owner))
+
+    def publish(self, task_id: str, state: Dict[str, Any]) -> None:
+        now = time.time()
+        self._conn().execute(
+            'INSERT INTO states (task_id, state, version, expires_at) VALUES (?, ?, 1, ?) '
+            'ON CONFLICT (task_id) DO UPDATE SET state = excluded.state, version = states.version + 1, '
+            'expires_at = excluded.expires_at',
+            (task_id, dumps_bytes(state), now + Config.COORDINATION_STATE_TTL),
+        )
+        self._maybe_prune(now)
+
+    def _maybe_prune(self, now: float) -> None:
+        with self._lock:
+            self._published += 1
+            due = self._published % _PRUNE_EVERY == 0
+        if due:
+            conn = self._conn()
+            conn.execute('DELETE FROM states WHERE expires_at <= ?', (now,))
+            conn.execute('DELETE FROM leases WHERE expires_at <= ?', (now,))
+
+    def _version(self, task_id: str) -> int:
+        row = self._conn().execute(
+            'SELECT version FROM states WHERE task_id = ? AND expires_at > ?', (task_id, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def state(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            'SELECT state FROM states WHERE task_id = ? AND expires_at > ?', (task_id, time.time())
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def wait(self, task_id: str, timeout: float) -> None:
+        """Aguarda uma nova versão do estado da task (ou o timeout)"""
+        deadline = time.monotonic() + timeout
+        version = self._version(task_id)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(_SQLITE_WAIT_STEP, remaining))
+            if self._version(task_id) != version:
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        conn = self._conn()
+        return {
+            'backend': self.backend,
+            'replica': self.owner,
+            'leases': conn.execute('SELECT COUNT(*) FROM leases WHERE expires_at > ?', (now,)).fetchone()[0],
+            'states': conn.execute('SELECT COUNT(*) FROM states WHERE expires_at > ?', (now,)).fetchone()[0],
+        }
+
+
+def create_coordinator(backend: str = None):
+    """Cria o backend de coordenação configurado em COORDINATION_BACKEND (None se desativado)"""
+    backend = (backend if backend is not None else Config.COORDINATION_BACKEND).lower()
+    if backend in ('', 'none'):
+        return None
+    if backend == 'redis':
+        return RedisCoordinator()
+    if backend == 'sqlite':
+        return SQLiteCoordinator()
+    raise ValueError(f"Backend de coordenação desconhecido: {backend}")
+
+
+_coordinator = None
+_coordinator_ready = False
+_coordinator_lock = threading.Lock()
+
+
+def get_coordinator():
+    """Retorna o coordenador do processo (criado sob demanda; None se desativado)"""
+    global _coordinator, _coordinator_ready
+    if not _coordinator_ready:
+        with _coordinator_lock:
+            if not _coordinator_ready:
+                _coordinator = create_coordinator()
+                _coordinator_ready = True
+    return _coordinator
+
+
+def _reset_after_fork() -> None:
+    # Cada worker é uma réplica: identificador, conexões e listener próprios
+    global _coordinator, _coordinator_ready, _coordinator_lock
+    _coordinator = None
+    _coordinator_ready = False
+    _coordinator_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,276 @@
+"""
+Pool de credenciais (chaves de API) do upstream
+
+Com várias chaves em BROWSER_USE_API_KEYS, cada submissão vai para a chave
+menos carregada: tasks em andamento criadas por ela somadas a uma penalidade
+por 429 recente (CREDENTIALS_THROTTLE_WINDOW). Uma chave em espera após um 429
+só é escolhida quando todas as outras também estão.
+
+Cada task fica associada à chave que a criou: leituras, stop/pause/resume e
+mídia usam sempre a mesma chave. As associações ficam em SQLite (modo WAL),
+compartilhadas entre os workers do host; uma task sem associação (criada em
+outro host ou antes do pool) é procurada nas demais chaves quando a chave
+padrão responde 404.
+
+Com uma única chave nada disso é usado: o pool devolve sempre a mesma.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import Config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pins (
+    task_id TEXT PRIMARY KEY,
+    credential TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pins_running ON pins (finished_at, created_at);
+CREATE INDEX IF NOT EXISTS idx_pins_created ON pins (created_at);
+"""
+
+# Limpeza do excesso de associações a cada N novas associações
+_PRUNE_EVERY = 100
+
+
+class Credential:
+    """Uma chave de API e seus contadores de uso neste processo"""
+
+    def __init__(self, api_key: str):
+        # Identificador estável que não expõe a chave (vai para o SQLite e para as métricas)
+        self.id = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+        self.headers = {'Authorization': f'Bearer {api_key}'}
+        self.pending = 0
+        self.paused_until = 0.0
+        self.recent_429: deque = deque()
+        self.counters = {'requests': 0, 'submitted': 0, 'throttled': 0}
+
+    def recent_throttles(self, now: float) -> int:
+        while self.recent_429 and now - self.recent_429[0] > Config.CREDENTIALS_THROTTLE_WINDOW:
+            self.recent_429.popleft()
+        return len(self.recent_429)
+
+
+class CredentialPool:
+    """Escolha da chave por submissão e associação task -> chave"""
+
+    def __init__(self, api_keys: List[str] = None, path: str = None):
+        keys = api_keys or Config.BROWSER_USE_API_KEYS
+        # Chaves repetidas na configuração contam uma vez só
+        self.credentials: 'OrderedDict[str, Credential]' = OrderedDict()
+        for api_key in keys:
+            credential = Credential(api_key)
+            self.credentials.setdefault(credential.id, credential)
+        self.default = next(iter(self.credentials.values()))
+        self.path = path or Config.CREDENTIALS_DB_PATH
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._pinned = 0
+        # Associações recentes em memória (evita ir ao SQLite a cada leitura)
+        self._pins: 'OrderedDict[str, str]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def __iter__(self):
+        return iter(list(self.credentials.values()))
+
+    @property
+    def pooled(self) -> bool:
+        """Se há mais de uma chave (só então as associações são registradas)"""
+        return len(self.credentials) > 1
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if not self._schema_ready:
+                conn.executescript(_SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, task_id: str, credential_id: str) -> None:
+        with self._lock:
+            self._pins[task_id] = credential_id
+            self._pins.move_to_end(task_id)
+            while len(self._pins) > Config.CACHE_MAX_ENTRIES:
+                self._pins.popitem(last=False)
+
+    # Submissões
+
+    def _running(self) -> Dict[str, int]:
+        """Tasks em andamento por chave (de todos os workers do host)"""
+        rows = self._conn().execute(
+            'SELECT credential, COUNT(*) FROM pins WHERE finished_at IS NULL AND created_at > ? GROUP BY credential',
+            (time.time() - Config.CREDENTIALS_TASK_TTL,),
+        )
+        return {row[0]: row[1] for row in rows}
+
+    def acquire(self) -> Credential:
+        """Escolhe a chave de uma nova submissão; devolver com release()"""
+        if not self.pooled:
+            credential = self.default
+            with self._lock:
+                credential.pending += 1
+            return credential
+
+        running = self._running()
+        now = time.time()
+        with self._lock:
+            def load(credential: Credential) -> float:
+                return (running.get(credential.id, 0) + credential.pending
+                        + Config.CREDENTIALS_THROTTLE_PENALTY * credential.recent_throttles(now))
+
+            available = [c for c in self.credentials.values() if c.paused_until <= now]
+            if available:
+                credential = min(available, key=load)
+            else:
+                # Todas em espera: a que libera primeiro
+                credential = min(self.credentials.values(), key=lambda c: c.paused_until)
+            credential.pending += 1
+        return credential
+
+    def release(self, credential: Credential, task_id: str = None) -> None:
+        """Fim da submissão; com task_id, associa a task criada à chave"""
+        with self._lock:
+            credential.pending -= 1
+            if task_id is not None:
+                credential.counters['submitted'] += 1
+        if task_id is not None:
+            self.pin(task_id, credential)
+
+    # Associação task -> chave
+
+    def pin(self, task_id: str, credential: Credential, running: bool = True) -> None:
+        if not self.pooled:
+            return
+        now = time.time()
+        self._conn().execute(
+            'INSERT INTO pins (task_id, credential, created_at, finished_at) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (task_id) DO UPDATE SET credential = excluded.credential',
+            (task_id, credential.id, now, None if running else now),
+        )
+        self._remember(task_id, credential.id)
+        self._maybe_prune()
+
+    def pin_many(self, task_ids: Iterable[str], credential: Credential) -> None:
+        """Associa tasks encontradas na listagem de uma chave (não contam como em andamento)"""
+        if not self.pooled:
+            return
+        now = time.time()
+        self._conn().executemany(
+            'INSERT OR IGNORE INTO pins (task_id, credential, created_at, finished_at) VALUES (?, ?, ?, ?)',
+            [(task_id, credential.id, now, now) for task_id in task_ids],
+        )
+
+    def _maybe_prune(self) -> None:
+        with self._lock:
+            self._pinned += 1
+            due = self._pinned % _PRUNE_EVERY == 0
+        if not due:
+            return
+        # Limite de armazenamento: as associações mais antigas voltam a ser procuradas por 404
+        self._conn().execute(
+            'DELETE FROM pins WHERE task_id IN (SELECT task_id FROM pins ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (Config.CREDENTIALS_MAX_PINS,),
+        )
+
+    def pinned(self, task_id: str) -> Optional[Credential]:
+        """Chave associada à task (None se desconhecida)"""
+        if not self.pooled:
+            return self.default
+        with self._lock:
+            credential_id = self._pins.get(task_id)
+        if credential_id is None:
+            row = self._conn().execute('SELECT credential FROM pins WHERE task_id = ?', (task_id,)).fetchone()
+            if row is None:
+                return None
+            credential_id = row[0]
+            self._remember(task_id, credential_id)
+        # Chave removida da configuração: a task é procurada de novo
+        return self.credentials.get(credential_id)
+
+    def for_task(self, task_id: str) -> Credential:
+        """Chave para chamadas sobre uma task (a padrão se ela é desconhecida)"""
+        return self.pinned(task_id) or self.default
+
+    def others(self, credential: Credential) -> List[Credential]:
+        return [c for c in self.credentials.values() if c is not credential]
+
+    def finished(self, task_id: str) -> None:
+        """Task em status final: deixa de contar na carga da chave"""
+        if not self.pooled:
+            return
+        self._conn().execute(
+            'UPDATE pins SET finished_at = ? WHERE task_id = ? AND finished_at IS NULL', (time.time(), task_id)
+        )
+
+    # Uso
+
+    def record_request(self, credential: Credential) -> None:
+        with self._lock:
+            credential.counters['requests'] += 1
+
+    def throttled(self, credential: Credential, delay: float) -> bool:
+        """Registra um 429 da chave; retorna True se todas as chaves estão em espera"""
+        now = time.time()
+        with self._lock:
+            credential.counters['throttled'] += 1
+            credential.recent_429.append(now)
+            credential.paused_until = max(credential.paused_until, now + delay)
+            return all(c.paused_until > now for c in self.credentials.values())
+
+    def stats(self) -> Dict[str, Any]:
+        running = self._running() if self.pooled else {}
+        now = time.time()
+        with self._lock:
+            keys = [
+                {
+                    'id': credential.id,
+                    'running_tasks': running.get(credential.id, 0),
+                    'pending_submissions': credential.pending,
+                    'recent_429': credential.recent_throttles(now),
+                    'paused_for': round(max(0.0, credential.paused_until - now), 3),
+                    **credential.counters,
+                }
+                for credential in self.credentials.values()
+            ]
+        pins = self._conn().execute('SELECT COUNT(*) FROM pins').fetchone()[0] if self.pooled else 0
+        return {'keys': keys, 'pinned_tasks': pins}
+
+
+_pool: Optional[CredentialPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_credential_pool() -> CredentialPool:
+    """Retorna o pool de credenciais compartilhado do processo (criado sob demanda)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = CredentialPool()
+    return _pool
+
+
+def _reset_after_fork() -> None:
+    # Contadores de submissões em andamento e conexões SQLite não valem no processo filho
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
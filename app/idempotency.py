@@ -0,0 +1,202 @@
+"""
+Submissões idempotentes e reaproveitamento de tasks duplicadas
+
+Duas formas de identificar uma submissão repetida:
+
+- Idempotency-Key: a mesma chave devolve sempre a mesma task durante
+  IDEMPOTENCY_KEY_TTL; reutilizar a chave com outro corpo é um conflito.
+- Deduplicação por conteúdo (dedup): o hash do corpo normalizado (sem os
+  parâmetros locais como wait_for_completion/timeout) devolve a task em
+  andamento ou finalizada com sucesso dentro de IDEMPOTENCY_DEDUP_WINDOW.
+
+As reservas ficam em SQLite (modo WAL), compartilhadas entre os workers do
+mesmo host: submissões simultâneas com a mesma chave esperam a primeira em
+vez de criar outra sessão de browser no upstream.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import Config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    task_id TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_expires ON submissions (expires_at);
+CREATE INDEX IF NOT EXISTS idx_submissions_created ON submissions (created_at);
+"""
+
+# Intervalo entre consultas enquanto outra requisição submete a mesma task
+_PENDING_POLL_INTERVAL = 0.05
+# Limpeza de reservas vencidas a cada N novas reservas
+_PRUNE_EVERY = 100
+
+
+class IdempotencyConflict(Exception):
+    """Idempotency-Key reutilizada com um corpo diferente"""
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """Hash do corpo normalizado (ordem das chaves e espaços não importam)"""
+    normalized = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class SubmissionRegistry:
+    """Reservas de submissões por Idempotency-Key ou hash do conteúdo"""
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.IDEMPOTENCY_DB_PATH
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._reservations = 0
+        self._counters = {'submitted': 0, 'reused': 0, 'conflicts': 0, 'waited': 0}
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if not self._schema_ready:
+                conn.executescript(_SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _reserve(self, key: str, digest: str, ttl: float) -> Optional[sqlite3.Row]:
+        """Reserva a chave; retorna None se a reserva é nossa ou a linha existente"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM submissions WHERE key = ? AND expires_at <= ?', (key, now))
+            inserted = conn.execute(
+                'INSERT OR IGNORE INTO submissions (key, fingerprint, task_id, created_at, expires_at) '
+                'VALUES (?, ?, NULL, ?, ?)',
+                (key, digest, now, now + ttl),
+            ).rowcount
+            row = None if inserted else conn.execute('SELECT * FROM submissions WHERE key = ?', (key,)).fetchone()
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if inserted:
+            self._maybe_prune()
+        return row
+
+    def _maybe_prune(self) -> None:
+        with self._lock:
+            self._reservations += 1
+            due = self._reservations % _PRUNE_EVERY == 0
+        if not due:
+            return
+        conn = self._conn()
+        conn.execute('DELETE FROM submissions WHERE expires_at <= ?', (time.time(),))
+        # Limite de armazenamento: descarta as reservas mais antigas
+        conn.execute(
+            'DELETE FROM submissions WHERE key IN (SELECT key FROM submissions ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (Config.IDEMPOTENCY_MAX_ENTRIES,),
+        )
+
+    def claim(self, payload: Dict[str, Any], idempotency_key: str = None, dedup: bool = False,
+              reusable: Callable[[str], bool] = None) -> Tuple[Optional[str], Optional[tuple]]:
+        """
+        Procura uma task reaproveitável ou reserva a submissão
+
+        Retorna (task_id, None) quando há task para reaproveitar, (None, reserva)
+        quando quem chamou deve submeter e depois chamar complete()/abandon(), e
+        (None, None) quando a submissão não é idempotente.
+        """
+        digest = fingerprint(payload)
+        if idempotency_key:
+            key, ttl = f'key:{idempotency_key}', Config.IDEMPOTENCY_KEY_TTL
+            # A chave é um compromisso do cliente: a task é devolvida qualquer que seja o resultado
+            reusable = None
+        elif dedup:
+            key, ttl = f'hash:{digest}', Config.IDEMPOTENCY_DEDUP_WINDOW
+        else:
+            return None, None
+
+        waited = False
+        while True:
+            row = self._reserve(key, digest, ttl)
+            if row is None:
+                return None, (key, digest)
+            if row['fingerprint'] != digest:
+                self._count('conflicts')
+                raise IdempotencyConflict('Idempotency-Key já utilizada com outro corpo de requisição')
+            if row['task_id']:
+                if reusable is None or reusable(row['task_id']):
+                    self._count('reused')
+                    return row['task_id'], None
+                # Task anterior falhou ou foi parada: libera a chave para uma nova submissão
+                self._conn().execute('DELETE FROM submissions WHERE key = ? AND task_id = ?', (key, row['task_id']))
+                continue
+
+            # Outra requisição está submetendo: espera o id (ou assume a reserva se ela travou)
+            if not waited:
+                waited = True
+                self._count('waited')
+            if time.time() - row['created_at'] > Config.IDEMPOTENCY_PENDING_TIMEOUT:
+                self._conn().execute(
+                    'DELETE FROM submissions WHERE key = ? AND task_id IS NULL AND created_at = ?',
+                    (key, row['created_at']),
+                )
+                continue
+            time.sleep(_PENDING_POLL_INTERVAL)
+
+    def complete(self, reservation: tuple, task_id: str) -> None:
+        key, digest = reservation
+        self._conn().execute(
+            'UPDATE submissions SET task_id = ? WHERE key = ? AND fingerprint = ?', (task_id, key, digest)
+        )
+        self._count('submitted')
+
+    def abandon(self, reservation: tuple) -> None:
+        """Libera a reserva após uma submissão que falhou (a próxima tentativa submete de novo)"""
+        key, digest = reservation
+        self._conn().execute(
+            'DELETE FROM submissions WHERE key = ? AND fingerprint = ? AND task_id IS NULL', (key, digest)
+        )
+
+    def submit(self, payload: Dict[str, Any], submit: Callable[[Dict[str, Any]], Dict[str, Any]],
+               idempotency_key: str = None, dedup: bool = False,
+               reusable: Callable[[str], bool] = None) -> Tuple[Dict[str, Any], bool]:
+        """Submete ou reaproveita; retorna (resultado do upstream, reaproveitada?)"""
+        task_id, reservation = self.claim(payload, idempotency_key, dedup, reusable)
+        if task_id is not None:
+            return {'id': task_id}, True
+        if reservation is None:
+            return submit(payload), False
+        try:
+            result = submit(payload)
+        except BaseException:
+            self.abandon(reservation)
+            raise
+        self.complete(reservation, result['id'])
+        return result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        entries = self._conn().execute(
+            'SELECT COUNT(*) FROM submissions WHERE expires_at > ?', (time.time(),)
+        ).fetchone()[0]
+        return {'entries': entries, **counters}
@@ -0,0 +1,393 @@
+"""
+Fila local e durável de jobs (SQLite em modo WAL) com pool de workers
+
+Um job é uma submissão de task feita sem manter a conexão HTTP aberta:
+ela é persistida, submetida ao upstream pelos workers respeitando um limite
+de tasks em andamento, acompanhada pelo poller compartilhado até terminar e
+tem o resultado final gravado. Jobs em andamento sobrevivem a reinícios do
+processo: cada processo renova um heartbeat dos jobs que acompanha e jobs
+com heartbeat vencido são adotados por outro worker.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Set
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from .circuit import CircuitOpen
+from .config import Config
+from .ratelimit import UpstreamThrottled, background
+from .stale import is_degraded
+
+JOB_STATUSES = ('queued', 'submitting', 'running', 'finished', 'failed', 'timeout')
+
+# Respostas em que o upstream recusou a submissão sem criar a task
+RETRYABLE_STATUSES = (429, 503)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    timeout REAL NOT NULL,
+    task_id TEXT,
+    task_status TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    heartbeat_at REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobStore:
+    """Persistência dos jobs em SQLite (WAL), uma conexão por thread"""
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.JOBS_DB_PATH
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, include_payload: bool = True) -> Dict[str, Any]:
+        job = dict(row)
+        job['payload'] = json.loads(job['payload']) if include_payload else None
+        job['result'] = json.loads(job['result']) if job['result'] and include_payload else None
+        for internal in ('owner', 'heartbeat_at', 'not_before'):
+            job.pop(internal, None)
+        if not include_payload:
+            job.pop('payload')
+            job.pop('result')
+        return job
+
+    def enqueue(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        now = time.time()
+        job_id = f'job_{uuid.uuid4().hex}'
+        self._conn().execute(
+            'INSERT INTO jobs (id, status, payload, timeout, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, 'queued', json.dumps(payload), timeout, now, now),
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: str = None, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        query, params = 'SELECT * FROM jobs', []
+        if status:
+            query += ' WHERE status = ?'
+            params.append(status)
+        query += ' ORDER BY created_at DESC LIMIT ? OFFSET ?'
+        params += [limit, offset]
+        return [self._to_dict(row, include_payload=False) for row in self._conn().execute(query, params)]
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute('SELECT status, COUNT(*) AS total FROM jobs GROUP BY status')
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row['status']: row['total'] for row in rows})
+        return counts
+
+    def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Reserva atomicamente o próximo job da fila para submissão"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND not_before <= ? ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'submitting', attempts = attempts + 1, owner = ?, heartbeat_at = ?, "
+                "updated_at = ? WHERE id = ?",
+                (owner, now, now, row['id']),
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        job = self._to_dict(row)
+        job['attempts'] += 1
+        return job
+
+    def adopt_orphans(self, owner: str, stale_before: float, limit: int) -> List[Dict[str, Any]]:
+        """Devolve à fila submissões órfãs e adota jobs em andamento cujo dono parou"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, updated_at = ? "
+                "WHERE status = 'submitting' AND heartbeat_at < ?",
+                (now, stale_before),
+            )
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?) LIMIT ?",
+                (stale_before, limit),
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    'UPDATE jobs SET owner = ?, heartbeat_at = ?, updated_at = ? WHERE id = ?',
+                    (owner, now, now, row['id']),
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [self._to_dict(row) for row in rows]
+
+    def heartbeat(self, owner: str, job_ids: List[str]) -> None:
+        if job_ids:
+            placeholders = ','.join('?' * len(job_ids))
+            self._conn().execute(
+                f'UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND id IN ({placeholders})',
+                [time.time(), owner, *job_ids],
+            )
+
+    def mark_running(self, job_id: str, task_id: str) -> None:
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET status = 'running', task_id = ?, started_at = ?, updated_at = ?, heartbeat_at = ? "
+            "WHERE id = ?",
+            (task_id, now, now, now, job_id),
+        )
+
+    def requeue(self, job_id: str, error: str, delay: float) -> None:
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET status = 'queued', error = ?, owner = NULL, not_before = ?, updated_at = ? WHERE id = ?",
+            (error, now + delay, now, job_id),
+        )
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: str = None) -> None:
+        now = time.time()
+        task_status = result.get('status') if isinstance(result, dict) else None
+        self._conn().execute(
+            'UPDATE jobs SET status = ?, task_status = ?, result = ?, error = ?, owner = NULL, '
+            'finished_at = ?, updated_at = ? WHERE id = ?',
+            (status, task_status, json.dumps(result) if result is not None else None, error, now, now, job_id),
+        )
+
+
+def _never_sent(error: requests.exceptions.RequestException) -> bool:
+    """Se a submissão falhou antes de chegar ao upstream (repeti-la não duplica a task)"""
+    if isinstance(error, (CircuitOpen, UpstreamThrottled, requests.exceptions.ConnectTimeout)):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        # MaxRetryError do urllib3: o motivo diz se a conexão chegou a ser aberta
+        return isinstance(getattr(error.args[0], 'reason', None), (NewConnectionError, ConnectTimeoutError))
+    return False
+
+
+def _retryable(error: requests.exceptions.RequestException) -> bool:
+    if _never_sent(error):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in RETRYABLE_STATUSES
+
+
+class JobQueue:
+    """Workers que submetem jobs ao upstream e acompanham as tasks até o fim"""
+
+    def __init__(self, client, poller, store: JobStore = None, workers: int = None, max_in_flight: int = None):
+        self.client = client
+        self.poller = poller
+        self._store = store
+        self.workers = workers or Config.JOBS_WORKERS
+        self.max_in_flight = max_in_flight or Config.JOBS_MAX_IN_FLIGHT
+        self.owner = self._new_owner()
+
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, tuple] = {}
+        # Jobs reservados cuja submissão ainda está em andamento (também recebem heartbeat)
+        self._submitting: Set[str] = set()
+        self._started = False
+        self._stopping = threading.Event()
+
+    @staticmethod
+    def _new_owner() -> str:
+        return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = JobStore()
+        return self._store
+
+    def start(self) -> None:
+        """Inicia os workers (idempotente) e retoma jobs interrompidos"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            # Com preload (Gunicorn) a instância é criada antes do fork: cada processo precisa do próprio dono
+            self.owner = self._new_owner()
+        self.store
+        for n in range(self.workers):
+            threading.Thread(target=self._worker, name=f'job-worker-{n}', daemon=True).start()
+        threading.Thread(target=self._maintenance, name='job-maintenance', daemon=True).start()
+
+    def enqueue(self, payload: Dict[str, Any], timeout: float = None) -> Dict[str, Any]:
+        self.start()
+        job = self.store.enqueue(payload, timeout or Config.JOBS_TASK_TIMEOUT)
+        self._wakeup.set()
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {
+            'owner': self.owner,
+            'workers': self.workers,
+            'max_in_flight': self.max_in_flight,
+            'in_flight': in_flight,
+            'counts': self.store.counts(),
+        }
+
+    def _worker(self) -> None:
+        # Submissões de jobs cedem a vez às chamadas feitas para usuários
+        with background():
+            self._work()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            self._slots.acquire()
+            try:
+                job = self.store.claim(self.owner)
+            except Exception:
+                job = None
+            if job is None:
+                self._slots.release()
+                self._wakeup.wait(Config.JOBS_IDLE_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            with self._lock:
+                self._submitting.add(job['id'])
+            try:
+                self._submit(job)
+            finally:
+                with self._lock:
+                    self._submitting.discard(job['id'])
+
+    def _submit(self, job: Dict[str, Any]) -> None:
+        try:
+            result = self.client.run_task(job['payload'])
+        except requests.exceptions.RequestException as e:
+            self._slots.release()
+            if not _retryable(e):
+                # Timeout de leitura, conexão perdida após o envio ou outro 5xx: a task pode ter sido
+                # criada, e repetir a submissão a duplicaria
+                self.store.finish(job['id'], 'failed', error=f'Erro na API Browser Use (submissão incerta): {str(e)}')
+            elif job['attempts'] < Config.JOBS_MAX_ATTEMPTS:
+                self.store.requeue(job['id'], str(e), Config.JOBS_RETRY_DELAY * 2 ** (job['attempts'] - 1))
+            else:
+                self.store.finish(job['id'], 'failed', error=f'Erro na API Browser Use: {str(e)}')
+            return
+        except Exception as e:
+            self._slots.release()
+            self.store.finish(job['id'], 'failed', error=f'Erro interno: {str(e)}')
+            return
+
+        self.store.mark_running(job['id'], result['id'])
+        self._track(job['id'], result['id'], time.time() + job['timeout'])
+
+    def _track(self, job_id: str, task_id: str, deadline: float) -> None:
+        """Acompanha a task pelo poller sem ocupar uma thread por job"""
+        future = self.poller.watch(task_id)
+        with self._lock:
+            self._in_flight[job_id] = (task_id, future, deadline)
+        future.add_done_callback(lambda f: self._complete(job_id, task_id, deadline, f))
+
+    def _complete(self, job_id: str, task_id: str, deadline: float, future: Future) -> None:
+        with self._lock:
+            if self._in_flight.pop(job_id, None) is None:
+                return
+        if (not future.cancelled() and future.exception() is not None and is_degraded(future.exception())
+                and time.time() < deadline):
+            # Upstream indisponível ao consultar a task: volta a acompanhar após um intervalo (um 404 não muda)
+            timer = threading.Timer(Config.JOBS_RETRY_DELAY, self._track, args=(job_id, task_id, deadline))
+            timer.daemon = True
+            timer.start()
+            return
+        try:
+            if future.cancelled():
+                self.store.finish(job_id, 'timeout', error=f'Task {task_id} não foi concluída no prazo do job')
+            elif future.exception() is not None:
+                self.store.finish(job_id, 'failed', error=f'Erro ao acompanhar a task: {future.exception()}')
+            else:
+                self.store.finish(job_id, 'finished', result=future.result())
+        finally:
+            self._slots.release()
+            self._wakeup.set()
+
+    def _adopt(self, stale_before: float) -> None:
+        # Jobs adotados também ocupam vagas de tasks em andamento
+        free = 0
+        while self._slots.acquire(blocking=False):
+            free += 1
+        try:
+            adopted = self.store.adopt_orphans(self.owner, stale_before, limit=free) if free else []
+        finally:
+            for _ in range(free - len(adopted)):
+                self._slots.release()
+        for job in adopted:
+            deadline = (job['started_at'] or time.time()) + job['timeout']
+            self._track(job['id'], job['task_id'], deadline)
+        self._wakeup.set()
+
+    def _maintenance(self) -> None:
+        # Heartbeats anteriores ao início pertencem a processos que já terminaram
+        try:
+            self._adopt(time.time() - Config.JOBS_HEARTBEAT_INTERVAL * 3)
+        except Exception:
+            pass
+        while not self._stopping.wait(Config.JOBS_HEARTBEAT_INTERVAL):
+            try:
+                now = time.time()
+                with self._lock:
+                    tracked = dict(self._in_flight)
+                    submitting = list(self._submitting)
+                # Sem heartbeat, uma submissão lenta seria devolvida à fila e enviada de novo
+                self.store.heartbeat(self.owner, list(tracked) + submitting)
+                for job_id, (task_id, future, deadline) in tracked.items():
+                    if now > deadline:
+                        self.poller.release(task_id, future)
+                        future.cancel()
+                self._adopt(now - Config.JOBS_HEARTBEAT_INTERVAL * 3)
+            except Exception:
+                # Falhas transitórias do SQLite não devem derrubar a manutenção
+                continue
@@ -2,55 +2,62 @@ import json
 import time
 import os
 
-import requests
-
 # Importar configurações
 from .config import Config
+from .polling import TERMINAL_STATUSES, PollingStrategy, advance_marker, extract_status, make_strategy
+from .upstream import get_session
 
 HEADERS = Config.get_headers()
 
 
 def create_task(instructions: str):
 	"""Create a new browser automation task"""
-	response = requests.post(f'{Config.BROWSER_USE_BASE_URL}/run-task', headers=HEADERS, json={'task': instructions})
+	response = get_session().post(f'{Config.BROWSER_USE_BASE_URL}/run-task', headers=HEADERS, json={'task': instructions})
 	return response.json()['id']
 
 
 def get_task_status(task_id: str):
 	"""Get current task status"""
-	response = requests.get(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}/status', headers=HEADERS)
+	response = get_session().get(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}/status', headers=HEADERS)
 	return response.json()
 
 
 def get_task_details(task_id: str):
 	"""Get full task details including output"""
-	response = requests.get(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}', headers=HEADERS)
+	response = get_session().get(f'{Config.BROWSER_USE_BASE_URL}/task/{task_id}', headers=HEADERS)
 	return response.json()
 
 
-def wait_for_completion(task_id: str, poll_interval: int = None):
+def wait_for_completion(task_id: str, poll_interval: int = None, strategy: PollingStrategy = None):
 	"""Poll task status until completion"""
-	# Usar valor padrão da configuração se não fornecido
-	if poll_interval is None:
-		poll_interval = Config.DEFAULT_POLL_INTERVAL
-		
-	count = 0
-	unique_steps = []
+	# an explicit interval forces fixed polling; otherwise use the configured strategy
+	if strategy is None:
+		strategy = make_strategy(poll_interval=poll_interval)
+
+	last_marker = None
+	cursor = 0
 	while True:
-		details = get_task_details(task_id)
-		new_steps = details['steps']
-		# use only the new steps that are not in unique_steps.
-		if new_steps != unique_steps:
-			for step in new_steps:
-				if step not in unique_steps:
-					print(json.dumps(step, indent=4))
-			unique_steps = new_steps
-		count += 1
-		status = details['status']
-
-		if status in ['finished', 'failed', 'stopped']:
+		# light /status ticks; full details only on progress probes and once terminal
+		if strategy.next_endpoint() == 'task':
+			payload = get_task_details(task_id)
+			cursor = print_new_steps(payload, cursor)
+		else:
+			payload = get_task_status(task_id)
+
+		if extract_status(payload) in TERMINAL_STATUSES:
+			details = payload if strategy.last_endpoint == 'task' else get_task_details(task_id)
+			print_new_steps(details, cursor)
 			return details
-		time.sleep(poll_interval)
+		last_marker, progressed = advance_marker(last_marker, payload)
+		time.sleep(strategy.next_delay(progressed))
+
+
+def print_new_steps(details: dict, cursor: int) -> int:
+	"""Print only the steps added since the last print (cursor); returns the new cursor"""
+	steps = details['steps']
+	for step in steps[cursor:]:
+		print(json.dumps(step, indent=4))
+	return max(cursor, len(steps))
 
 
 def main():
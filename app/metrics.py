@@ -0,0 +1,257 @@
+"""
+Métricas no formato de exposição de texto do Prometheus
+
+Contadores, gauges e histogramas com labels. Cada thread escreve apenas no
+próprio shard (um dict local à thread), então o caminho quente não usa locks:
+um incremento é uma leitura e uma escrita em dict. A coleta soma os shards;
+os valores de threads encerradas são consolidados e seus shards descartados.
+
+Com vários processos (Gunicorn) cada worker expõe os próprios valores.
+"""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from .config import Config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+POLL_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    """Registro de métricas com shards por thread"""
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = Config.METRICS_ENABLED if enabled is None else enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, Dict]] = []
+        self._retired: Dict[Tuple[str, tuple], Any] = {}
+        self._fold_at = 64
+        self._metrics: List['_Metric'] = []
+        self._callbacks: List[Tuple[str, str, Sequence[str], Callable[[], Dict[tuple, float]]]] = []
+
+    def shard(self) -> Dict[Tuple[str, tuple], Any]:
+        """Shard da thread atual (criado na primeira escrita da thread)"""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+                if len(self._shards) >= self._fold_at:
+                    # Servidores que criam uma thread por requisição: evita crescer sem limite
+                    self._fold_dead_shards()
+                    self._fold_at = max(64, len(self._shards) * 2)
+            self._local.values = values
+            return values
+
+    def register(self, metric: '_Metric') -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_callback(self, name: str, documentation: str, labelnames: Sequence[str],
+                          collect: Callable[[], Dict[tuple, float]]) -> None:
+        """Gauge calculado na coleta: collect() retorna {valores dos labels: valor}"""
+        with self._lock:
+            self._callbacks.append((name, documentation, tuple(labelnames), collect))
+
+    @staticmethod
+    def _merge(target: Dict, key: Tuple[str, tuple], value: Any) -> None:
+        if isinstance(value, list):
+            current = target.get(key)
+            if current is None:
+                target[key] = list(value)
+            else:
+                for i, v in enumerate(value):
+                    current[i] += v
+        else:
+            target[key] = target.get(key, 0) + value
+
+    def _fold_dead_shards(self) -> None:
+        """Consolida shards de threads encerradas (chamar com o lock)"""
+        alive = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                alive.append((thread, values))
+            else:
+                for key, value in list(values.items()):
+                    self._merge(self._retired, key, value)
+        self._shards = alive
+
+    def snapshot(self) -> Dict[Tuple[str, tuple], Any]:
+        """Soma de todos os shards: {(nome, labels): valor}"""
+        with self._lock:
+            self._fold_dead_shards()
+            merged: Dict[Tuple[str, tuple], Any] = {}
+            for key, value in self._retired.items():
+                self._merge(merged, key, value)
+            for _, values in self._shards:
+                # list() copia as entradas de uma vez: outra thread pode inserir chaves durante a coleta
+                for key, value in list(values.items()):
+                    self._merge(merged, key, value)
+        return merged
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus (version=0.0.4)"""
+        snapshot = self.snapshot()
+        by_name: Dict[str, List[Tuple[tuple, Any]]] = {}
+        for (name, labels), value in snapshot.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for labels, value in sorted(by_name.get(metric.name, ())):
+                lines.extend(metric.expose(labels, value))
+        for name, documentation, labelnames, collect in self._callbacks:
+            try:
+                values = collect()
+            except Exception:
+                continue
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in sorted(values.items()):
+                lines.append(f'{name}{_format_labels(labelnames, labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, registry: MetricsRegistry, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def expose(self, labels: tuple, value: Any) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+
+    kind = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        if not self.registry.enabled:
+            return
+        values = self.registry.shard()
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (soma dos incrementos de todas as threads)"""
+
+    kind = 'gauge'
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: 'Histogram', labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos; cada shard guarda [contagem por bucket..., +Inf, soma]"""
+
+    kind = 'histogram'
+
+    def __init__(self, registry: MetricsRegistry, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        values = self.registry.shard()
+        key = (self.name, labels)
+        counts = values.get(key)
+        if counts is None:
+            counts = values[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def time(self, *labels: str) -> _Timer:
+        """Context manager que observa a duração do bloco"""
+        return _Timer(self, labels)
+
+    def expose(self, labels: tuple, value: List[float]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), value[:-1]):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+        plain = _format_labels(self.labelnames, labels)
+        lines.append(f'{self.name}_sum{plain} {_format_value(value[-1])}')
+        lines.append(f'{self.name}_count{plain} {cumulative}')
+        return lines
+
+
+# Registro do processo e métricas da API
+registry = MetricsRegistry()
+
+http_requests = Counter(
+    registry, 'browser_use_http_requests_total', 'Requisições atendidas por rota', ('method', 'route', 'status'))
+http_latency = Histogram(
+    registry, 'browser_use_http_request_duration_seconds', 'Latência das requisições por rota', ('method', 'route'))
+upstream_latency = Histogram(
+    registry, 'browser_use_upstream_request_duration_seconds', 'Latência das chamadas ao upstream por operação',
+    ('operation',))
+upstream_errors = Counter(
+    registry, 'browser_use_upstream_errors_total', 'Falhas nas chamadas ao upstream por operação e motivo',
+    ('operation', 'reason'))
+upstream_bytes = Counter(
+    registry, 'browser_use_upstream_received_bytes_total', 'Bytes recebidos do upstream por operação', ('operation',))
+upstream_retries = Counter(
+    registry, 'browser_use_upstream_retries_total', 'Novas tentativas de chamadas ao upstream por operação e motivo',
+    ('operation', 'reason'))
+upstream_throttled = Counter(
+    registry, 'browser_use_upstream_throttled_total',
+    'Chamadas contidas pelo limite de vazão (429 do upstream ou fila de admissão esgotada)', ('endpoint_class', 'reason'))
+upstream_coalesced = Counter(
+    registry, 'browser_use_upstream_coalesced_total',
+    'Leituras atendidas por uma chamada idêntica já em andamento (single-flight)', ('operation',))
+active_waiters = Gauge(
+    registry, 'browser_use_active_waiters', 'Requisições aguardando a conclusão de uma task')
+poll_ticks = Counter(
+    registry, 'browser_use_poll_ticks_total', 'Consultas de polling feitas ao upstream', ('endpoint',))
+poll_iterations = Histogram(
+    registry, 'browser_use_poll_iterations', 'Consultas de polling até a conclusão de cada task', (),
+    buckets=POLL_BUCKETS)
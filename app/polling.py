@@ -0,0 +1,143 @@
+"""
+Estratégias de polling para acompanhar tasks no upstream
+"""
+import random
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Tuple
+
+from .config import Config
+
+TERMINAL_STATUSES = ('finished', 'failed', 'stopped')
+
+
+class PollingStrategy(ABC):
+    """Define o intervalo até a próxima consulta ao upstream"""
+
+    # Endpoint usado nos ticks: "status" (leve) ou "task" (detalhes completos)
+    tick_endpoint: str = 'status'
+    # Com ticks de status, 1 a cada N ticks busca os detalhes para observar novos steps (0 = nunca)
+    progress_every: int = 0
+    # Endpoint do último tick (decide se a resposta já traz os detalhes completos)
+    last_endpoint: str = 'status'
+    _ticks: int = 0
+
+    def next_endpoint(self) -> str:
+        """Endpoint a consultar no próximo tick ("status" ou "task")"""
+        self._ticks += 1
+        if self.tick_endpoint == 'task' or (self.progress_every and self._ticks % self.progress_every == 0):
+            self.last_endpoint = 'task'
+        else:
+            self.last_endpoint = 'status'
+        return self.last_endpoint
+
+    @abstractmethod
+    def next_delay(self, progressed: bool) -> float:
+        """Intervalo (s) até o próximo tick; `progressed` indica progresso observado"""
+
+    def reset(self) -> None:
+        """Volta ao ritmo inicial de polling"""
+
+
+class FixedInterval(PollingStrategy):
+    """Intervalo fixo entre consultas (comportamento original)"""
+
+    def __init__(self, interval: float = None, tick_endpoint: str = None):
+        self.interval = Config.DEFAULT_POLL_INTERVAL if interval is None else interval
+        self.tick_endpoint = tick_endpoint or Config.POLL_TICK_ENDPOINT
+
+    def next_delay(self, progressed: bool) -> float:
+        return self.interval
+
+
+class AdaptiveBackoff(PollingStrategy):
+    """Consultas rápidas no início e backoff exponencial com jitter; progresso segura o intervalo atual
+
+    Voltar à fase rápida a cada novo step faria uma task ativa ser consultada
+    quase no ritmo inicial do começo ao fim: com progresso o intervalo apenas
+    deixa de crescer naquele tick.
+    """
+
+    def __init__(
+        self,
+        initial: float = None,
+        max_interval: float = None,
+        factor: float = None,
+        jitter: float = None,
+        fast_polls: int = None,
+        tick_endpoint: str = None,
+        progress_every: int = None,
+        rng: random.Random = None,
+    ):
+        self.initial = Config.POLL_INITIAL_INTERVAL if initial is None else initial
+        self.max_interval = Config.POLL_MAX_INTERVAL if max_interval is None else max_interval
+        self.factor = Config.POLL_BACKOFF_FACTOR if factor is None else factor
+        self.jitter = Config.POLL_JITTER if jitter is None else jitter
+        self.fast_polls = Config.POLL_FAST_POLLS if fast_polls is None else fast_polls
+        self.tick_endpoint = tick_endpoint or Config.POLL_TICK_ENDPOINT
+        # /status não informa steps: sem consultas de progresso novos steps nunca seriam observados
+        self.progress_every = Config.POLL_PROGRESS_EVERY if progress_every is None else progress_every
+        self._rng = rng or random.Random()
+        self.reset()
+
+    def reset(self) -> None:
+        self._current = self.initial
+        self._fast_remaining = self.fast_polls
+
+    def next_delay(self, progressed: bool) -> float:
+        if self._fast_remaining > 0:
+            self._fast_remaining -= 1
+            delay = self.initial
+        elif progressed:
+            delay = self._current
+        else:
+            self._current = min(self._current * self.factor, self.max_interval)
+            delay = self._current
+
+        # Jitter proporcional evita que waiters sincronizados consultem juntos
+        if self.jitter:
+            delay *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
+
+
+def make_strategy(name: str = None, poll_interval: float = None) -> PollingStrategy:
+    """Cria a estratégia configurada; um intervalo explícito força polling fixo"""
+    if poll_interval is not None:
+        return FixedInterval(poll_interval)
+
+    name = (name or Config.POLL_STRATEGY).lower()
+    if name == 'fixed':
+        return FixedInterval()
+    if name == 'adaptive':
+        return AdaptiveBackoff()
+    raise ValueError(f"Estratégia de polling desconhecida: {name}")
+
+
+def extract_status(payload: Any) -> Optional[str]:
+    """Extrai o status da resposta de /status (string) ou de /task (objeto)"""
+    if isinstance(payload, dict):
+        return payload.get('status')
+    return payload
+
+
+def progress_marker(payload: Any) -> tuple:
+    """Marcador usado para detectar progresso entre ticks (status e nº de steps)"""
+    if isinstance(payload, dict):
+        steps = payload.get('steps')
+        return payload.get('status'), len(steps) if isinstance(steps, list) else None
+    return payload, None
+
+
+def advance_marker(previous: Optional[tuple], payload: Any) -> Tuple[tuple, bool]:
+    """Novo marcador de progresso e se houve progresso (status ou nº de steps) desde o anterior
+
+    Respostas de /status não trazem steps: a última contagem conhecida é mantida
+    e novos steps só são percebidos nos ticks com detalhes completos.
+    """
+    status, steps = progress_marker(payload)
+    if previous is None:
+        return (status, steps), False
+    previous_status, previous_steps = previous
+    if steps is None:
+        steps = previous_steps
+    progressed = status != previous_status or (previous_steps is not None and steps != previous_steps)
+    return (status, steps), progressed
@@ -0,0 +1,208 @@
+"""
+Profiler por amostragem sob demanda, em todos os workers
+
+O endpoint de administração grava um arquivo de disparo em PROFILER_DIR. Cada
+processo com PROFILER_ENABLED mantém uma thread que verifica o diretório a
+cada PROFILER_WATCH_INTERVAL; ao encontrar um disparo novo, ela amostra as
+pilhas de todas as threads do processo (sys._current_frames) pelo tempo pedido
+e grava o resultado em PROFILER_DIR/<sessão>.<pid>.txt. O disparo responde na
+hora com o identificador da sessão; passado o tempo pedido, qualquer worker
+junta os arquivos no formato "collapsed stacks", aceito por flamegraph.pl,
+speedscope e inferno:
+
+    pid:1234;_bootstrap (threading.py:995);run (api.py:560);sleep 42
+
+Fora de uma sessão, o custo é uma listagem de diretório por intervalo.
+Disparos, amostras e resultados mais velhos que PROFILER_RESULT_TTL são
+removidos no disparo seguinte.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from .config import Config
+
+_TRIGGER_SUFFIX = '.trigger'
+_RESULT_SUFFIX = '.result'
+_SESSION_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def sample_stacks(duration: float, interval: float) -> Counter:
+    """Amostra as pilhas das threads deste processo; retorna {pilha colapsada: amostras}"""
+    stacks: Counter = Counter()
+    own = threading.get_ident()
+    root = f'pid:{os.getpid()}'
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(root)
+            stacks[';'.join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+class SamplingProfiler:
+    """Observa os disparos em PROFILER_DIR e coleta os resultados dos workers"""
+
+    def __init__(self, directory: str = None, enabled: bool = None):
+        self.directory = directory or Config.PROFILER_DIR
+        self.enabled = Config.PROFILER_ENABLED if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._started = False
+        self._pid: Optional[int] = None
+        self._seen = set()
+
+    def start(self) -> None:
+        """Inicia a thread que observa os disparos (idempotente; uma por processo)"""
+        with self._lock:
+            # Threads não sobrevivem ao fork: cada worker inicia a sua
+            if not self.enabled or (self._started and self._pid == os.getpid()):
+                return
+            self._started = True
+            self._pid = os.getpid()
+        os.makedirs(self.directory, exist_ok=True)
+        threading.Thread(target=self._watch, name='profiler-watch', daemon=True).start()
+
+    def _watch(self) -> None:
+        while True:
+            try:
+                triggers = {entry.name: entry.path for entry in os.scandir(self.directory)
+                            if entry.name.endswith(_TRIGGER_SUFFIX)}
+                # Só os disparos ainda em disco importam: o conjunto não cresce com as sessões
+                self._seen.intersection_update(triggers)
+                for name, path in triggers.items():
+                    if name not in self._seen:
+                        self._seen.add(name)
+                        self._run(path)
+            except OSError:
+                pass
+            time.sleep(Config.PROFILER_WATCH_INTERVAL)
+
+    def _run(self, trigger_path: str) -> None:
+        try:
+            with open(trigger_path) as f:
+                trigger = json.load(f)
+        except (OSError, ValueError):
+            return
+        remaining = trigger['started_at'] + trigger['duration'] - time.time()
+        if remaining <= 0:
+            # Disparo antigo (de antes deste processo existir): ignora
+            return
+        stacks = sample_stacks(remaining, trigger['interval'])
+        output = os.path.join(self.directory, f"{trigger['session']}.{os.getpid()}.txt")
+        with open(f'{output}.tmp', 'w') as f:
+            f.writelines(f'{stack} {count}\n' for stack, count in stacks.items())
+        os.replace(f'{output}.tmp', output)
+
+    def trigger(self, duration: float, interval: float = None) -> Dict[str, Any]:
+        """Dispara a amostragem em todos os workers sem esperar; retorna a sessão e quando o resultado fica pronto"""
+        self.start()
+        self._sweep()
+        session = uuid.uuid4().hex
+        trigger = {
+            'session': session,
+            'started_at': time.time(),
+            'duration': duration,
+            'interval': interval or Config.PROFILER_INTERVAL,
+        }
+        trigger_path = os.path.join(self.directory, f'{session}{_TRIGGER_SUFFIX}')
+        with open(f'{trigger_path}.tmp', 'w') as f:
+            json.dump(trigger, f)
+        os.replace(f'{trigger_path}.tmp', trigger_path)
+        return {'session': session, 'ready_at': self._ready_at(trigger)}
+
+    @staticmethod
+    def _ready_at(trigger: Dict[str, Any]) -> float:
+        # Cada worker nota o disparo em até um intervalo de observação e grava ao terminar
+        return trigger['started_at'] + trigger['duration'] + Config.PROFILER_WATCH_INTERVAL + Config.PROFILER_COLLECT_GRACE
+
+    def collect(self, session: str) -> Optional[Dict[str, Any]]:
+        """
+        Resultado de uma sessão: None se desconhecida; com 'stacks' ausente se ainda em andamento
+
+        Qualquer worker pode coletar: o resultado junto fica em disco e as
+        consultas seguintes o reaproveitam.
+        """
+        if not _SESSION_PATTERN.fullmatch(session):
+            return None
+        result_path = os.path.join(self.directory, f'{session}{_RESULT_SUFFIX}')
+        trigger_path = os.path.join(self.directory, f'{session}{_TRIGGER_SUFFIX}')
+        result = self._read_result(result_path)
+        if result is not None:
+            return result
+        try:
+            with open(trigger_path) as f:
+                trigger = json.load(f)
+        except (OSError, ValueError):
+            # Outro worker pode ter acabado de juntar (e removido o disparo)
+            return self._read_result(result_path)
+        ready_at = self._ready_at(trigger)
+        if time.time() < ready_at:
+            return {'session': session, 'ready_at': ready_at}
+
+        stacks: Counter = Counter()
+        outputs = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith(f'{session}.') and entry.name.endswith('.txt'):
+                    with open(entry.path) as f:
+                        for line in f:
+                            stack, _, count = line.rstrip('\n').rpartition(' ')
+                            stacks[stack] += int(count)
+                    outputs.append(entry.path)
+        except FileNotFoundError:
+            return self._read_result(result_path)
+        result = {
+            'session': session,
+            'ready_at': ready_at,
+            'workers': len(outputs),
+            'stacks': ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common()),
+        }
+        tmp_path = f'{result_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, result_path)
+        for path in outputs + [trigger_path]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return result
+
+    @staticmethod
+    def _read_result(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _sweep(self) -> None:
+        """Remove disparos, amostras e resultados mais velhos que PROFILER_RESULT_TTL"""
+        cutoff = time.time() - Config.PROFILER_RESULT_TTL
+        try:
+            for entry in os.scandir(self.directory):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        except OSError:
+            pass
@@ -0,0 +1,70 @@
+"""
+Projeção de campos e paginação de steps dos detalhes de uma task
+
+Query params aceitos por GET /api/v1/task/<id>:
+
+    fields=status,output     apenas os campos de primeiro nível listados
+    steps_since=<n>          steps a partir do índice n (nº de steps já recebidos)
+    steps_limit=<k>          no máximo k steps; sem steps_since, os k últimos
+
+Quando os steps são paginados, a resposta traz também steps_total e
+steps_next (cursor para a próxima página).
+"""
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+Projection = Tuple[Optional[Tuple[str, ...]], Optional[int], Optional[int]]
+
+
+def _non_negative(args: Mapping[str, str], name: str) -> Optional[int]:
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f'Parâmetro "{name}" deve ser um inteiro')
+    if number < 0:
+        raise ValueError(f'Parâmetro "{name}" não pode ser negativo')
+    return number
+
+
+def parse_projection(args: Mapping[str, str]) -> Optional[Projection]:
+    """Lê fields/steps_since/steps_limit; None quando a resposta completa foi pedida"""
+    fields = None
+    if args.get('fields'):
+        fields = tuple(sorted({name.strip() for name in args['fields'].split(',') if name.strip()}))
+        if not fields:
+            raise ValueError('Parâmetro "fields" não contém nenhum campo')
+    steps_since = _non_negative(args, 'steps_since')
+    steps_limit = _non_negative(args, 'steps_limit')
+    if fields is None and steps_since is None and steps_limit is None:
+        return None
+    return fields, steps_since, steps_limit
+
+
+def projection_key(task_id: str, projection: Projection) -> str:
+    """Chave de cache de uma projeção"""
+    fields, steps_since, steps_limit = projection
+    return f"projection:{task_id}:{','.join(fields or ('*',))}:{steps_since}:{steps_limit}"
+
+
+def project_task(details: Dict[str, Any], projection: Projection) -> Dict[str, Any]:
+    """Recorta os detalhes da task sem alterar o objeto original"""
+    fields, steps_since, steps_limit = projection
+    if fields is None:
+        projected = dict(details)
+    else:
+        projected = {name: details[name] for name in fields if name in details}
+
+    steps = details.get('steps')
+    if 'steps' in projected and isinstance(steps, list) and (steps_since is not None or steps_limit is not None):
+        total = len(steps)
+        if steps_since is None:
+            start = max(total - steps_limit, 0)
+        else:
+            start = min(steps_since, total)
+        end = total if steps_limit is None else min(start + steps_limit, total)
+        projected['steps'] = steps[start:end]
+        projected['steps_total'] = total
+        projected['steps_next'] = end
+    return projected
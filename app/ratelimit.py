@@ -0,0 +1,284 @@
+"""
+Controle de vazão das chamadas ao upstream
+
+Token buckets (global e por classe de endpoint) limitam a taxa de chamadas e
+limites de concorrência controlam quantas ficam em andamento. Quando há fila,
+as chamadas feitas para atender usuários passam na frente das feitas em
+segundo plano (polling, jobs). Um 429 do upstream pausa todas as admissões
+até o Retry-After informado, em vez de cada thread insistir por conta própria.
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+from .config import Config
+
+# Classes de endpoint: submissões/controle, leituras e leituras em segundo plano
+ENDPOINT_CLASSES = ('submit', 'read', 'poll')
+SUBMIT_OPERATIONS = frozenset({'run_task', 'stop_task', 'pause_task', 'resume_task'})
+
+# Prioridades na fila de admissão (menor passa primeiro)
+FOREGROUND = 0
+BACKGROUND = 1
+
+_context = threading.local()
+
+
+class UpstreamThrottled(requests.exceptions.RequestException):
+    """Não houve capacidade para chamar o upstream dentro do prazo"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """Marca as chamadas feitas pela thread atual como trabalho de segundo plano"""
+    previous = getattr(_context, 'background', False)
+    _context.background = True
+    try:
+        yield
+    finally:
+        _context.background = previous
+
+
+def is_background() -> bool:
+    return getattr(_context, 'background', False)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Segundos indicados por um header Retry-After (número ou data HTTP)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(response: Optional[requests.Response], attempt: int) -> float:
+    """Espera antes de uma nova tentativa: Retry-After ou backoff exponencial, com jitter"""
+    jitter = Config.UPSTREAM_RETRY_JITTER
+    retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+    if retry_after is not None:
+        # Jitter só para cima: nunca antes do que o upstream pediu
+        delay = retry_after * (1 + random.uniform(0, jitter))
+    else:
+        delay = Config.UPSTREAM_RETRY_DELAY * 2 ** attempt * (1 + random.uniform(-jitter, jitter))
+    return min(delay, Config.UPSTREAM_RETRY_MAX_DELAY)
+
+
+class TokenBucket:
+    """Token bucket sem lock próprio (usado sob o lock do governor)"""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Segundos até haver um token disponível (0 se já houver)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class UpstreamGovernor:
+    """Admissão de chamadas ao upstream com limites de taxa e de concorrência"""
+
+    def __init__(self, rate: float = None, burst: float = None, max_in_flight: int = None,
+                 class_rates: Dict[str, float] = None, class_limits: Dict[str, int] = None,
+                 acquire_timeout: float = None):
+        rate = Config.UPSTREAM_RATE_LIMIT if rate is None else rate
+        class_rates = class_rates or {
+            'submit': Config.UPSTREAM_SUBMIT_RATE_LIMIT,
+            'read': Config.UPSTREAM_READ_RATE_LIMIT,
+            'poll': Config.UPSTREAM_POLL_RATE_LIMIT,
+        }
+        self.max_in_flight = max_in_flight or Config.UPSTREAM_MAX_IN_FLIGHT
+        self.class_limits = class_limits or {
+            'submit': Config.UPSTREAM_SUBMIT_MAX_IN_FLIGHT,
+            'read': Config.UPSTREAM_READ_MAX_IN_FLIGHT,
+            'poll': Config.UPSTREAM_POLL_MAX_IN_FLIGHT,
+        }
+        self.acquire_timeout = Config.UPSTREAM_ACQUIRE_TIMEOUT if acquire_timeout is None else acquire_timeout
+
+        # Taxa 0 = sem limite
+        self._global_bucket = TokenBucket(rate, burst or Config.UPSTREAM_RATE_BURST or None) if rate > 0 else None
+        self._buckets = {cls: TokenBucket(r) for cls, r in class_rates.items() if r > 0}
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        # Fila de admissão: um heap por classe de (prioridade, ordem de chegada, condição da chamada);
+        # cada chamada espera na própria condição (sobre o mesmo lock) e só a próxima é acordada
+        self._waiters: Dict[str, List[tuple]] = defaultdict(list)
+        self._sequence = itertools.count()
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._total_in_flight = 0
+        self._paused_until = 0.0
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    def classify(self, operation: str) -> str:
+        """Classe de endpoint de uma operação no contexto da thread atual"""
+        if operation in SUBMIT_OPERATIONS:
+            return 'submit'
+        return 'poll' if is_background() else 'read'
+
+    def _next_waiter(self, now: float) -> Optional[tuple]:
+        """A próxima chamada a admitir: a primeira da fila entre as classes com vaga e token disponíveis"""
+        best = None
+        for endpoint_class, waiters in self._waiters.items():
+            if not waiters or self._in_flight[endpoint_class] >= self.class_limits.get(endpoint_class,
+                                                                                        self.max_in_flight):
+                continue
+            bucket = self._buckets.get(endpoint_class)
+            if bucket is not None and bucket.wait_time(now) > 0:
+                continue
+            if best is None or waiters[0][:2] < best[:2]:
+                best = waiters[0]
+        return best
+
+    def _notify_next(self, now: float) -> None:
+        entry = self._next_waiter(now)
+        if entry is not None:
+            entry[2].notify()
+
+    def _admission_delay(self, entry: tuple, endpoint_class: str, now: float) -> Optional[float]:
+        """0 se a entrada pode ser admitida agora; senão segundos a esperar (None = até ser notificado)"""
+        if self._next_waiter(now) is not entry:
+            # Outra chamada de prioridade maior (ou mais antiga) é a próxima; a primeira da classe
+            # sem token espera o próprio bucket, as demais são acordadas pela que passar antes delas
+            bucket = self._buckets.get(endpoint_class)
+            if bucket is not None and self._waiters[endpoint_class][0] is entry:
+                wait = bucket.wait_time(now)
+                if wait > 0:
+                    return wait
+            return None
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._total_in_flight >= self.max_in_flight:
+            return None
+        if self._global_bucket is not None:
+            wait = self._global_bucket.wait_time(now)
+            if wait > 0:
+                return wait
+        return 0.0
+
+    def acquire(self, endpoint_class: str, timeout: float = None) -> None:
+        """Bloqueia até a chamada poder ir ao upstream; UpstreamThrottled se o prazo acabar"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        priority = BACKGROUND if is_background() else FOREGROUND
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            waiters = self._waiters[endpoint_class]
+            entry = (priority, next(self._sequence), threading.Condition(self._lock))
+            heapq.heappush(waiters, entry)
+            waited = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._admission_delay(entry, endpoint_class, now)
+                    if delay == 0:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        retry_after = max(self._paused_until - now, delay or 0.0, 1.0)
+                        raise UpstreamThrottled(
+                            f'Capacidade de chamadas ao upstream esgotada ({endpoint_class})', retry_after
+                        )
+                    waited = True
+                    entry[2].wait(remaining if delay is None else min(delay, remaining))
+
+                for bucket in (self._global_bucket, self._buckets.get(endpoint_class)):
+                    if bucket is not None:
+                        bucket.take()
+                self._in_flight[endpoint_class] += 1
+                self._total_in_flight += 1
+                self._counters['admitted'] += 1
+                if waited:
+                    self._counters['queued'] += 1
+            finally:
+                if waiters[0] is entry:
+                    heapq.heappop(waiters)
+                else:
+                    # Desistência no meio da fila (prazo esgotado)
+                    waiters.remove(entry)
+                    heapq.heapify(waiters)
+                self._notify_next(time.monotonic())
+
+    def release(self, endpoint_class: str) -> None:
+        with self._cond:
+            self._in_flight[endpoint_class] -= 1
+            self._total_in_flight -= 1
+            self._notify_next(time.monotonic())
+
+    @contextmanager
+    def slot(self, endpoint_class: str) -> Iterator[None]:
+        self.acquire(endpoint_class)
+        try:
+            yield
+        finally:
+            self.release(endpoint_class)
+
+    def pause(self, seconds: float) -> None:
+        """Suspende novas admissões (upstream respondeu 429)"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._counters['pauses'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'rate_limit': self._global_bucket.rate if self._global_bucket else None,
+                'class_rate_limits': {cls: bucket.rate for cls, bucket in self._buckets.items()},
+                'max_in_flight': self.max_in_flight,
+                'class_limits': dict(self.class_limits),
+                'in_flight': {cls: self._in_flight[cls] for cls in ENDPOINT_CLASSES},
+                'waiting': {cls: len(self._waiters.get(cls, ())) for cls in ENDPOINT_CLASSES},
+                'paused_for': round(max(0.0, self._paused_until - time.monotonic()), 3),
+                'counters': dict(self._counters),
+            }
+
+
+_governor: Optional[UpstreamGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> UpstreamGovernor:
+    """Retorna o governor compartilhado do processo (criado sob demanda)"""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = UpstreamGovernor()
+    return _governor
+
+
+def _reset_after_fork() -> None:
+    # Contadores de chamadas em andamento não valem no processo filho
+    global _governor, _governor_lock
+    _governor = None
+    _governor_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
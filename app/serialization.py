@@ -0,0 +1,115 @@
+"""
+Serialização JSON da API
+
+- Provider de JSON do Flask com orjson (quando instalado) e fallback para a
+  biblioteca padrão (JSON_PROVIDER=auto|orjson|stdlib).
+- UpstreamPayload: objeto JSON vindo do upstream que guarda os bytes
+  originais; enquanto não é alterado, as respostas repassam esses bytes sem
+  serializar de novo.
+"""
+import json
+from typing import Any, Optional, Union
+
+from flask.json.provider import DefaultJSONProvider
+
+from . import timing
+from .config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _orjson_enabled() -> bool:
+    choice = Config.JSON_PROVIDER.lower()
+    if choice == 'stdlib':
+        return False
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER=orjson requer o pacote 'orjson' (pip install orjson)")
+    return orjson is not None
+
+
+USE_ORJSON = _orjson_enabled()
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+class UpstreamPayload(dict):
+    """Objeto JSON do upstream com os bytes originais (descartados se o objeto for alterado)
+
+    Apenas alterações no próprio objeto são detectadas: objetos aninhados
+    não devem ser modificados no lugar.
+    """
+
+    __slots__ = ('raw',)
+
+    def __init__(self, data: dict, raw: Optional[bytes] = None):
+        super().__init__(data)
+        self.raw = raw
+
+    def _mutating(name: str):
+        method = getattr(dict, name)
+
+        def wrapper(self, *args, **kwargs):
+            self.raw = None
+            return method(self, *args, **kwargs)
+
+        wrapper.__name__ = name
+        return wrapper
+
+    for _name in ('__setitem__', '__delitem__', '__ior__', 'pop', 'popitem', 'setdefault', 'update', 'clear'):
+        locals()[_name] = _mutating(_name)
+    del _name, _mutating
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return orjson.loads(data) if USE_ORJSON else json.loads(data)
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """JSON compacto em bytes (repassa os bytes originais de um UpstreamPayload intacto)"""
+    raw = getattr(value, 'raw', None)
+    if raw is not None:
+        return raw
+    if USE_ORJSON:
+        return orjson.dumps(value, default=DefaultJSONProvider.default, option=_ORJSON_OPTIONS)
+    return json.dumps(value, separators=(',', ':'), default=DefaultJSONProvider.default).encode('utf-8')
+
+
+def dumps(value: Any) -> str:
+    return dumps_bytes(value).decode('utf-8')
+
+
+def parse_upstream(content: bytes) -> Any:
+    """Decodifica uma resposta do upstream guardando os bytes de objetos"""
+    value = loads(content)
+    return UpstreamPayload(value, content) if isinstance(value, dict) else value
+
+
+def encoded_size(value: Any) -> int:
+    """Tamanho em bytes do JSON de um valor (sem serializar de novo quando possível)"""
+    raw = getattr(value, 'raw', None)
+    return len(raw) if raw is not None else len(dumps_bytes(value))
+
+
+class BrowserUseJSONProvider(DefaultJSONProvider):
+    """Provider do Flask: orjson quando disponível e repasse de payloads do upstream"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if USE_ORJSON and not kwargs.get('indent'):
+            return orjson.dumps(obj, default=self.default, option=_ORJSON_OPTIONS).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if USE_ORJSON and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            # Saída indentada (modo debug) fica com a biblioteca padrão
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        with timing.phase('serialize'):
+            body = dumps_bytes(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
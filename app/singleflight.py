@@ -0,0 +1,78 @@
+"""
+Coalescência de leituras idênticas simultâneas (single-flight)
+
+Enquanto uma leitura de uma chave está em andamento no upstream, outras
+chamadas com a mesma chave aguardam o resultado dela em vez de fazer a
+própria requisição. Erros também são compartilhados: todos os participantes
+recebem a exceção da chamada original.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+from .metrics import upstream_coalesced
+
+
+class SingleFlight:
+    """Single-flight para chamadas bloqueantes (threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    def do(self, key: str, fn: Callable[[], Any], operation: str = 'other') -> Any:
+        """Executa fn() uma única vez por chave entre as chamadas simultâneas"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            self._counters['leaders' if leader else 'followers'] += 1
+
+        if not leader:
+            upstream_coalesced.inc(operation)
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'in_flight': len(self._calls), **self._counters}
+
+
+class AsyncSingleFlight:
+    """Single-flight para corrotinas (um event loop)"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], operation: str = 'other') -> Any:
+        """Aguarda a chamada em andamento para a chave ou inicia uma nova"""
+        task = self._calls.get(key)
+        if task is None:
+            # A chamada roda em uma task própria: o cancelamento de um participante não afeta os outros
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self._counters['leaders'] += 1
+        else:
+            self._counters['followers'] += 1
+            upstream_coalesced.inc(operation)
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {'in_flight': len(self._calls), **self._counters}
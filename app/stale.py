@@ -0,0 +1,128 @@
+"""
+Última resposta boa das leituras (stale-while-revalidate)
+
+Cada leitura bem-sucedida de task, status ou listagem fica guardada aqui,
+independente do TTL do cache. Artefatos (mídia, screenshots, GIF) não passam
+por aqui: os de tasks finalizadas são servidos do disco sem chamar o
+upstream e os demais são repassados em chunks, sem cópia em memória. Quando o
+upstream está degradado —
+circuito aberto, timeout, falha de conexão, 5xx ou limite de requisições — a
+leitura devolve a última resposta boa (até STALE_MAX_AGE) em vez do erro e
+dispara uma atualização em segundo plano (no máximo uma por chave a cada
+STALE_REFRESH_INTERVAL). A resposta HTTP sai com "X-Stale: true" e "Age".
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+from .config import Config
+from .ratelimit import background
+from .serialization import encoded_size
+
+
+def is_degraded(error: BaseException) -> bool:
+    """Se o erro indica upstream indisponível (e não uma resposta válida como 404)"""
+    if not isinstance(error, requests.exceptions.RequestException):
+        return False
+    response = getattr(error, 'response', None)
+    return response is None or response.status_code >= 500 or response.status_code == 429
+
+
+class StaleStore:
+    """LRU thread-safe da última resposta boa por chave, limitado em entradas e bytes"""
+
+    def __init__(self, enabled: bool = None, max_entries: int = None, max_bytes: int = None):
+        self.enabled = Config.STALE_ENABLED if enabled is None else enabled
+        self.max_entries = max_entries or Config.STALE_MAX_ENTRIES
+        self.max_bytes = max_bytes or Config.STALE_MAX_BYTES
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Chaves com atualização em andamento e horário da última tentativa
+        self._refreshing = set()
+        self._refreshed_at: Dict[str, float] = {}
+        self._counters = {'served': 0, 'refreshes': 0, 'refresh_errors': 0}
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        size = encoded_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, time.time(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self._refreshed_at.pop(evicted_key, None)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(valor, idade em segundos) da última resposta boa; None se ausente ou velha demais"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[1] > Config.STALE_MAX_AGE:
+                return None
+            self._entries.move_to_end(key)
+            self._counters['served'] += 1
+            return entry[0], now - entry[1]
+
+    def refresh(self, key: str, fetch: Callable[[], Any]) -> bool:
+        """Atualiza a chave em segundo plano; False se já há uma atualização recente ou em andamento"""
+        now = time.monotonic()
+        with self._lock:
+            if key in self._refreshing or now - self._refreshed_at.get(key, -1e9) < Config.STALE_REFRESH_INTERVAL:
+                return False
+            self._refreshing.add(key)
+            self._refreshed_at[key] = now
+            self._counters['refreshes'] += 1
+        threading.Thread(target=self._refresh, args=(key, fetch), name=f'stale-refresh-{key}', daemon=True).start()
+        return True
+
+    def _refresh(self, key: str, fetch: Callable[[], Any]) -> None:
+        try:
+            # Atualização não atende ninguém agora: fica atrás das leituras de usuários
+            with background():
+                self.put(key, fetch())
+        except Exception:
+            with self._lock:
+                self._counters['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'refreshing': len(self._refreshing),
+                **self._counters,
+            }
+
+
+# Maior idade (segundos) dos dados servidos velhos na requisição atual
+_served_age: ContextVar[Optional[float]] = ContextVar('stale_served_age', default=None)
+
+
+def reset() -> None:
+    _served_age.set(None)
+
+
+def mark_served(age: float) -> None:
+    """Registra que a requisição atual recebeu dados velhos"""
+    current = _served_age.get()
+    _served_age.set(age if current is None else max(current, age))
+
+
+def served_age() -> Optional[float]:
+    return _served_age.get()
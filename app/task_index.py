@@ -0,0 +1,389 @@
+"""
+Índice local (SQLite em modo WAL) dos metadados das tasks
+
+Guarda id, status, datas, modelo e domínio de cada task para que
+GET /api/v1/tasks filtre, ordene e pagine por cursor sem percorrer a
+listagem do upstream com offset. O índice é alimentado por:
+
+- submissões feitas pela própria aplicação (run_task);
+- leituras de detalhes e status que passam pelo cliente;
+- uma sincronização periódica com a listagem do upstream, incremental
+  (pagina até a atividade das tasks ficar atrás da marca d'água da
+  sincronização anterior) e completa de tempos em tempos.
+
+A listagem vem por criação, mais recentes primeiro: uma task antiga que
+muda depois da parada da incremental é corrigida pelas leituras de
+detalhes/status ou pela próxima sincronização completa. Até a primeira
+sincronização completa o índice está "aquecendo" (warming).
+"""
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from .config import Config
+from .polling import TERMINAL_STATUSES
+from .ratelimit import background
+
+SORT_KEYS = {
+    'created_at': 'created_at',
+    'finished_at': 'COALESCE(finished_at, 0)',
+}
+MAX_PAGE_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    status TEXT,
+    task TEXT,
+    model TEXT,
+    domain TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    source TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_finished ON tasks (COALESCE(finished_at, 0), id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO tasks (id, status, task, model, domain, created_at, finished_at, source, updated_at)
+VALUES (:id, :status, :task, :model, :domain, :created_at, :finished_at, :source, :updated_at)
+ON CONFLICT (id) DO UPDATE SET
+    status = COALESCE(excluded.status, tasks.status),
+    task = COALESCE(tasks.task, excluded.task),
+    model = COALESCE(tasks.model, excluded.model),
+    domain = COALESCE(tasks.domain, excluded.domain),
+    created_at = MIN(tasks.created_at, excluded.created_at),
+    finished_at = COALESCE(excluded.finished_at, tasks.finished_at),
+    updated_at = excluded.updated_at
+WHERE excluded.status IS NOT tasks.status
+   OR (excluded.finished_at IS NOT NULL AND tasks.finished_at IS NULL)
+   OR (tasks.model IS NULL AND excluded.model IS NOT NULL)
+   OR (tasks.domain IS NULL AND excluded.domain IS NOT NULL)
+   OR (tasks.task IS NULL AND excluded.task IS NOT NULL)
+"""
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Converte ISO 8601 ou epoch em segundos (None se ausente ou inválido)"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        # Datas sem fuso do upstream estão em UTC
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _format_timestamp(value: Optional[float]) -> Optional[str]:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(value)) if value is not None else None
+
+
+def _domain(task: Dict[str, Any]) -> Optional[str]:
+    allowed = task.get('allowed_domains')
+    if isinstance(allowed, list) and allowed:
+        return str(allowed[0]).lower()
+    for step in task.get('steps') or []:
+        url = step.get('url') if isinstance(step, dict) else None
+        if url:
+            host = urlparse(url).hostname
+            if host:
+                return host.lower()
+    return None
+
+
+def _activity(task: Dict[str, Any]) -> float:
+    """Momento da última atividade conhecida da task (0 se o upstream não informa datas)"""
+    stamps = [parse_timestamp(task.get(name)) for name in ('updated_at', 'started_at', 'finished_at', 'created_at')]
+    return max((stamp for stamp in stamps if stamp is not None), default=0.0)
+
+
+def _encode_cursor(value: float, task_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, task_id]).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        value, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(value), str(task_id)
+    except (ValueError, TypeError):
+        raise ValueError('Parâmetro "cursor" inválido')
+
+
+class TaskIndex:
+    """Índice local de tasks com sincronização incremental a partir do upstream"""
+
+    def __init__(self, client, path: str = None, enabled: bool = None):
+        self.client = client
+        self.path = path or Config.TASK_INDEX_DB_PATH
+        self.enabled = Config.TASK_INDEX_ENABLED if enabled is None else enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stopping = threading.Event()
+        self._schema_ready = False
+        self.last_error: Optional[str] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if not self._schema_ready:
+                conn.executescript(_SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    # Escrita
+
+    def _row(self, task: Dict[str, Any], source: str, now: float) -> Optional[Dict[str, Any]]:
+        task_id = task.get('id') or task.get('task_id')
+        if not task_id:
+            return None
+        return {
+            'id': task_id,
+            'status': task.get('status'),
+            'task': task.get('task'),
+            'model': task.get('llm_model') or task.get('model'),
+            'domain': _domain(task),
+            'created_at': parse_timestamp(task.get('created_at')) or now,
+            'finished_at': parse_timestamp(task.get('finished_at')),
+            'source': source,
+            'updated_at': now,
+        }
+
+    def upsert_many(self, tasks: Iterable[Dict[str, Any]], source: str = 'upstream') -> int:
+        """Grava (ou atualiza) tasks; retorna quantas linhas mudaram"""
+        now = time.time()
+        rows = [row for row in (self._row(task, source, now) for task in tasks) if row is not None]
+        if not rows:
+            return 0
+        conn = self._conn()
+        before = conn.total_changes
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(_UPSERT, rows)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return conn.total_changes - before
+
+    def record_submission(self, result: Dict[str, Any], task_data: Dict[str, Any]) -> None:
+        """Registra uma task submetida pela aplicação (com modelo e domínio do payload)"""
+        if not self.enabled or not isinstance(result, dict):
+            return
+        task = {**task_data, **result, 'status': result.get('status') or 'created'}
+        self._safely(self.upsert_many, [task], 'local')
+
+    def observe(self, details: Dict[str, Any]) -> None:
+        """Atualiza o índice com detalhes lidos do upstream"""
+        if self.enabled and isinstance(details, dict):
+            self._safely(self.upsert_many, [details], 'upstream')
+
+    def observe_status(self, task_id: str, status: Optional[str]) -> None:
+        """Atualiza apenas o status (leituras de /status)"""
+        if not self.enabled or not status:
+            return
+
+        def update() -> None:
+            now = time.time()
+            self._conn().execute(
+                'UPDATE tasks SET status = ?, updated_at = ?, finished_at = COALESCE(finished_at, ?) '
+                'WHERE id = ? AND status IS NOT ?',
+                (status, now, now if status in TERMINAL_STATUSES else None, task_id, status),
+            )
+
+        self._safely(update)
+
+    def _safely(self, fn, *args) -> None:
+        # O índice é auxiliar: falhas do SQLite nunca derrubam a chamada ao upstream
+        try:
+            fn(*args)
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+
+    # Consulta
+
+    def query(self, statuses: List[str] = None, model: str = None, domain: str = None,
+              created_after: float = None, created_before: float = None, sort: str = '-created_at',
+              limit: int = 50, cursor: str = None) -> Dict[str, Any]:
+        """Filtra e pagina por cursor (estável mesmo com novas tasks chegando)"""
+        descending = sort.startswith('-')
+        key = SORT_KEYS.get(sort.lstrip('-'))
+        if key is None:
+            raise ValueError(f'Parâmetro "sort" inválido. Use um de: {", ".join(SORT_KEYS)} (prefixo "-" para decrescente)')
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        where, params = [], []
+        if statuses:
+            where.append(f'status IN ({", ".join("?" * len(statuses))})')
+            params += statuses
+        if model:
+            where.append('model = ?')
+            params.append(model)
+        if domain:
+            where.append('domain = ?')
+            params.append(domain.lower())
+        if created_after is not None:
+            where.append('created_at >= ?')
+            params.append(created_after)
+        if created_before is not None:
+            where.append('created_at < ?')
+            params.append(created_before)
+        if cursor:
+            value, task_id = _decode_cursor(cursor)
+            where.append(f'({key}, id) {"<" if descending else ">"} (?, ?)')
+            params += [value, task_id]
+
+        order = 'DESC' if descending else 'ASC'
+        sql = f'SELECT *, {key} AS sort_value FROM tasks'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' ORDER BY {key} {order}, id {order} LIMIT ?'
+        rows = self._conn().execute(sql, params + [limit + 1]).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            'tasks': [self._to_dict(row) for row in rows],
+            'next_cursor': _encode_cursor(rows[-1]['sort_value'], rows[-1]['id']) if has_more else None,
+        }
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'id': row['id'],
+            'status': row['status'],
+            'task': row['task'],
+            'model': row['model'],
+            'domain': row['domain'],
+            'created_at': _format_timestamp(row['created_at']),
+            'finished_at': _format_timestamp(row['finished_at']),
+        }
+
+    @property
+    def warming(self) -> bool:
+        """True até a primeira sincronização completa (o índice ainda não tem todas as tasks)"""
+        return not self._state('full_synced_at')
+
+    def sync_state(self) -> Dict[str, Any]:
+        """Momento das últimas sincronizações com o upstream"""
+        state = {row['name']: row['value'] for row in self._conn().execute('SELECT name, value FROM sync_state')}
+        return {
+            'warming': not state.get('full_synced_at'),
+            'synced_at': _format_timestamp(state.get('synced_at')),
+            'full_synced_at': _format_timestamp(state.get('full_synced_at')),
+            'last_error': self.last_error,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'tasks': self._conn().execute('SELECT COUNT(*) FROM tasks').fetchone()[0],
+            **self.sync_state(),
+        }
+
+    # Sincronização com o upstream
+
+    def _state(self, name: str) -> float:
+        row = self._conn().execute('SELECT value FROM sync_state WHERE name = ?', (name,)).fetchone()
+        return row['value'] if row else 0.0
+
+    def _set_state(self, name: str, value: float) -> None:
+        self._conn().execute(
+            'INSERT INTO sync_state (name, value) VALUES (?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET value = excluded.value',
+            (name, value),
+        )
+
+    def sync(self, full: bool = False) -> int:
+        """Percorre a listagem do upstream (mais recentes primeiro); incremental para ao passar da marca d'água"""
+        changed = 0
+        # Cada chave do pool de credenciais tem a sua própria listagem (e a sua marca d'água)
+        for credential in self.client.credentials:
+            changed += self._sync_listing(credential, full)
+
+        now = time.time()
+        self._set_state('synced_at', now)
+        if full:
+            self._set_state('full_synced_at', now)
+        return changed
+
+    def _sync_listing(self, credential, full: bool) -> int:
+        page_size = Config.TASK_INDEX_PAGE_SIZE
+        # Marca d'água no relógio do upstream: a maior atividade vista na sincronização anterior
+        state_name = f'watermark:{credential.id}'
+        watermark = self._state(state_name)
+        newest = watermark
+        changed = 0
+        offset = 0
+        for _ in range(Config.TASK_INDEX_MAX_PAGES):
+            # Sem cache: uma página de segundos atrás esconderia as mudanças que a sincronização procura
+            page = self.client.list_tasks(limit=page_size, offset=offset, credential=credential, use_cache=False)
+            items = page.get('tasks', []) if isinstance(page, dict) else page
+            if not items:
+                break
+            page_changed = self.upsert_many(items, 'upstream')
+            changed += page_changed
+            page_activity = max(_activity(item) for item in items)
+            newest = max(newest, page_activity)
+            if len(items) < page_size or (not full and page_activity < watermark):
+                break
+            if not full and not page_activity and not page_changed:
+                # Upstream sem datas: a marca d'água nunca sobe, então para na primeira página sem mudanças
+                break
+            offset += page_size
+        if newest > watermark:
+            self._set_state(state_name, newest)
+        return changed
+
+    def start(self) -> None:
+        """Inicia a sincronização periódica em segundo plano (idempotente)"""
+        with self._lock:
+            if self._started or not self.enabled:
+                return
+            self._started = True
+        threading.Thread(target=self._sync_loop, name='task-index-sync', daemon=True).start()
+
+    def _sync_loop(self) -> None:
+        with background():
+            while True:
+                try:
+                    full = time.time() - self._state('full_synced_at') >= Config.TASK_INDEX_FULL_SYNC_INTERVAL
+                    self.sync(full=full)
+                    self.last_error = None
+                except (requests.exceptions.RequestException, sqlite3.Error) as e:
+                    self.last_error = str(e)
+                if self._stopping.wait(Config.TASK_INDEX_SYNC_INTERVAL):
+                    return
+
+    def stop(self) -> None:
+        self._stopping.set()
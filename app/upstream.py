@@ -0,0 +1,133 @@
+"""
+Sessão HTTP compartilhada (pool de conexões keep-alive) para a API Browser Use
+"""
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import Config
+
+
+class UpstreamSession:
+    """Sessão thread-safe com pool de conexões reutilizáveis para o upstream"""
+
+    def __init__(
+        self,
+        pool_connections: int = None,
+        pool_maxsize: int = None,
+        pool_block: bool = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+    ):
+        self.pool_connections = pool_connections or Config.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or Config.HTTP_POOL_MAXSIZE
+        self.pool_block = Config.HTTP_POOL_BLOCK if pool_block is None else pool_block
+        self.timeout: Tuple[float, float] = (
+            connect_timeout or Config.HTTP_CONNECT_TIMEOUT,
+            read_timeout or Config.HTTP_READ_TIMEOUT,
+        )
+
+        self._adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        self._session = requests.Session()
+        self._session.headers.update({'Connection': 'keep-alive'})
+        self._session.mount('https://', self._adapter)
+        self._session.mount('http://', self._adapter)
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._total_requests = 0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Executa uma requisição reutilizando conexões do pool"""
+        kwargs.setdefault('timeout', self.timeout)
+        with self._lock:
+            self._in_flight += 1
+            self._total_requests += 1
+            if self._in_flight > self._peak_in_flight:
+                self._peak_in_flight = self._in_flight
+        try:
+            return self._session.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna métricas de utilização do pool"""
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+            hosts[f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle_connections': idle,
+                'maxsize': pool.pool.maxsize if pool.pool else self.pool_maxsize,
+            }
+
+        with self._lock:
+            in_flight = self._in_flight
+            peak = self._peak_in_flight
+            total = self._total_requests
+
+        opened = sum(h['connections_opened'] for h in hosts.values())
+        return {
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+            'pool_block': self.pool_block,
+            'timeout': {'connect': self.timeout[0], 'read': self.timeout[1]},
+            'in_flight': in_flight,
+            'peak_in_flight': peak,
+            'total_requests': total,
+            'connections_opened': opened,
+            'connection_reuse_ratio': round(1 - opened / total, 4) if total else 0.0,
+            'utilization': round(in_flight / (self.pool_maxsize * max(len(hosts), 1)), 4),
+            'hosts': hosts,
+        }
+
+    def close(self) -> None:
+        self._session.close()
+
+
+_session: Optional[UpstreamSession] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> UpstreamSession:
+    """Retorna a sessão compartilhada do processo (criada sob demanda)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = UpstreamSession()
+    return _session
+
+
+def _reset_after_fork() -> None:
+    # Sockets do pool não podem ser compartilhados entre processos
+    global _session, _session_lock
+    _session = None
+    _session_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
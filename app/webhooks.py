@@ -0,0 +1,233 @@
+"""
+Entrega de callbacks (webhooks) quando uma task chega a um status final
+
+As tasks são acompanhadas pelo poller compartilhado; quando terminam, o
+resultado é enfileirado por host de destino. Cada entrega é um POST próprio:
+um dispatcher atende as pendentes de um mesmo host em sequência, reusando a
+conexão keep-alive, e reenvia falhas transitórias com backoff exponencial e
+jitter. Recusas definitivas do receptor (4xx) não são repetidas.
+"""
+import hashlib
+import heapq
+import hmac
+import itertools
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from .config import Config
+from .stale import is_degraded
+from .upstream import UpstreamSession
+
+# Respostas 4xx do receptor que ainda justificam nova tentativa
+RETRYABLE_RECEIVER_STATUSES = (408, 429)
+
+
+def validate_callback_url(url: Any) -> Optional[str]:
+    """Retorna uma mensagem de erro se a URL de callback for inválida"""
+    if not isinstance(url, str):
+        return 'Campo "callback_url" deve ser uma string'
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return 'Campo "callback_url" deve ser uma URL http(s) absoluta'
+    return None
+
+
+def _rejected(status: Optional[int]) -> bool:
+    """Se o receptor recusou a entrega de forma definitiva (4xx que não seja timeout ou limite)"""
+    return status is not None and 400 <= status < 500 and status not in RETRYABLE_RECEIVER_STATUSES
+
+
+class _Delivery:
+    """Uma entrega pendente de callback"""
+
+    def __init__(self, task_id: str, url: str, payload: Dict[str, Any]):
+        self.task_id = task_id
+        self.url = url
+        self.host = urlsplit(url).netloc
+        self.payload = payload
+        self.body = json.dumps(payload).encode('utf-8')
+        self.completed_at = time.time()
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.last_status: Optional[int] = None
+
+
+class WebhookDispatcher:
+    """Observa tasks e entrega o resultado final nas URLs de callback"""
+
+    def __init__(self, poller, session: UpstreamSession = None):
+        self.poller = poller
+        self._session = session
+        self._cond = threading.Condition()
+        self._queues: Dict[str, deque] = defaultdict(deque)
+        self._busy_hosts = set()
+        self._retries: List[tuple] = []
+        self._sequence = itertools.count()
+        self._watching: Dict[Future, tuple] = {}
+        self._history: deque = deque(maxlen=Config.WEBHOOK_HISTORY)
+        self._counters = defaultdict(int)
+        self._started = False
+
+    @property
+    def session(self) -> UpstreamSession:
+        if self._session is None:
+            self._session = UpstreamSession(
+                pool_connections=Config.WEBHOOK_POOL_CONNECTIONS,
+                pool_maxsize=Config.WEBHOOK_WORKERS,
+                connect_timeout=Config.WEBHOOK_TIMEOUT,
+                read_timeout=Config.WEBHOOK_TIMEOUT,
+            )
+        return self._session
+
+    def start(self) -> None:
+        """Inicia os dispatchers (idempotente)"""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        for n in range(Config.WEBHOOK_WORKERS):
+            threading.Thread(target=self._dispatch_loop, name=f'webhook-{n}', daemon=True).start()
+        threading.Thread(target=self._watchdog, name='webhook-watchdog', daemon=True).start()
+
+    def register(self, task_id: str, url: str, deadline: float = None) -> None:
+        """Agenda a entrega do resultado da task quando ela terminar"""
+        self.start()
+        deadline = deadline or time.time() + Config.WEBHOOK_WATCH_TIMEOUT
+        future = self.poller.watch(task_id)
+        with self._cond:
+            self._watching[future] = (task_id, url, deadline)
+            self._counters['registered'] += 1
+        future.add_done_callback(lambda f: self._on_task_done(task_id, url, deadline, f))
+
+    def _on_task_done(self, task_id: str, url: str, deadline: float, future: Future) -> None:
+        with self._cond:
+            if self._watching.pop(future, None) is None:
+                return
+
+        if future.cancelled():
+            payload = {'event': 'task.timeout', 'task_id': task_id,
+                       'error': f'Task {task_id} não foi concluída no prazo do callback'}
+        elif future.exception() is not None:
+            if is_degraded(future.exception()) and time.time() < deadline:
+                # Upstream indisponível ao consultar a task: volta a acompanhar (um 404, por exemplo, não muda)
+                timer = threading.Timer(Config.WEBHOOK_RETRY_DELAY, self.register, args=(task_id, url, deadline))
+                timer.daemon = True
+                timer.start()
+                return
+            payload = {'event': 'task.error', 'task_id': task_id,
+                       'error': f'Erro ao acompanhar a task: {future.exception()}'}
+        else:
+            result = future.result()
+            payload = {'event': 'task.completed', 'task_id': task_id, 'status': result.get('status'), 'result': result}
+        self._enqueue(_Delivery(task_id, url, payload))
+
+    def _enqueue(self, delivery: _Delivery) -> None:
+        with self._cond:
+            self._queues[delivery.host].append(delivery)
+            self._cond.notify()
+
+    def _next_batch(self) -> List[_Delivery]:
+        """Pega até WEBHOOK_BATCH_SIZE entregas de um host que não está sendo atendido (enviadas uma a uma)"""
+        with self._cond:
+            while True:
+                now = time.time()
+                while self._retries and self._retries[0][0] <= now:
+                    _, _, delivery = heapq.heappop(self._retries)
+                    self._queues[delivery.host].append(delivery)
+
+                for host, queue in self._queues.items():
+                    if queue and host not in self._busy_hosts:
+                        self._busy_hosts.add(host)
+                        batch = [queue.popleft() for _ in range(min(len(queue), Config.WEBHOOK_BATCH_SIZE))]
+                        return batch
+
+                timeout = self._retries[0][0] - now if self._retries else None
+                self._cond.wait(timeout)
+
+    def _sign(self, body: bytes) -> Dict[str, str]:
+        headers = {'Content-Type': 'application/json', 'User-Agent': 'browser-use-api-webhooks'}
+        if Config.WEBHOOK_SECRET:
+            digest = hmac.new(Config.WEBHOOK_SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest()
+            headers['X-Webhook-Signature'] = f'sha256={digest}'
+        return headers
+
+    def _deliver(self, delivery: _Delivery) -> bool:
+        delivery.attempts += 1
+        try:
+            response = self.session.post(delivery.url, data=delivery.body, headers=self._sign(delivery.body))
+            delivery.last_status = response.status_code
+            if response.status_code < 300:
+                return True
+            delivery.last_error = f'HTTP {response.status_code}'
+        except Exception as e:
+            delivery.last_error = str(e)
+        return False
+
+    def _record(self, delivery: _Delivery, outcome: str) -> None:
+        self._history.append({
+            'task_id': delivery.task_id,
+            'url': delivery.url,
+            'event': delivery.payload['event'],
+            'outcome': outcome,
+            'attempts': delivery.attempts,
+            'http_status': delivery.last_status,
+            'error': delivery.last_error if outcome != 'delivered' else None,
+            'latency_ms': round((time.time() - delivery.completed_at) * 1000, 1),
+            'at': time.time(),
+        })
+        self._counters[outcome] += 1
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            batch = self._next_batch()
+            retry = []
+            for delivery in batch:
+                if self._deliver(delivery):
+                    outcome = 'delivered'
+                elif delivery.attempts >= Config.WEBHOOK_MAX_ATTEMPTS or _rejected(delivery.last_status):
+                    outcome = 'failed'
+                else:
+                    retry.append(delivery)
+                    continue
+                with self._cond:
+                    self._record(delivery, outcome)
+
+            with self._cond:
+                self._busy_hosts.discard(batch[0].host)
+                for delivery in retry:
+                    delay = Config.WEBHOOK_RETRY_DELAY * 2 ** (delivery.attempts - 1)
+                    delay *= 1 + random.uniform(-0.2, 0.2)
+                    heapq.heappush(self._retries, (time.time() + delay, next(self._sequence), delivery))
+                    self._counters['retried'] += 1
+                self._cond.notify_all()
+
+    def _watchdog(self) -> None:
+        """Cancela a observação de tasks que passaram do prazo do callback"""
+        while True:
+            time.sleep(Config.WEBHOOK_WATCHDOG_INTERVAL)
+            now = time.time()
+            with self._cond:
+                expired = [(f, task_id) for f, (task_id, _, deadline) in self._watching.items() if now > deadline]
+            for future, task_id in expired:
+                self.poller.release(task_id, future)
+                future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            latencies = sorted(r['latency_ms'] for r in self._history if r['outcome'] == 'delivered')
+            return {
+                'watching': len(self._watching),
+                'pending': sum(len(q) for q in self._queues.values()) + len(self._retries),
+                'counters': dict(self._counters),
+                'latency_ms': {
+                    'p50': latencies[len(latencies) // 2] if latencies else None,
+                    'p99': latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] if latencies else None,
+                },
+                'recent': list(self._history)[-Config.WEBHOOK_RECENT_LIMIT:],
+            }
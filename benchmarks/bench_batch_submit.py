@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: submissão serial (POST /api/v1/run-task) x lote (POST /api/v1/run-tasks)
+
+Roda o app Flask em processo contra o mock local do upstream com latência
+simulada por chamada.
+
+Uso:
+    python -m benchmarks.bench_batch_submit --tasks 200 --latency 0.05
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_upstream import serve_in_thread, settings  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='latência do upstream por chamada (s)')
+    parser.add_argument('--concurrency', type=str, default='4,16,32', help='níveis de concorrência do lote')
+    args = parser.parse_args()
+
+    settings.latency = args.latency
+    server, base_url = serve_in_thread()
+    os.environ['BROWSER_USE_BASE_URL'] = base_url
+    os.environ.setdefault('BROWSER_USE_API_KEY', 'bench')
+    os.environ['BATCH_MAX_WORKERS'] = str(max(int(c) for c in args.concurrency.split(',')))
+
+    from app.api import app
+
+    client = app.test_client()
+    bodies = [{'task': f'benchmark {n}'} for n in range(args.tasks)]
+
+    try:
+        start = time.perf_counter()
+        for body in bodies:
+            assert client.post('/api/v1/run-task', json=body).status_code == 200
+        serial = time.perf_counter() - start
+        print(f'serial       {args.tasks} tasks em {serial:6.2f}s  ({args.tasks / serial:7.1f} tasks/s)')
+
+        for concurrency in (int(c) for c in args.concurrency.split(',')):
+            start = time.perf_counter()
+            response = client.post(f'/api/v1/run-tasks?concurrency={concurrency}', json=bodies)
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+            elapsed = time.perf_counter() - start
+            ok = sum(1 for line in lines if line['http_status'] == 200)
+            print(
+                f'lote c={concurrency:<4} {ok} tasks em {elapsed:6.2f}s  ({ok / elapsed:7.1f} tasks/s, '
+                f'{serial / elapsed:5.1f}x)'
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: capacidade de esperas simultâneas nos modos síncrono e assíncrono
+
+Cada "espera" cria uma task no mock e aguarda sua conclusão, como um
+run-task com wait_for_completion=true. No modo síncrono as esperas ocupam
+uma thread de um pool limitado (equivalente aos workers do servidor); no
+modo assíncrono cada espera é uma corrotina.
+
+Uso:
+    python -m benchmarks.bench_concurrent_waits --waiters 500 --workers 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_upstream import serve_in_thread, settings  # noqa: E402
+
+
+def _rss_kb() -> int:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _report(mode: str, latencies, wall: float, rss_delta_kb: int, waiters: int) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    print(
+        f'{mode:<6} esperas={waiters:<6} total={wall:7.2f}s '
+        f'p50={statistics.median(latencies):6.2f}s p99={p99:6.2f}s '
+        f'vazão={waiters / wall:8.1f} esperas/s '
+        f'RSS/espera={rss_delta_kb / waiters:6.1f} KB'
+    )
+
+
+def bench_sync(waiters: int, workers: int, poll_interval: float) -> None:
+    from app.api import BrowserUseAPI
+
+    client = BrowserUseAPI()
+
+    def one_wait() -> float:
+        start = time.perf_counter()
+        task_id = client.run_task({'task': 'benchmark'})['id']
+        client.wait_for_completion(task_id, poll_interval=poll_interval, timeout=3600)
+        return time.perf_counter() - start
+
+    rss_before = _rss_kb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(one_wait) for _ in range(waiters)]
+        rss_peak = _rss_kb()
+        latencies = [f.result() for f in futures]
+    _report('sync', latencies, time.perf_counter() - start, rss_peak - rss_before, waiters)
+
+
+def bench_async(waiters: int, poll_interval: float) -> None:
+    from app.asgi import AsyncBrowserUseAPI
+
+    async def run() -> None:
+        client = AsyncBrowserUseAPI()
+        rss_peak = 0
+
+        async def one_wait() -> float:
+            nonlocal rss_peak
+            start = time.perf_counter()
+            task_id = (await client.run_task({'task': 'benchmark'}))['id']
+            rss_peak = max(rss_peak, _rss_kb())
+            await client.wait_for_completion(task_id, poll_interval=poll_interval, timeout=3600)
+            return time.perf_counter() - start
+
+        rss_before = _rss_kb()
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one_wait() for _ in range(waiters)))
+        _report('async', latencies, time.perf_counter() - start, rss_peak - rss_before, waiters)
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--waiters', type=int, default=500, help='esperas simultâneas')
+    parser.add_argument('--workers', type=int, default=32, help='threads do modo síncrono')
+    parser.add_argument('--task-duration', type=float, default=3.0)
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--modes', default='sync,async')
+    args = parser.parse_args()
+
+    settings.task_duration = args.task_duration
+    server, base_url = serve_in_thread()
+    os.environ['BROWSER_USE_BASE_URL'] = base_url
+    os.environ.setdefault('BROWSER_USE_API_KEY', 'bench')
+
+    print(f'Mock em {base_url} (duração da task: {args.task_duration}s)')
+    try:
+        for mode in args.modes.split(','):
+            if mode == 'sync':
+                bench_sync(args.waiters, args.workers, args.poll_interval)
+            elif mode == 'async':
+                bench_async(args.waiters, args.poll_interval)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
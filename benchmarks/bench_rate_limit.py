@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rajada de leituras contra um upstream com cota (429 + Retry-After)
+
+O mock local aceita --quota req/s e responde 429 acima disso. Uma rajada de
+leituras de status é disparada por vários clientes, com polling em segundo
+plano ao mesmo tempo, em três configurações:
+
+    sem-controle   sem governor e sem novas tentativas (429 vira erro)
+    só-retry       novas tentativas com Retry-After, sem limite de taxa local
+    governor       token bucket local na cota do upstream + novas tentativas
+
+Uso:
+    python -m benchmarks.bench_rate_limit --quota 50 --reads 500 --clients 32
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_upstream import serve_in_thread, settings  # noqa: E402
+
+
+def _percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quota', type=float, default=50, help='req/s aceitas pelo mock')
+    parser.add_argument('--reads', type=int, default=500, help='leituras de usuários na rajada')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--pollers', type=int, default=8, help='loops de polling em segundo plano')
+    parser.add_argument('--latency', type=float, default=0.01)
+    args = parser.parse_args()
+
+    settings.latency = args.latency
+    settings.task_duration = 3600
+    settings.rate_limit = args.quota
+    server, base_url = serve_in_thread()
+    os.environ['BROWSER_USE_BASE_URL'] = base_url
+    os.environ.setdefault('BROWSER_USE_API_KEY', 'bench')
+
+    from app.api import BrowserUseAPI
+    from app.cache import NullCache
+    from app.config import Config
+    from app.ratelimit import UpstreamGovernor, background
+
+    scenarios = [
+        ('sem-controle', 0, UpstreamGovernor(rate=0, max_in_flight=10_000, class_limits={
+            'submit': 10_000, 'read': 10_000, 'poll': 10_000})),
+        ('só-retry', 5, UpstreamGovernor(rate=0, max_in_flight=10_000, class_limits={
+            'submit': 10_000, 'read': 10_000, 'poll': 10_000})),
+        ('governor', 5, UpstreamGovernor(rate=args.quota, burst=1)),
+    ]
+    try:
+        for name, retries, governor in scenarios:
+            Config.UPSTREAM_MAX_RETRIES = retries
+            client = BrowserUseAPI(cache=NullCache(), governor=governor)
+            requests.post(f'{base_url}/_mock/reset')
+            task_ids = [requests.post(f'{base_url}/run-task', json={'task': f'bench {n}'}).json()['id'] for n in range(20)]
+            time.sleep(1)  # cota cheia para todos os cenários
+
+            stop = threading.Event()
+
+            def poll_loop(n: int) -> None:
+                with background():
+                    while not stop.is_set():
+                        try:
+                            client.get_task_status(task_ids[n % len(task_ids)])
+                        except requests.exceptions.RequestException:
+                            pass
+                        stop.wait(0.2)
+
+            pollers = [threading.Thread(target=poll_loop, args=(n,), daemon=True) for n in range(args.pollers)]
+            for poller in pollers:
+                poller.start()
+
+            def one_read(n: int):
+                start = time.perf_counter()
+                try:
+                    client.get_task_status(task_ids[n % len(task_ids)])
+                    ok = True
+                except requests.exceptions.RequestException:
+                    ok = False
+                return time.perf_counter() - start, ok
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.clients) as pool:
+                results = list(pool.map(one_read, range(args.reads)))
+            wall = time.perf_counter() - start
+            stop.set()
+            for poller in pollers:
+                poller.join()
+
+            upstream = requests.get(f'{base_url}/_mock/stats').json()
+            latencies = [r[0] for r in results if r[1]]
+            ok = len(latencies)
+            print(
+                f'{name:<13} ok={ok:<5} erros={args.reads - ok:<5} {ok / wall:6.1f} leituras/s  '
+                f'p50={_percentile(latencies, 0.5) * 1000:7.1f}ms p99={_percentile(latencies, 0.99) * 1000:7.1f}ms  '
+                f'429 do upstream={upstream.get("throttled", 0)}'
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
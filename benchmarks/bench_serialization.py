@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: custo de CPU e bytes por resposta para payloads grandes de tasks
+
+Monta um payload no formato de GET /task/<id> com muitos steps e mede, por
+resposta, o tempo de CPU para decodificar o corpo do upstream e gerar a
+resposta do Flask em três modos:
+
+    stdlib      json da biblioteca padrão nos dois sentidos
+    orjson      orjson nos dois sentidos (re-serializa o objeto)
+    repasse     orjson na leitura e os bytes do upstream repassados sem mudança
+
+Em seguida mede o tamanho e o custo de CPU da compressão gzip/brotli.
+
+Uso:
+    python -m benchmarks.bench_serialization --steps 500 --iterations 200
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _task_payload(steps: int) -> dict:
+    return {
+        'id': 'task-bench',
+        'task': 'Pesquisar preços de passagens e montar uma tabela comparativa',
+        'status': 'finished',
+        'live_url': 'https://live.browser-use.com/task-bench',
+        'created_at': '2026-10-18T12:00:00Z',
+        'finished_at': '2026-10-18T12:04:10Z',
+        'output': 'Resumo final ' * 40,
+        'steps': [
+            {
+                'id': f'step-{n}',
+                'step': n,
+                'evaluation_previous_goal': 'Success - a página carregou e o elemento esperado está visível',
+                'next_goal': f'Clicar no resultado {n} e extrair preço, horário e companhia',
+                'url': f'https://www.example.com/search?q=voos&page={n}',
+                'actions': [
+                    {'click_element': {'index': n % 40, 'xpath': f'//div[@id="results"]/div[{n}]/a'}},
+                    {'extract_content': {'goal': 'preço e horário', 'include_links': False}},
+                ],
+                'duration': 1.234 + n / 1000,
+            }
+            for n in range(steps)
+        ],
+    }
+
+
+def _cpu_per_call(fn, iterations: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault('BROWSER_USE_API_KEY', 'bench')
+
+    import json
+
+    from flask import jsonify
+
+    from app import serialization
+    from app.api import app
+    from app.compression import brotli
+    from app.config import Config
+
+    if serialization.orjson is None:
+        print('orjson não instalado: os modos orjson/repasse usam a biblioteca padrão')
+
+    upstream_body = json.dumps(_task_payload(args.steps)).encode('utf-8')
+    print(f'payload do upstream: {args.steps} steps, {len(upstream_body) / 1024:.1f} KiB\n')
+
+    def respond(mode: str):
+        if mode == 'stdlib':
+            serialization.USE_ORJSON = False
+            data = serialization.loads(upstream_body)
+        else:
+            serialization.USE_ORJSON = serialization.orjson is not None
+            data = serialization.parse_upstream(upstream_body)
+            if mode == 'orjson':
+                data = dict(data)
+        return jsonify(data).get_data()
+
+    use_orjson = serialization.USE_ORJSON
+    body = b''
+    with app.test_request_context():
+        baseline = None
+        for mode in ('stdlib', 'orjson', 'repasse'):
+            cpu = _cpu_per_call(lambda: respond(mode), args.iterations)
+            body = respond(mode)
+            baseline = baseline or cpu
+            print(f'{mode:<8} {cpu * 1e6:9.1f} µs de CPU por resposta  ({baseline / cpu:4.1f}x)  {len(body):8d} bytes')
+    serialization.USE_ORJSON = use_orjson
+
+    print()
+    encoders = [
+        ('identity', lambda: body),
+        (f'gzip-{Config.COMPRESSION_GZIP_LEVEL}', lambda: gzip.compress(body, compresslevel=Config.COMPRESSION_GZIP_LEVEL)),
+    ]
+    if brotli is not None:
+        encoders.append((f'br-{Config.COMPRESSION_BROTLI_QUALITY}',
+                         lambda: brotli.compress(body, quality=Config.COMPRESSION_BROTLI_QUALITY)))
+    else:
+        print('brotli não instalado: apenas gzip')
+    for name, encode in encoders:
+        cpu = _cpu_per_call(encode, max(args.iterations // 4, 1))
+        size = len(encode())
+        print(f'{name:<10} {size:8d} bytes ({size / len(body):6.1%})  {cpu * 1e6:9.1f} µs de CPU por resposta')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: servidor de desenvolvimento do Flask x Gunicorn (gunicorn.conf.py)
+
+Sobe cada servidor como subprocesso apontando para o mock local do upstream
+e dispara requisições concorrentes em GET /api/v1/task/{task_id}/status e
+GET /api/v1/task/{task_id}, medindo vazão e latência (p50/p99).
+
+Uso:
+    python -m benchmarks.bench_server --requests 5000 --clients 64 --latency 0.02
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_upstream import serve_in_thread, settings  # noqa: E402
+
+
+def _wait_healthy(url: str, proc: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'servidor terminou com código {proc.returncode}')
+        try:
+            if requests.get(f'{url}/health', timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('servidor não respondeu /health a tempo')
+
+
+def _start(command, port: int, base_url: str, extra_env=None) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        'PORT': str(port),
+        'BROWSER_USE_BASE_URL': base_url,
+        'BROWSER_USE_API_KEY': env.get('BROWSER_USE_API_KEY', 'bench'),
+        'JOBS_AUTOSTART': 'False',
+        'GUNICORN_ACCESSLOG': '',
+        'GUNICORN_LOGLEVEL': 'warning',
+    })
+    env.update(extra_env or {})
+    return subprocess.Popen(
+        command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    if proc.poll() is not None:
+        return
+    os.killpg(proc.pid, signal.SIGTERM)
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def _load(url: str, task_ids, total: int, clients: int):
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_maxsize=clients))
+    paths = [f'/api/v1/task/{task_id}/status' for task_id in task_ids] + [f'/api/v1/task/{task_id}' for task_id in task_ids]
+
+    def one(n: int):
+        start = time.perf_counter()
+        try:
+            ok = session.get(url + paths[n % len(paths)], timeout=30).status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+    latencies = sorted(r[0] for r in results)
+    errors = sum(1 for r in results if not r[1])
+    return wall, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=64, help='clientes concorrentes')
+    parser.add_argument('--tasks', type=int, default=50, help='tasks distintas consultadas')
+    parser.add_argument('--latency', type=float, default=0.02, help='latência do upstream por chamada (s)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='WEB_CONCURRENCY do Gunicorn')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    settings.latency = args.latency
+    mock, base_url = serve_in_thread()
+    task_ids = [
+        requests.post(f'{base_url}/run-task', json={'task': f'benchmark {n}'}).json()['id']
+        for n in range(args.tasks)
+    ]
+
+    servers = [
+        ('flask-dev', [sys.executable, 'run_server.py'], {}),
+        ('gunicorn', ['gunicorn', '-c', 'gunicorn.conf.py'], {'WEB_CONCURRENCY': str(args.workers)}),
+    ]
+    url = f'http://127.0.0.1:{args.port}'
+    try:
+        for name, command, extra_env in servers:
+            proc = _start(command, args.port, base_url, extra_env)
+            try:
+                _wait_healthy(url, proc)
+                wall, latencies, errors = _load(url, task_ids, args.requests, args.clients)
+            finally:
+                _stop(proc)
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000
+            print(
+                f'{name:<10} {args.requests} req em {wall:6.2f}s  ({args.requests / wall:8.1f} req/s) '
+                f'p50={p50:7.1f}ms p99={p99:7.1f}ms erros={errors}'
+            )
+    finally:
+        mock.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rajada de leituras idênticas com e sem single-flight
+
+Simula o momento em que uma task termina e muitos clientes pedem os mesmos
+detalhes e o status ao mesmo tempo (cache ainda vazio). Conta quantas
+chamadas chegaram ao mock do upstream em cada modo, com threads e com
+corrotinas.
+
+Uso:
+    python -m benchmarks.bench_single_flight --clients 200 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_upstream import serve_in_thread, settings  # noqa: E402
+
+
+class _NoCoalescing:
+    """Executa cada chamada diretamente (comportamento sem single-flight)"""
+
+    def do(self, key, fn, operation='other'):
+        return fn()
+
+    async def ado(self, key, fn, operation='other'):
+        return await fn()
+
+
+def _upstream_calls(base_url: str) -> int:
+    return requests.get(f'{base_url}/_mock/stats').json().get('total', 0)
+
+
+def _bench_threads(client, task_id: str, clients: int) -> float:
+    barrier = threading.Barrier(clients)
+
+    def read(n: int) -> None:
+        barrier.wait()
+        if n % 2:
+            client.get_task(task_id)
+        else:
+            client.get_task_status(task_id)
+
+    threads = [threading.Thread(target=read, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+async def _bench_async(client, task_id: str, clients: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(client.get_task(task_id) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.1, help='latência do upstream por chamada (s)')
+    args = parser.parse_args()
+
+    settings.latency = args.latency
+    settings.task_duration = 0
+    server, base_url = serve_in_thread()
+    os.environ['BROWSER_USE_BASE_URL'] = base_url
+    os.environ.setdefault('BROWSER_USE_API_KEY', 'bench')
+    os.environ['UPSTREAM_READ_MAX_IN_FLIGHT'] = str(args.clients)
+    os.environ['UPSTREAM_MAX_IN_FLIGHT'] = str(args.clients)
+
+    from app.api import BrowserUseAPI
+    from app.asgi import AsyncBrowserUseAPI
+    from app.cache import ResponseCache
+
+    try:
+        for mode in ('sem', 'com'):
+            client = BrowserUseAPI(cache=ResponseCache())
+            if mode == 'sem':
+                client.single_flight = _NoCoalescing()
+            task_id = client.run_task({'task': 'benchmark'})['id']
+            before = _upstream_calls(base_url)
+            elapsed = _bench_threads(client, task_id, args.clients)
+            calls = _upstream_calls(base_url) - before
+            print(f'threads    {mode} single-flight: {args.clients} leituras -> {calls:4d} chamadas ao upstream em {elapsed:5.2f}s')
+
+        for mode in ('sem', 'com'):
+            client = AsyncBrowserUseAPI()
+            if mode == 'sem':
+                no_coalescing = _NoCoalescing()
+                client.single_flight.do = no_coalescing.ado
+            task_id = requests.post(f'{base_url}/run-task', json={'task': 'benchmark'}).json()['id']
+            before = _upstream_calls(base_url)
+            elapsed = asyncio.run(_bench_async(client, task_id, args.clients))
+            calls = _upstream_calls(base_url) - before
+            print(f'corrotinas {mode} single-flight: {args.clients} leituras -> {calls:4d} chamadas ao upstream em {elapsed:5.2f}s')
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
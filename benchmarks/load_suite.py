@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Suíte de carga ponta a ponta contra o mock local do upstream
+
+Sobe o mock (benchmarks.mock_upstream) em uma thread e a API como
+subprocesso (servidor de desenvolvimento, Gunicorn ou ASGI) apontando para
+ele. Para cada endpoint dispara requisições concorrentes e reporta vazão,
+latência p50/p99, erros e chamadas ao upstream por requisição e por task;
+para /wait mede também a memória (RSS) por waiter simultâneo.
+
+Os resultados podem ser gravados em JSON (--output) e comparados com uma
+execução anterior (--baseline) para detectar regressões.
+
+Uso:
+    python -m benchmarks.load_suite --server gunicorn --requests 2000 --clients 32
+    python -m benchmarks.load_suite --latency 0.05 --latency-distribution lognormal --error-rate 0.01 \\
+        --output atual.json --baseline anterior.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_server import _start, _stop, _wait_healthy  # noqa: E402
+from benchmarks.mock_upstream import serve_in_thread, settings  # noqa: E402
+
+# Endpoints de leitura: (nome, caminho a partir do id da task)
+READ_ENDPOINTS = [
+    ('task', '/api/v1/task/{task_id}'),
+    ('status', '/api/v1/task/{task_id}/status'),
+    ('task-projection', '/api/v1/task/{task_id}?fields=status,output&steps_limit=5'),
+    ('tasks', '/api/v1/tasks?limit=10'),
+    ('media', '/api/v1/task/{task_id}/media'),
+    ('screenshots', '/api/v1/task/{task_id}/screenshots'),
+    ('gif', '/api/v1/task/{task_id}/gif'),
+]
+
+SERVERS = {
+    'dev': ([sys.executable, 'run_server.py'], {}),
+    'gunicorn': (['gunicorn', '-c', 'gunicorn.conf.py'], {}),
+    'asgi': ([sys.executable, 'run_server.py'], {'SERVER_MODE': 'asgi'}),
+}
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """RSS do processo e de seus descendentes (workers do Gunicorn), lido de /proc"""
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+            for tid in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{tid}/children') as f:
+                    pending += [int(child) for child in f.read().split()]
+        except OSError:
+            if current == pid:
+                return None
+    return total
+
+
+def _upstream_calls(mock_url: str) -> int:
+    return requests.get(f'{mock_url}/_mock/stats').json().get('total', 0)
+
+
+def _session(clients: int) -> requests.Session:
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_maxsize=max(clients, 10)))
+    return session
+
+
+def _run(session: requests.Session, method: str, urls: List[str], clients: int,
+         body_for=None) -> Dict[str, Any]:
+    def one(n: int):
+        start = time.perf_counter()
+        try:
+            kwargs = {'json': body_for(n)} if body_for else {}
+            response = session.request(method, urls[n % len(urls)], timeout=60, **kwargs)
+            ok = response.status_code < 400
+            payload = response.json() if ok and method == 'POST' else None
+        except (requests.exceptions.RequestException, ValueError):
+            ok, payload = False, None
+        return time.perf_counter() - start, ok, payload
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(one, range(len(urls))))
+    wall = time.perf_counter() - start
+    latencies = [r[0] for r in results if r[1]]
+    return {
+        'requests': len(results),
+        'throughput': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50_ms': round(_percentile(latencies, 0.5) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+        'errors': len(results) - len(latencies),
+        'payloads': [r[2] for r in results if r[2]],
+    }
+
+
+def _measure(mock_url: str, task_count: int, fn) -> Dict[str, Any]:
+    before = _upstream_calls(mock_url)
+    result = fn()
+    calls = _upstream_calls(mock_url) - before
+    result['upstream_per_request'] = round(calls / result['requests'], 3) if result['requests'] else 0.0
+    result['upstream_per_task'] = round(calls / task_count, 2) if task_count else 0.0
+    return result
+
+
+def _wait_scenario(url: str, mock_url: str, proc, waiters: int, tasks: int, timeout: float) -> Dict[str, Any]:
+    """Waiters simultâneos em /wait: latência, chamadas ao upstream por task e memória por waiter"""
+    task_ids = [requests.post(f'{mock_url}/run-task', json={'task': f'wait {n}'}).json()['id'] for n in range(tasks)]
+    baseline_rss = _rss_bytes(proc.pid)
+    peak_rss = baseline_rss
+    results = []
+    lock = threading.Lock()
+
+    def wait(n: int) -> None:
+        start = time.perf_counter()
+        try:
+            ok = requests.get(f'{url}/api/v1/task/{task_ids[n % tasks]}/wait',
+                              params={'timeout': int(timeout)}, timeout=timeout + 30).status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        with lock:
+            results.append((time.perf_counter() - start, ok))
+
+    before = _upstream_calls(mock_url)
+    threads = [threading.Thread(target=wait, args=(n,), daemon=True) for n in range(waiters)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        rss = _rss_bytes(proc.pid)
+        if rss is not None and baseline_rss is not None:
+            peak_rss = max(peak_rss, rss)
+        time.sleep(0.1)
+    wall = time.perf_counter() - start
+    calls = _upstream_calls(mock_url) - before
+
+    latencies = [r[0] for r in results if r[1]]
+    memory = None
+    if baseline_rss is not None:
+        memory = round((peak_rss - baseline_rss) / waiters / 1024, 1)
+    return {
+        'requests': waiters,
+        'throughput': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50_ms': round(_percentile(latencies, 0.5) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+        'errors': waiters - len(latencies),
+        'upstream_per_request': round(calls / waiters, 3),
+        'upstream_per_task': round(calls / tasks, 2),
+        'kib_per_waiter': memory,
+    }
+
+
+def _print_row(name: str, result: Dict[str, Any]) -> None:
+    memory = result.get('kib_per_waiter')
+    print(
+        f'{name:<16} {result["requests"]:6d} {result["throughput"]:9.1f} {result["p50_ms"]:9.1f} '
+        f'{result["p99_ms"]:9.1f} {result["errors"]:6d} {result["upstream_per_request"]:10.3f} '
+        f'{result["upstream_per_task"]:10.2f}' + (f' {memory:10.1f}' if memory is not None else '')
+    )
+
+
+def _compare(results: Dict[str, Any], baseline_path: str, tolerance: float) -> int:
+    with open(baseline_path) as f:
+        baseline = json.load(f).get('results', {})
+    regressions = 0
+    print(f'\nComparação com {baseline_path} (tolerância {tolerance:.0%}):')
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        throughput = (current['throughput'] - previous['throughput']) / previous['throughput'] if previous['throughput'] else 0.0
+        p99 = (current['p99_ms'] - previous['p99_ms']) / previous['p99_ms'] if previous['p99_ms'] else 0.0
+        worse = throughput < -tolerance or p99 > tolerance
+        regressions += worse
+        print(f'{"⚠️ " if worse else "   "}{name:<16} vazão {throughput:+7.1%}   p99 {p99:+7.1%}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=sorted(SERVERS), default='gunicorn')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='WEB_CONCURRENCY do Gunicorn')
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--requests', type=int, default=2000, help='requisições por endpoint de leitura')
+    parser.add_argument('--submissions', type=int, default=200, help='requisições em run-task')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--waiters', type=int, default=200, help='waiters simultâneos em /wait')
+    parser.add_argument('--wait-tasks', type=int, default=20, help='tasks distintas aguardadas')
+    # Comportamento do upstream simulado
+    parser.add_argument('--task-duration', type=float, default=5.0)
+    parser.add_argument('--steps-per-second', type=float, default=2.0)
+    parser.add_argument('--step-bytes', type=int, default=512)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--latency-distribution', choices=('fixed', 'uniform', 'exponential', 'lognormal'),
+                        default='lognormal')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--output', help='grava os resultados em JSON')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparação')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='piora relativa aceita antes de acusar regressão')
+    args = parser.parse_args()
+
+    settings.task_duration = args.task_duration
+    settings.steps_per_second = args.steps_per_second
+    settings.step_bytes = args.step_bytes
+    settings.latency = args.latency
+    settings.latency_distribution = args.latency_distribution
+    settings.error_rate = args.error_rate
+    settings.throttle_rate = args.throttle_rate
+    mock, mock_url = serve_in_thread()
+
+    command, extra_env = SERVERS[args.server]
+    extra_env = {**extra_env, 'WEB_CONCURRENCY': str(args.workers)}
+    url = f'http://127.0.0.1:{args.port}'
+    proc = _start(command, args.port, mock_url, extra_env)
+    results: Dict[str, Any] = {}
+    try:
+        _wait_healthy(url, proc)
+        session = _session(args.clients)
+        print(f'servidor={args.server} clientes={args.clients} latência do upstream={args.latency}s '
+              f'({args.latency_distribution}) erros={args.error_rate:.1%} 429={args.throttle_rate:.1%}\n')
+        print(f'{"endpoint":<16} {"req":>6} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9} {"erros":>6} '
+              f'{"upstr/req":>10} {"upstr/task":>10} {"KiB/waiter":>10}')
+
+        submit = _measure(mock_url, args.submissions, lambda: _run(
+            session, 'POST', [f'{url}/api/v1/run-task'] * args.submissions, args.clients,
+            body_for=lambda n: {'task': f'carga {n}'},
+        ))
+        task_ids = [payload['task_id'] for payload in submit.pop('payloads') if 'task_id' in payload]
+        results['run-task'] = submit
+        _print_row('run-task', submit)
+        if not task_ids:
+            raise RuntimeError('nenhuma task criada; verifique o servidor')
+
+        for name, path in READ_ENDPOINTS:
+            urls = [url + path.format(task_id=task_ids[n % len(task_ids)]) for n in range(args.requests)]
+            result = _measure(mock_url, len(task_ids), lambda: _run(session, 'GET', urls, args.clients))
+            result.pop('payloads')
+            results[name] = result
+            _print_row(name, result)
+
+        result = _wait_scenario(url, mock_url, proc, args.waiters, args.wait_tasks,
+                                timeout=args.task_duration * 4 + 30)
+        results['wait'] = result
+        _print_row('wait', result)
+    finally:
+        _stop(proc)
+        mock.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'server': args.server, 'args': vars(args), 'results': results}, f, indent=2)
+    if args.baseline:
+        sys.exit(1 if _compare(results, args.baseline, args.tolerance) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Mock local da API Browser Use para benchmarks
+
+Cobre todas as rotas chamadas por BrowserUseAPI (/run-task, /task/<id>,
+/status, /stop, /pause, /resume, /tasks, /media, /screenshots, /gif), com
+latência configurável (fixa, uniforme, exponencial ou lognormal), steps que
+crescem com o tempo, tamanho de payload e taxas de erro e de 429. Com
+--per-key cada chave (header Authorization) é uma conta isolada: só vê as
+próprias tasks e tem a própria cota, como no upstream real.
+
+Uso:
+    python -m benchmarks.mock_upstream --port 8765 --task-duration 5
+    python -m benchmarks.mock_upstream --latency 0.05 --latency-distribution lognormal \\
+        --step-bytes 2048 --error-rate 0.01 --throttle-rate 0.02
+
+Aponte a aplicação para ele com BROWSER_USE_BASE_URL=http://127.0.0.1:8765
+"""
+
+import argparse
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+
+class MockSettings:
+    """Parâmetros do comportamento simulado do upstream"""
+
+    task_duration: float = 5.0
+    steps_per_second: float = 1.0
+    max_steps: int = 0
+    # Bytes extras de conteúdo por step e quantidade de screenshots por task
+    step_bytes: int = 0
+    screenshot_count: int = 3
+    # Latência por chamada: "fixed", "uniform" (± latency_spread), "exponential" (média) ou "lognormal" (mediana)
+    latency: float = 0.0
+    latency_distribution: str = 'fixed'
+    latency_spread: float = 0.5
+    latency_sigma: float = 0.5
+    # Falhas injetadas: fração das chamadas que recebe erro (error_status) ou 429 aleatório
+    error_rate: float = 0.0
+    error_status: int = 503
+    throttle_rate: float = 0.0
+    # Cotas como as do upstream real: acima delas responde 429 com Retry-After (0 = sem cota)
+    rate_limit: float = 0.0
+    max_concurrency: int = 0
+    retry_after: float = 1.0
+    # Contas isoladas por chave: tasks visíveis só para a chave que as criou e cotas separadas
+    per_key: bool = False
+
+
+settings = MockSettings()
+mock = Flask(__name__)
+
+_tasks = {}
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_rng = random.Random()
+calls = Counter()
+
+
+def _count(kind: str, task_id: str = None) -> None:
+    with _lock:
+        calls[kind] += 1
+        calls['total'] += 1
+        if task_id:
+            calls[f'task:{task_id}'] += 1
+
+
+_quotas = {}
+
+
+def _account() -> str:
+    return request.headers.get('Authorization', '') if settings.per_key else ''
+
+
+def _quota_for(account: str) -> dict:
+    quota = _quotas.get(account)
+    if quota is None:
+        quota = _quotas[account] = {'tokens': float('inf'), 'updated': time.monotonic(), 'in_flight': 0}
+    return quota
+
+
+def _error(status: int, detail: str):
+    response = jsonify({'detail': detail})
+    response.status_code = status
+    if status == 429:
+        response.headers['Retry-After'] = f'{settings.retry_after:g}'
+    return response
+
+
+@mock.before_request
+def _enforce_quota():
+    if request.path.startswith('/_'):
+        return None
+    with _lock:
+        if settings.error_rate and _rng.random() < settings.error_rate:
+            calls['injected_errors'] += 1
+            return _error(settings.error_status, 'Injected failure')
+        if settings.throttle_rate and _rng.random() < settings.throttle_rate:
+            calls['throttled'] += 1
+            return _error(429, 'Too Many Requests')
+        quota = _quota_for(_account())
+        now = time.monotonic()
+        if settings.rate_limit:
+            capacity = max(settings.rate_limit, 1.0)
+            quota['tokens'] = min(capacity, quota['tokens'] + (now - quota['updated']) * settings.rate_limit)
+        quota['updated'] = now
+        over_rate = settings.rate_limit and quota['tokens'] < 1
+        over_concurrency = settings.max_concurrency and quota['in_flight'] >= settings.max_concurrency
+        if over_rate or over_concurrency:
+            calls['throttled'] += 1
+            return _error(429, 'Too Many Requests')
+        if settings.rate_limit:
+            quota['tokens'] -= 1
+        quota['in_flight'] += 1
+        request.environ['mock.counted'] = quota
+    return None
+
+
+@mock.teardown_request
+def _release_quota(error=None):
+    quota = request.environ.pop('mock.counted', None)
+    if quota is not None:
+        with _lock:
+            quota['in_flight'] -= 1
+
+
+def _sample_latency() -> float:
+    base = settings.latency
+    if base <= 0:
+        return 0.0
+    distribution = settings.latency_distribution
+    with _lock:
+        if distribution == 'uniform':
+            spread = min(settings.latency_spread, 1.0)
+            return _rng.uniform(base * (1 - spread), base * (1 + spread))
+        if distribution == 'exponential':
+            return _rng.expovariate(1 / base)
+        if distribution == 'lognormal':
+            return _rng.lognormvariate(math.log(base), settings.latency_sigma)
+    return base
+
+
+def _simulate_latency() -> None:
+    delay = _sample_latency()
+    if delay:
+        time.sleep(delay)
+
+
+def _visible(task_id: str):
+    task = _tasks.get(task_id)
+    if task is None or (settings.per_key and task['owner'] != _account()):
+        return None
+    return task
+
+
+def _iso(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+def _snapshot(task_id: str):
+    task = _visible(task_id)
+    if task is None:
+        return None
+    elapsed = time.time() - task['started']
+    if task['status'] in ('stopped', 'paused'):
+        status = task['status']
+    elif elapsed >= settings.task_duration:
+        status = 'finished'
+    else:
+        status = 'running'
+    step_count = int(min(elapsed, settings.task_duration) * settings.steps_per_second)
+    if settings.max_steps:
+        step_count = min(step_count, settings.max_steps)
+    padding = 'x' * settings.step_bytes
+    return {
+        'id': task_id,
+        'task': task['task'],
+        'status': status,
+        'created_at': task['created_at'],
+        'finished_at': _iso(task['started'] + settings.task_duration) if status == 'finished' else None,
+        'output': f'Resultado simulado de {task_id}' if status == 'finished' else None,
+        'steps': [
+            {
+                'id': f'{task_id}-{n}', 'step': n, 'evaluation_previous_goal': 'ok', 'next_goal': f'passo {n}',
+                'url': f'https://example.com/page/{n}', 'memory': padding,
+            }
+            for n in range(step_count)
+        ],
+        'live_url': None,
+        'output_files': [],
+    }
+
+
+@mock.route('/run-task', methods=['POST'])
+def run_task():
+    _simulate_latency()
+    task_id = f'task_{next(_ids)}'
+    _count('run-task', task_id)
+    data = request.get_json(silent=True) or {}
+    with _lock:
+        _tasks[task_id] = {
+            'task': data.get('task', ''),
+            'status': 'running',
+            'started': time.time(),
+            'created_at': _iso(time.time()),
+            'owner': _account(),
+        }
+    return jsonify({'id': task_id})
+
+
+@mock.route('/task/<task_id>', methods=['GET'])
+def get_task(task_id):
+    _simulate_latency()
+    _count('task', task_id)
+    snapshot = _snapshot(task_id)
+    if snapshot is None:
+        return jsonify({'detail': 'Task not found'}), 404
+    return jsonify(snapshot)
+
+
+@mock.route('/task/<task_id>/status', methods=['GET'])
+def get_task_status(task_id):
+    _simulate_latency()
+    _count('status', task_id)
+    snapshot = _snapshot(task_id)
+    if snapshot is None:
+        return jsonify({'detail': 'Task not found'}), 404
+    return jsonify(snapshot['status'])
+
+
+@mock.route('/task/<task_id>/<action>', methods=['PUT'])
+def control_task(task_id, action):
+    _simulate_latency()
+    _count(action, task_id)
+    task = _visible(task_id)
+    if task is None or action not in ('stop', 'pause', 'resume'):
+        return jsonify({'detail': 'Not found'}), 404
+    task['status'] = {'stop': 'stopped', 'pause': 'paused', 'resume': 'running'}[action]
+    return jsonify({})
+
+
+@mock.route('/task/<task_id>/<kind>', methods=['GET'])
+def task_media(task_id, kind):
+    _simulate_latency()
+    _count(kind, task_id)
+    if _visible(task_id) is None or kind not in ('media', 'screenshots', 'gif'):
+        return jsonify({'detail': 'Not found'}), 404
+    if kind == 'gif':
+        return jsonify({'gif': f'https://example.com/{task_id}.gif'})
+    return jsonify({'recordings' if kind == 'media' else 'screenshots': [
+        f'https://example.com/{task_id}/{n}.png' for n in range(settings.screenshot_count)
+    ]})
+
+
+@mock.route('/tasks', methods=['GET'])
+def list_tasks():
+    _simulate_latency()
+    _count('tasks')
+    limit = request.args.get('limit', 10, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    visible = [task_id for task_id in _tasks if _visible(task_id) is not None]
+    ids = sorted(visible, key=lambda t: _tasks[t]['started'], reverse=True)[offset:offset + limit]
+    items = []
+    for task_id in ids:
+        snapshot = _snapshot(task_id)
+        snapshot.pop('steps')
+        items.append(snapshot)
+    return jsonify({'tasks': items, 'total': len(visible)})
+
+
+_sink = []
+
+
+@mock.route('/_sink', methods=['POST'])
+def sink_receive():
+    """Receptor local de callbacks (webhooks); ?status=<código> simula um receptor que recusa a entrega"""
+    with _lock:
+        _sink.append({'headers': dict(request.headers), 'body': request.get_json(silent=True), 'at': time.time()})
+    return jsonify({'received': True}), request.args.get('status', 200, type=int)
+
+
+@mock.route('/_sink', methods=['GET'])
+def sink_list():
+    with _lock:
+        return jsonify(_sink)
+
+
+@mock.route('/_mock/stats', methods=['GET'])
+def stats():
+    with _lock:
+        return jsonify(dict(calls))
+
+
+@mock.route('/_mock/settings', methods=['GET', 'POST'])
+def mock_settings():
+    """Consulta ou altera os parâmetros da simulação em tempo de execução"""
+    names = [name for name in vars(MockSettings) if not name.startswith('_')]
+    if request.method == 'POST':
+        for name, value in (request.get_json(silent=True) or {}).items():
+            if name in names:
+                setattr(settings, name, type(getattr(MockSettings, name))(value))
+    return jsonify({name: getattr(settings, name) for name in names})
+
+
+@mock.route('/_mock/reset', methods=['POST'])
+def reset():
+    with _lock:
+        calls.clear()
+        _tasks.clear()
+        _sink.clear()
+        _quotas.clear()
+    return jsonify({})
+
+
+def serve_in_thread(port: int = 0):
+    """Inicia o mock em uma thread; retorna (servidor, url_base)"""
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', port, mock, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock local da API Browser Use')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--task-duration', type=float, default=settings.task_duration)
+    parser.add_argument('--steps-per-second', type=float, default=settings.steps_per_second)
+    parser.add_argument('--max-steps', type=int, default=settings.max_steps, help='limite de steps por task (0 = sem limite)')
+    parser.add_argument('--step-bytes', type=int, default=settings.step_bytes, help='bytes extras de conteúdo por step')
+    parser.add_argument('--screenshot-count', type=int, default=settings.screenshot_count)
+    parser.add_argument('--latency', type=float, default=settings.latency)
+    parser.add_argument('--latency-distribution', choices=('fixed', 'uniform', 'exponential', 'lognormal'),
+                        default=settings.latency_distribution)
+    parser.add_argument('--latency-spread', type=float, default=settings.latency_spread, help='fração ± da distribuição uniforme')
+    parser.add_argument('--latency-sigma', type=float, default=settings.latency_sigma, help='sigma da lognormal')
+    parser.add_argument('--error-rate', type=float, default=settings.error_rate, help='fração de chamadas com erro')
+    parser.add_argument('--error-status', type=int, default=settings.error_status)
+    parser.add_argument('--throttle-rate', type=float, default=settings.throttle_rate, help='fração de chamadas com 429')
+    parser.add_argument('--seed', type=int, default=None, help='semente das distribuições aleatórias')
+    parser.add_argument('--rate-limit', type=float, default=settings.rate_limit, help='req/s aceitas (0 = sem cota)')
+    parser.add_argument('--max-concurrency', type=int, default=settings.max_concurrency)
+    parser.add_argument('--retry-after', type=float, default=settings.retry_after)
+    parser.add_argument('--per-key', action='store_true', help='cada chave é uma conta isolada, com cota própria')
+    args = parser.parse_args()
+
+    settings.task_duration = args.task_duration
+    settings.steps_per_second = args.steps_per_second
+    settings.max_steps = args.max_steps
+    settings.step_bytes = args.step_bytes
+    settings.screenshot_count = args.screenshot_count
+    settings.latency = args.latency
+    settings.latency_distribution = args.latency_distribution
+    settings.latency_spread = args.latency_spread
+    settings.latency_sigma = args.latency_sigma
+    settings.error_rate = args.error_rate
+    settings.error_status = args.error_status
+    settings.throttle_rate = args.throttle_rate
+    if args.seed is not None:
+        _rng.seed(args.seed)
+    settings.rate_limit = args.rate_limit
+    settings.max_concurrency = args.max_concurrency
+    settings.retry_after = args.retry_after
+    settings.per_key = args.per_key
+
+    print(f'🧪 Mock Browser Use em http://127.0.0.1:{args.port}')
+    mock.run(host='127.0.0.1', port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
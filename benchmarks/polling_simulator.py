@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Simulador de estratégias de polling
+
+Gera uma população de tasks com durações e ritmo de steps realistas e
+reproduz, em tempo simulado, o polling de cada estratégia. Reporta chamadas
+ao upstream por task, bytes recebidos por task e latência de detecção da
+conclusão (tempo entre o fim real da task e o tick que a observa).
+
+Uso:
+    python -m benchmarks.polling_simulator --tasks 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('BROWSER_USE_API_KEY', 'simulator')
+
+from app.polling import AdaptiveBackoff, FixedInterval, advance_marker  # noqa: E402
+
+# Tamanhos aproximados das respostas do upstream
+STATUS_BYTES = 16
+TASK_BASE_BYTES = 1200
+STEP_BYTES = 900
+
+
+def generate_tasks(count: int, median_duration: float, seed: int):
+    """Durações log-normais (cauda longa) e steps em processo de Poisson"""
+    rng = random.Random(seed)
+    tasks = []
+    for _ in range(count):
+        duration = rng.lognormvariate(0, 0.9) * median_duration
+        step_times, t = [], 0.0
+        while True:
+            t += rng.expovariate(1 / 6.0)
+            if t >= duration:
+                break
+            step_times.append(t)
+        tasks.append((duration, step_times))
+    return tasks
+
+
+def simulate(strategy_factory, tasks):
+    calls, transferred, latencies = [], [], []
+    for duration, step_times in tasks:
+        strategy = strategy_factory()
+        t, task_calls, task_bytes = 0.0, 0, 0
+        last_marker = None
+        while True:
+            task_calls += 1
+            steps = sum(1 for s in step_times if s <= t)
+            finished = t >= duration
+            full = strategy.next_endpoint() == 'task'
+            if full:
+                task_bytes += TASK_BASE_BYTES + STEP_BYTES * steps
+            else:
+                task_bytes += STATUS_BYTES
+            if finished:
+                if not full:
+                    # Busca única dos detalhes completos ao final
+                    task_calls += 1
+                    task_bytes += TASK_BASE_BYTES + STEP_BYTES * len(step_times)
+                latencies.append(t - duration)
+                break
+            payload = {'status': 'running', 'steps': [None] * steps} if full else 'running'
+            last_marker, progressed = advance_marker(last_marker, payload)
+            t += strategy.next_delay(progressed)
+        calls.append(task_calls)
+        transferred.append(task_bytes)
+    return calls, transferred, latencies
+
+
+def _p(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=2000)
+    parser.add_argument('--median-duration', type=float, default=90.0, help='duração mediana das tasks (s)')
+    parser.add_argument('--fixed-interval', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tasks = generate_tasks(args.tasks, args.median_duration, args.seed)
+    rng = random.Random(args.seed)
+    strategies = {
+        f'fixed {args.fixed_interval:g}s + task (original)': lambda: FixedInterval(args.fixed_interval, tick_endpoint='task'),
+        f'fixed {args.fixed_interval:g}s + status': lambda: FixedInterval(args.fixed_interval, tick_endpoint='status'),
+        'adaptive + task': lambda: AdaptiveBackoff(tick_endpoint='task', rng=rng),
+        'adaptive + status (sem steps)': lambda: AdaptiveBackoff(tick_endpoint='status', progress_every=0, rng=rng),
+        'adaptive + status': lambda: AdaptiveBackoff(tick_endpoint='status', rng=rng),
+    }
+
+    print(f'{args.tasks} tasks simuladas, duração mediana {args.median_duration:g}s\n')
+    print(f'{"estratégia":<32} {"chamadas/task":>14} {"KB/task":>10} {"redução":>14} {"detecção p50":>13} {"p99":>8}')
+    baseline = None
+    for name, factory in strategies.items():
+        calls, transferred, latencies = simulate(factory, tasks)
+        mean_calls, mean_bytes = statistics.mean(calls), statistics.mean(transferred)
+        # Redução de chamadas e de bytes em relação à primeira estratégia (polling original)
+        baseline = baseline or (mean_calls, mean_bytes)
+        reduction = f'{baseline[0] / mean_calls:.1f}x / {baseline[1] / mean_bytes:.0f}x'
+        print(
+            f'{name:<32} {mean_calls:14.1f} {mean_bytes / 1024:10.1f} {reduction:>14} '
+            f'{_p(latencies, 0.5):12.2f}s {_p(latencies, 0.99):7.2f}s'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Configuração de produção do Gunicorn para a API Browser Use
+
+Uso:
+    gunicorn -c gunicorn.conf.py
+
+Todas as opções podem ser ajustadas por variáveis de ambiente (veja DEPLOY.md).
+"""
+import multiprocessing
+import os
+
+from app.config import Config
+
+# Aplicação: WSGI (Flask) por padrão; SERVER_MODE=asgi usa workers uvicorn
+if Config.SERVER_MODE == 'asgi':
+    wsgi_app = 'app.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'app.api:app'
+    worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', 5000)}")
+
+# Processos derivados do número de CPUs; threads por processo no modo gthread
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Carrega app.api antes do fork: imports e configuração são compartilhados (copy-on-write)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Reciclagem de workers para conter crescimento de memória
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+# Desligamento gracioso: espera as requisições /wait em andamento terminarem
+timeout = int(os.getenv('GUNICORN_TIMEOUT', Config.DEFAULT_TIMEOUT + 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', Config.DEFAULT_TIMEOUT + 10))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-') or None  # vazio desativa
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Inicia, em cada worker, as threads de segundo plano (não sobrevivem ao fork)"""
+    from app.api import job_queue, profiler, task_index
+    if Config.JOBS_AUTOSTART:
+        job_queue.start()
+    task_index.start()
+    profiler.start()
+
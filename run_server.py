@@ -1,19 +1,29 @@
 #!/usr/bin/env python3
 """
 Script para iniciar o servidor da API
+
+    python run_server.py               # servidor de desenvolvimento (processo único)
+    python run_server.py --production  # Gunicorn multi-processo (gunicorn.conf.py)
 """
 
 import os
 import sys
-from app.api import app
+from app.api import app, job_queue, profiler, task_index
+from app.config import Config
 
 if __name__ == '__main__':
+    if '--production' in sys.argv[1:]:
+        # Substitui este processo pelo Gunicorn para que ele receba os sinais diretamente
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+        os.execvp('gunicorn', ['gunicorn', '-c', config_path])
+    
     port = int(os.getenv('PORT', 9000))
     debug = os.getenv('DEBUG', 'False').lower() == 'true'
     
     print(f"🚀 Iniciando API Browser Use Wrapper na porta {port}")
     print(f"📍 URL: http://localhost:{port}")
     print(f"🔧 Debug mode: {debug}")
+    print(f"⚙️  Modo de servidor: {Config.SERVER_MODE}")
     print("📋 Endpoints disponíveis:")
     print("   GET  /health")
     print("   POST /api/v1/run-task")
@@ -22,8 +32,21 @@ if __name__ == '__main__':
     print("   ... e mais (veja README.md)")
     print("\n✋ Pressione Ctrl+C para parar o servidor\n")
     
+    if Config.JOBS_AUTOSTART:
+        # Retoma jobs pendentes deixados por uma execução anterior
+        job_queue.start()
+    # Sincronização do índice local de tasks (apenas com TASK_INDEX_ENABLED)
+    task_index.start()
+    # Observa os disparos do profiler sob demanda (apenas com PROFILER_ENABLED)
+    profiler.start()
+    
     try:
-        app.run(host='0.0.0.0', port=port, debug=debug)
+        if Config.SERVER_MODE == 'asgi':
+            # Esperas longas viram corrotinas; requer uvicorn
+            import uvicorn
+            uvicorn.run('app.asgi:application', host='0.0.0.0', port=port)
+        else:
+            app.run(host='0.0.0.0', port=port, debug=debug)
     except KeyboardInterrupt:
         print("\n👋 Servidor parado pelo usuário")
     except Exception as e:
@@ -45,6 +45,23 @@ def test_run_task_validation():
         print(f"❌ Erro no teste de validação: {e}")
         return False
 
+def test_run_tasks_validation():
+    """Testa validação do endpoint de submissão em lote"""
+    print("\n🔍 Testando validação do endpoint run-tasks...")
+    try:
+        # Teste com lote vazio
+        response = requests.post(f"{BASE_URL}/api/v1/run-tasks", json=[])
+        if response.status_code == 400:
+            print("✅ Validação do lote funcionando corretamente")
+            print(f"   Resposta: {response.json()}")
+            return True
+        else:
+            print(f"❌ Validação do lote não funcionou: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Erro no teste de validação do lote: {e}")
+        return False
+
 def test_run_task_mock():
     """Testa o endpoint run-task com uma task simples (sem aguardar conclusão)"""
     print("\n🔍 Testando endpoint run-task (modo assíncrono)...")
@@ -105,6 +122,7 @@ def main():
     
     # Teste 2: Validação
     test_run_task_validation()
+    test_run_tasks_validation()
     
     # Teste 3: Run Task (assíncrono)
     task_id = test_run_task_mock()
@@ -0,0 +1,97 @@
+"""
+Configuração dos testes: mock local do upstream e arquivos em diretório temporário
+
+A configuração do app é lida na importação: as variáveis de ambiente são
+definidas aqui, antes de qualquer import de `app`, e apontam o cliente para o
+mock de benchmarks/mock_upstream.py rodando em uma thread.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import mock_upstream  # noqa: E402
+
+_server, MOCK_URL = mock_upstream.serve_in_thread()
+DATA_DIR = tempfile.mkdtemp(prefix='browser-use-tests-')
+
+os.environ.update({
+    'BROWSER_USE_API_KEY': 'test-key',
+    'BROWSER_USE_BASE_URL': MOCK_URL,
+    'JOBS_AUTOSTART': 'False',
+    'JOBS_DB_PATH': os.path.join(DATA_DIR, 'jobs.db'),
+    'CREDENTIALS_DB_PATH': os.path.join(DATA_DIR, 'credentials.db'),
+    'IDEMPOTENCY_DB_PATH': os.path.join(DATA_DIR, 'idempotency.db'),
+    'TASK_INDEX_DB_PATH': os.path.join(DATA_DIR, 'tasks.db'),
+    'COORDINATION_DB_PATH': os.path.join(DATA_DIR, 'coordination.db'),
+    'PROFILER_DIR': os.path.join(DATA_DIR, 'profiler'),
+    'ARTIFACTS_DIR': os.path.join(DATA_DIR, 'artifacts'),
+    'UPSTREAM_RETRY_DELAY': '0.01',
+    'UPSTREAM_RETRY_JITTER': '0',
+    'POLL_INITIAL_INTERVAL': '0.05',
+    'POLL_MAX_INTERVAL': '0.2',
+    'POLL_JITTER': '0',
+})
+
+
+class Mock:
+    """Acesso ao mock do upstream: parâmetros da simulação e chamadas recebidas"""
+
+    url = MOCK_URL
+    settings = mock_upstream.settings
+
+    @staticmethod
+    def calls(kind: str = 'total') -> int:
+        return requests.get(f'{MOCK_URL}/_mock/stats').json().get(kind, 0)
+
+    @staticmethod
+    def sink():
+        return requests.get(f'{MOCK_URL}/_sink').json()
+
+    @staticmethod
+    def create_task(task: str = 'teste') -> str:
+        return requests.post(f'{MOCK_URL}/run-task', json={'task': task}).json()['id']
+
+
+@pytest.fixture(autouse=True)
+def mock():
+    """Mock limpo e com os parâmetros padrão em cada teste"""
+    requests.post(f'{MOCK_URL}/_mock/reset')
+    for name, value in vars(mock_upstream.MockSettings).items():
+        if not name.startswith('_'):
+            setattr(mock_upstream.settings, name, value)
+    yield Mock
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    """Circuitos, governor e cache compartilhados não passam de um teste para outro"""
+    from app import cache, circuit, ratelimit
+
+    circuit._reset_after_fork()
+    ratelimit._reset_after_fork()
+    cache._cache = None
+    yield
+
+
+@pytest.fixture
+def client():
+    """Cliente síncrono novo (sem tasks finalizadas, single-flight ou respostas velhas de outros testes)"""
+    from app.api import BrowserUseAPI
+
+    return BrowserUseAPI()
+
+
+@pytest.fixture
+def app_client(monkeypatch):
+    """Cliente de teste do Flask com o cliente global do upstream zerado"""
+    from app import api
+
+    monkeypatch.setattr(api, 'browser_api', api.BrowserUseAPI())
+    monkeypatch.setattr(api.task_poller, 'client', api.browser_api)
+    return api.app.test_client()
@@ -0,0 +1,95 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import api
+from app.artifacts import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, app_client):
+    store = ArtifactStore(str(tmp_path / 'artifacts'), enabled=True)
+    monkeypatch.setattr(api, 'artifact_store', store)
+    api.browser_api.artifacts = store
+    return store
+
+
+def _read_concurrently(app_client, path, readers=6):
+    with ThreadPoolExecutor(readers) as pool:
+        return list(pool.map(lambda _: app_client.get(path, buffered=True), range(readers)))
+
+
+def test_running_task_artifact_is_streamed_through(mock, app_client):
+    mock.settings.latency = 0.05
+    task_id = mock.create_task()
+    responses = _read_concurrently(app_client, f'/api/v1/task/{task_id}/screenshots')
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.get_data() for response in responses}) == 1
+    assert 'X-Artifact-Source' not in responses[0].headers
+    # Sem corpo em memória para compartilhar: cada leitor tem o seu repasse
+    assert mock.calls('screenshots') == len(responses)
+    assert api.browser_api.governor.stats()['in_flight']['read'] == 0
+
+
+def test_finished_task_artifact_is_stored_without_prior_details(mock, app_client, store):
+    mock.settings.task_duration = 0.05
+    task_id = mock.create_task()
+    time.sleep(0.1)
+    for _ in range(5):
+        response = app_client.get(f'/api/v1/task/{task_id}/screenshots')
+        assert response.status_code == 200
+    assert mock.calls('screenshots') == 1
+    assert mock.calls('status') == 1
+
+
+def test_finished_task_artifact_is_downloaded_once_and_served_from_disk(mock, app_client, store):
+    mock.settings.task_duration = 0.05
+    mock.settings.latency = 0.05
+    task_id = mock.create_task()
+    time.sleep(0.1)
+    api.browser_api.get_task(task_id)
+
+    responses = _read_concurrently(app_client, f'/api/v1/task/{task_id}/gif')
+    assert {response.status_code for response in responses} == {200}
+    assert mock.calls('gif') == 1
+
+    again = app_client.get(f'/api/v1/task/{task_id}/gif')
+    assert again.headers['X-Artifact-Source'] == 'disk'
+    assert again.get_data() == responses[0].get_data()
+    assert mock.calls('gif') == 1
+
+    partial = app_client.get(f'/api/v1/task/{task_id}/gif', headers={'Range': 'bytes=0-3'})
+    assert partial.status_code == 206 and partial.get_data() == again.get_data()[:4]
+
+
+def test_weak_etag_is_kept_verbatim(store):
+    headers = {'Content-Type': 'application/json', 'ETag': 'W/"abc"', 'Content-Length': '2'}
+    meta = store.store('task_1', 'media', headers, [b'{}'])
+    assert meta['etag'] == 'W/"abc"'
+    with api.app.test_request_context(headers={'If-None-Match': 'W/"abc"'}):
+        response = store.serve(meta)
+        assert response.headers['ETag'] == 'W/"abc"'
+        assert response.status_code == 304
+
+
+def test_sweep_removes_least_recently_read_over_limit(tmp_path):
+    store = ArtifactStore(str(tmp_path), enabled=True, max_total_bytes=250, max_age=0)
+    now = time.time()
+    for n in range(3):
+        meta = store.store(f'task_{n}', 'gif', {}, [b'x' * 100])
+        os.utime(meta['path'], (now - 100 + n, now - 100 + n))
+    assert store.sweep() == 1
+    assert store.lookup('task_0', 'gif') is None
+    assert store.lookup('task_1', 'gif') is not None and store.lookup('task_2', 'gif') is not None
+
+
+def test_sweep_removes_expired(tmp_path):
+    store = ArtifactStore(str(tmp_path), enabled=True, max_age=60)
+    old = store.store('task_old', 'gif', {}, [b'x'])
+    store.store('task_new', 'gif', {}, [b'x'])
+    os.utime(old['path'], (time.time() - 120, time.time() - 120))
+    assert store.sweep() == 1
+    assert store.lookup('task_old', 'gif') is None
+    assert store.lookup('task_new', 'gif') is not None
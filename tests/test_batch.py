@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.mark.parametrize('body, content_type', [
+    ('[{"task": "teste"}', 'application/json'),
+    ('{"task": "teste"}\n{"task": ', 'application/x-ndjson'),
+    (b'\xff\xfe', 'application/x-ndjson'),
+    ('[{"task": "teste"}]', 'text/plain'),
+])
+def test_malformed_batch_is_rejected(mock, app_client, body, content_type):
+    response = app_client.post('/api/v1/run-tasks', data=body, content_type=content_type)
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Lote inválido')
+    assert mock.calls('run-task') == 0
+
+
+def test_batch_streams_one_line_per_item(mock, app_client):
+    response = app_client.post('/api/v1/run-tasks', data='{"task": "a"}\n{"task": "b"}\n',
+                               content_type='application/x-ndjson', buffered=True)
+    lines = [line for line in response.get_data(as_text=True).splitlines() if line]
+    assert response.status_code == 200
+    assert len(lines) == 2
+    assert mock.calls('run-task') == 2
@@ -0,0 +1,43 @@
+import time
+
+from app.cache import ResponseCache
+
+
+def test_expires_entries_by_ttl():
+    cache = ResponseCache(max_entries=10, max_bytes=10_000)
+    cache.set('a', {'status': 'running'}, ttl=0.05)
+    cache.set('b', {'status': 'finished'}, ttl=None)
+    assert cache.get('a') == {'status': 'running'}
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    assert cache.get('b') == {'status': 'finished'}
+    assert cache.stats()['expirations'] == 1
+
+
+def test_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, max_bytes=10_000)
+    cache.set('a', 1, None)
+    cache.set('b', 2, None)
+    cache.get('a')
+    cache.set('c', 3, None)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_respects_byte_limit():
+    cache = ResponseCache(max_entries=100, max_bytes=100)
+    cache.set('big', 'x' * 200, None)
+    assert cache.get('big') is None
+    for n in range(10):
+        cache.set(str(n), 'x' * 30, None)
+    assert cache.stats()['bytes'] <= 100
+
+
+def test_get_task_reuses_cached_details(mock, client):
+    task_id = mock.create_task()
+    client.get_task(task_id)
+    client.get_task(task_id)
+    assert mock.calls('task') == 1
+    client.get_task(task_id, use_cache=False)
+    assert mock.calls('task') == 2
@@ -0,0 +1,153 @@
+import time
+
+import pytest
+import requests
+
+from app.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, is_failure
+
+
+def _breaker(**kwargs):
+    return CircuitBreaker('read', **{'failure_threshold': 2, 'open_seconds': 0.05, 'half_open_probes': 1, **kwargs})
+
+
+def _fail(breaker):
+    probe = breaker.allow()
+    breaker.record(True, probe)
+
+
+def test_opens_after_consecutive_failures():
+    breaker = _breaker()
+    _fail(breaker)
+    assert breaker.state == CLOSED
+    _fail(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen) as excinfo:
+        breaker.allow()
+    assert excinfo.value.retry_after >= 1
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_success_resets_failure_count():
+    breaker = _breaker()
+    _fail(breaker)
+    breaker.record(False, breaker.allow())
+    _fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_late_success_does_not_close_open_circuit():
+    breaker = _breaker(open_seconds=10)
+    slow_call = breaker.allow()
+    _fail(breaker)
+    _fail(breaker)
+    assert breaker.state == OPEN
+    # Chamada autorizada antes da abertura termina bem depois dela
+    breaker.record(False, slow_call)
+    assert breaker.state == OPEN
+
+
+def test_half_open_admits_limited_probes_and_closes_on_success():
+    breaker = _breaker()
+    _fail(breaker)
+    _fail(breaker)
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    probe = breaker.allow()
+    assert probe
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    breaker.record(False, probe)
+    assert breaker.state == CLOSED
+    assert not breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = _breaker()
+    _fail(breaker)
+    _fail(breaker)
+    time.sleep(0.06)
+    probe = breaker.allow()
+    breaker.record(True, probe)
+    assert breaker.state == OPEN
+    assert breaker.stats()['opened'] == 2
+
+
+def test_late_failure_does_not_reopen_half_open():
+    breaker = _breaker()
+    slow_call = breaker.allow()
+    _fail(breaker)
+    _fail(breaker)
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    breaker.record(True, slow_call)
+    assert breaker.state == HALF_OPEN
+    # A vaga de teste continua disponível
+    assert breaker.allow()
+
+
+def test_late_success_does_not_close_half_open():
+    breaker = _breaker()
+    slow_call = breaker.allow()
+    _fail(breaker)
+    _fail(breaker)
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    probe = breaker.allow()
+    # Chamada comum autorizada antes da abertura termina bem durante o teste
+    breaker.record(False, slow_call)
+    assert breaker.state == HALF_OPEN
+    breaker.record(False, probe)
+    assert breaker.state == CLOSED
+
+
+def test_probe_from_previous_half_open_does_not_decide():
+    breaker = _breaker(half_open_probes=2)
+    _fail(breaker)
+    _fail(breaker)
+    time.sleep(0.06)
+    stale_probe = breaker.allow()
+    _fail(breaker)
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    probe = breaker.allow()
+    breaker.allow()
+    # O teste da abertura anterior termina agora: nem fecha o circuito nem libera a vaga atual
+    breaker.record(False, stale_probe)
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    breaker.record(False, probe)
+    assert breaker.state == CLOSED
+
+
+def test_probe_without_result_frees_the_slot():
+    breaker = _breaker()
+    _fail(breaker)
+    _fail(breaker)
+    time.sleep(0.06)
+    breaker.record(None, breaker.allow())
+    assert breaker.allow()
+
+
+def test_failure_classification():
+    assert is_failure(requests.exceptions.ConnectTimeout())
+    assert is_failure(requests.exceptions.ReadTimeout())
+    assert is_failure(status_code=503)
+    assert not is_failure(status_code=404)
+    assert not is_failure(status_code=429)
+
+
+def test_open_circuit_fails_fast(mock, client, monkeypatch):
+    from app.config import Config
+
+    monkeypatch.setattr(Config, 'UPSTREAM_MAX_RETRIES', 0)
+    task_id = mock.create_task()
+    mock.settings.error_rate = 1.0
+    for _ in range(Config.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(requests.exceptions.RequestException):
+            client.get_task(task_id)
+    calls = mock.calls('task')
+    with pytest.raises(CircuitOpen):
+        client.get_task(task_id)
+    assert mock.calls('task') == calls
@@ -0,0 +1,10 @@
+from app.config import Config
+from app.credentials import CredentialPool
+
+
+def test_headers_use_pool_default_key(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'BROWSER_USE_API_KEY', None)
+    monkeypatch.setattr(Config, 'BROWSER_USE_API_KEYS', ['chave-a', 'chave-b'])
+    assert Config.get_headers() == {'Authorization': 'Bearer chave-a'}
+    pool = CredentialPool(path=str(tmp_path / 'credentials.db'))
+    assert Config.get_headers() == pool.default.headers
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from app.api import TaskPoller
+from app.config import Config
+from app.coordination import SQLiteCoordinator
+
+
+@pytest.fixture
+def coordinators(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'COORDINATION_LEASE_TTL', 0.15)
+    monkeypatch.setattr(Config, 'COORDINATION_FOLLOW_INTERVAL', 0.05)
+    # Espera entre consultas bem maior que o lease: a líder renova durante a espera
+    monkeypatch.setattr(Config, 'POLL_INITIAL_INTERVAL', 2.0)
+    monkeypatch.setattr(Config, 'POLL_MAX_INTERVAL', 2.0)
+    path = str(tmp_path / 'coordination.db')
+    return SQLiteCoordinator(path), SQLiteCoordinator(path)
+
+
+def _upstream_polls(mock):
+    return mock.calls('status') + mock.calls('task')
+
+
+def test_lost_lease_stops_polling_and_follows_new_leader(mock, client, coordinators):
+    mine, other = coordinators
+    mock.settings.task_duration = 30
+    task_id = mock.create_task()
+    poller = TaskPoller(client, coordinator=mine)
+    future = poller.watch(task_id)
+    deadline = time.time() + 2
+    while poller._watches[task_id].role != 'leader' and time.time() < deadline:
+        time.sleep(0.01)
+
+    # Outra réplica assume o lease (ex.: esta ficou parada além do TTL)
+    other._conn().execute('UPDATE leases SET owner = ?, expires_at = ? WHERE task_id = ?',
+                          (other.owner, time.time() + 60, task_id))
+    deadline = time.time() + 0.5
+    while poller._watches[task_id].role != 'follower' and time.time() < deadline:
+        time.sleep(0.01)
+    assert poller._watches[task_id].role == 'follower'
+
+    polls = _upstream_polls(mock)
+    time.sleep(0.3)
+    assert _upstream_polls(mock) == polls
+
+    other.publish(task_id, {'status': 'finished', 'result': {'id': task_id, 'status': 'finished'}})
+    assert future.result(timeout=2)['status'] == 'finished'
+    assert _upstream_polls(mock) == polls
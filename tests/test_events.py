@@ -0,0 +1,63 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _ndjson(body: bytes):
+    return [json.loads(line) for line in body.decode('utf-8').splitlines() if line]
+
+
+def test_streams_share_one_poll_per_tick(mock, app_client):
+    mock.settings.task_duration = 1.0
+    mock.settings.steps_per_second = 2
+    task_id = mock.create_task()
+    streams = 8
+
+    def read_stream(_):
+        return _ndjson(app_client.get(f'/api/v1/task/{task_id}/events?format=ndjson&timeout=10').get_data())
+
+    with ThreadPoolExecutor(streams) as pool:
+        results = list(pool.map(read_stream, range(streams)))
+
+    for events in results:
+        assert events[-1]['event'] == 'end'
+        assert events[-1]['data']['status'] == 'finished'
+        steps = [event['cursor'] for event in events if event['event'] == 'step']
+        assert steps == list(range(1, len(steps) + 1))
+    # Uma consulta inicial por stream + os ticks do poller compartilhado (por conexão seriam ~8x mais)
+    assert mock.calls('task') <= streams + 20
+    assert mock.calls('status') == 0
+
+
+def test_stream_resumes_from_cursor(mock, app_client):
+    mock.settings.task_duration = 0.3
+    mock.settings.steps_per_second = 20
+    task_id = mock.create_task()
+    events = _ndjson(app_client.get(f'/api/v1/task/{task_id}/events?format=ndjson&since=2').get_data())
+    steps = [event['cursor'] for event in events if event['event'] == 'step']
+    assert steps[0] == 3
+    assert events[-1]['event'] == 'end'
+
+
+def test_asgi_stream_runs_without_wsgi_thread(mock):
+    from app import asgi
+
+    mock.settings.task_duration = 0.5
+    task_id = mock.create_task()
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': f'/api/v1/task/{task_id}/events',
+        'query_string': b'format=ndjson&timeout=10', 'headers': [],
+    }
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    assert messages[0]['status'] == 200
+    events = _ndjson(b''.join(message.get('body', b'') for message in messages[1:]))
+    assert events[-1]['event'] == 'end'
+    assert not messages[-1].get('more_body')
@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+import pytest
+
+
+def test_dedup_accepts_boolean_text(mock, app_client):
+    for _ in range(2):
+        response = app_client.post('/api/v1/run-task', json={'task': 'teste', 'dedup': 'false'})
+        assert response.status_code == 200 and 'reused' not in response.get_json()
+    assert mock.calls('run-task') == 2
+    first = app_client.post('/api/v1/run-task', json={'task': 'outra', 'dedup': 'true'}).get_json()
+    second = app_client.post('/api/v1/run-task', json={'task': 'outra', 'dedup': True}).get_json()
+    assert second['reused'] is True and second['task_id'] == first['task_id']
+    assert mock.calls('run-task') == 3
+
+
+@pytest.mark.parametrize('dedup', ['sim', 1, None])
+def test_dedup_rejects_non_boolean(mock, app_client, dedup):
+    response = app_client.post('/api/v1/run-task', json={'task': 'teste', 'dedup': dedup})
+    assert response.status_code == 400
+    assert '"dedup"' in response.get_json()['error']
+    assert mock.calls('run-task') == 0
+
+
+def test_asgi_dedup_rejects_non_boolean(mock):
+    from app import asgi
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/v1/run-task', 'query_string': b'', 'headers': []}
+    body = json.dumps({'task': 'teste', 'wait_for_completion': True, 'dedup': 'false '}).encode('utf-8')
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    assert messages[0]['status'] == 400
+    assert mock.calls('run-task') == 0
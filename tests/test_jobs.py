@@ -0,0 +1,129 @@
+import time
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from app.api import TaskPoller
+from app.config import Config
+from app.jobs import JobQueue, JobStore, _retryable
+
+
+class SlowClient:
+    """Cliente cuja submissão demora mais que o prazo de heartbeat dos jobs"""
+
+    def __init__(self, client, delay: float):
+        self.client = client
+        self.delay = delay
+        self.submissions = 0
+
+    def run_task(self, payload):
+        self.submissions += 1
+        time.sleep(self.delay)
+        return self.client.run_task(payload)
+
+
+class FailingClient:
+    def __init__(self, error):
+        self.error = error
+        self.submissions = 0
+
+    def run_task(self, payload):
+        self.submissions += 1
+        raise self.error
+
+
+@pytest.fixture
+def make_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'JOBS_HEARTBEAT_INTERVAL', 0.05)
+    monkeypatch.setattr(Config, 'JOBS_IDLE_POLL_INTERVAL', 0.02)
+    monkeypatch.setattr(Config, 'JOBS_RETRY_DELAY', 30)
+    queues = []
+
+    def make(client, poller=None):
+        queue = JobQueue(client, poller or TaskPoller(client), store=JobStore(str(tmp_path / 'jobs.db')), workers=2)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue._stopping.set()
+
+
+def _wait_status(queue, job_id, statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.store.get(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f'job ficou em {job["status"]}')
+
+
+def test_job_runs_to_completion(mock, client, make_queue):
+    mock.settings.task_duration = 0.3
+    queue = make_queue(client)
+    job = queue.enqueue({'task': 'teste'})
+    job = _wait_status(queue, job['id'], ('finished', 'failed'))
+    assert job['status'] == 'finished'
+    assert job['result']['status'] == 'finished'
+    assert queue.stats()['in_flight'] == 0
+
+
+def test_slow_submission_is_not_requeued(mock, client, make_queue):
+    mock.settings.task_duration = 0.1
+    slow = SlowClient(client, delay=Config.JOBS_HEARTBEAT_INTERVAL * 10)
+    queue = make_queue(slow, poller=TaskPoller(client))
+    job = queue.enqueue({'task': 'teste'})
+    job = _wait_status(queue, job['id'], ('finished', 'failed'))
+    assert job['status'] == 'finished'
+    assert slow.submissions == 1
+    assert mock.calls('run-task') == 1
+
+
+def test_unknown_task_fails_without_watching_until_deadline(mock, client, make_queue):
+    class UnknownTaskClient:
+        def run_task(self, payload):
+            return {'id': 'task_inexistente'}
+
+    queue = make_queue(UnknownTaskClient(), poller=TaskPoller(client))
+    job = queue.enqueue({'task': 'teste'})
+    job = _wait_status(queue, job['id'], ('finished', 'failed'))
+    assert job['status'] == 'failed'
+    assert queue.stats()['in_flight'] == 0
+
+
+def test_read_timeout_fails_without_resubmitting(make_queue):
+    failing = FailingClient(requests.exceptions.ReadTimeout('read timed out'))
+    queue = make_queue(failing)
+    job = queue.enqueue({'task': 'teste'})
+    job = _wait_status(queue, job['id'], ('failed',))
+    assert 'incerta' in job['error']
+    assert failing.submissions == 1
+
+
+def test_connect_failure_is_requeued(make_queue):
+    failing = FailingClient(requests.exceptions.ConnectTimeout('connect timed out'))
+    queue = make_queue(failing)
+    job = queue.enqueue({'task': 'teste'})
+    deadline = time.time() + 5
+    while failing.submissions == 0 and time.time() < deadline:
+        time.sleep(0.02)
+    job = _wait_status(queue, job['id'], ('queued',))
+    assert job['attempts'] == 1
+
+
+def test_retry_classification():
+    refused = requests.exceptions.ConnectionError(
+        MaxRetryError(None, '/run-task', NewConnectionError(None, 'refused')))
+    assert _retryable(refused)
+    assert not _retryable(requests.exceptions.ConnectionError('Connection aborted.'))
+    assert not _retryable(requests.exceptions.ReadTimeout())
+
+    def http_error(status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.exceptions.HTTPError(response=response)
+
+    assert _retryable(http_error(429)) and _retryable(http_error(503))
+    assert not _retryable(http_error(500)) and not _retryable(http_error(502))
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from app.polling import AdaptiveBackoff, FixedInterval, PollingStrategy, advance_marker
+
+
+def test_status_ticks_probe_details_periodically():
+    strategy = AdaptiveBackoff(tick_endpoint='status', progress_every=3)
+    endpoints = [strategy.next_endpoint() for _ in range(6)]
+    assert endpoints == ['status', 'status', 'task', 'status', 'status', 'task']
+    assert strategy.last_endpoint == 'task'
+
+
+def test_fixed_interval_never_probes():
+    strategy = FixedInterval(1, tick_endpoint='status')
+    assert {strategy.next_endpoint() for _ in range(10)} == {'status'}
+
+
+def test_marker_keeps_step_count_across_status_ticks():
+    marker, progressed = advance_marker(None, {'status': 'running', 'steps': [1, 2]})
+    assert not progressed
+    marker, progressed = advance_marker(marker, 'running')
+    assert marker == ('running', 2) and not progressed
+    marker, progressed = advance_marker(marker, {'status': 'running', 'steps': [1, 2, 3]})
+    assert progressed
+    marker, progressed = advance_marker(marker, 'paused')
+    assert progressed
+
+
+def test_new_steps_hold_interval_instead_of_restarting():
+    strategy = AdaptiveBackoff(initial=1, max_interval=100, factor=2, jitter=0, fast_polls=1, rng=random.Random(1))
+    assert [strategy.next_delay(False) for _ in range(4)] == [1, 2, 4, 8]
+    # Progresso não volta à fase rápida: o intervalo só deixa de crescer
+    assert strategy.next_delay(True) == 8
+    assert strategy.next_delay(False) == 16
+
+
+def test_strategy_requires_next_delay():
+    class Incomplete(PollingStrategy):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_default_schedule_cuts_calls_by_an_order_of_magnitude():
+    from benchmarks.polling_simulator import generate_tasks, simulate
+
+    tasks = generate_tasks(300, 90.0, seed=42)
+    rng = random.Random(42)
+    baseline_calls, baseline_bytes, _ = simulate(lambda: FixedInterval(2.0, tick_endpoint='task'), tasks)
+    # Padrões de Config (o conftest encurta os intervalos para os testes com o mock)
+    calls, transferred, _ = simulate(lambda: AdaptiveBackoff(
+        initial=1, max_interval=45, factor=3, jitter=0.2, fast_polls=0, tick_endpoint='status',
+        progress_every=6, rng=rng), tasks)
+    assert sum(baseline_calls) / sum(calls) >= 8
+    assert sum(baseline_bytes) / sum(transferred) >= 10
+
+
+def test_wait_for_completion_uses_status_ticks(mock, client):
+    mock.settings.task_duration = 0.5
+    task_id = mock.create_task()
+    details = client.wait_for_completion(task_id, strategy=AdaptiveBackoff(
+        initial=0.05, max_interval=0.1, jitter=0, progress_every=0))
+    assert details['status'] == 'finished'
+    assert mock.calls('status') >= 2
+    # Detalhes completos uma única vez, ao final
+    assert mock.calls('task') == 1
@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+from app import api
+from app.config import Config
+from app.profiler import SamplingProfiler
+
+TOKEN = 'segredo'
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'PROFILER_WATCH_INTERVAL', 0.02)
+    monkeypatch.setattr(Config, 'PROFILER_COLLECT_GRACE', 0.1)
+    profiler = SamplingProfiler(str(tmp_path / 'profiler'), enabled=True)
+    monkeypatch.setattr(api, 'profiler', profiler)
+    monkeypatch.setattr(Config, 'PROFILER_TOKEN', TOKEN)
+    return profiler
+
+
+def test_profile_returns_handle_and_result_later(profiler, app_client):
+    started = time.monotonic()
+    response = app_client.post('/api/v1/admin/profile?seconds=0.2', headers={'X-Admin-Token': TOKEN})
+    assert time.monotonic() - started < 0.2
+    assert response.status_code == 202
+    assert 'Retry-After' in response.headers
+    result_url = response.get_json()['result_url']
+    assert response.headers['Location'] == result_url
+
+    pending = app_client.get(result_url, headers={'X-Admin-Token': TOKEN})
+    assert pending.status_code == 202
+
+    time.sleep(0.4)
+    result = app_client.get(result_url, headers={'X-Admin-Token': TOKEN})
+    assert result.status_code == 200
+    assert result.headers['X-Profiler-Workers'] == '1'
+    assert f'pid:{os.getpid()}' in result.get_data(as_text=True)
+    # Consultas seguintes reaproveitam o resultado já juntado
+    again = app_client.get(result_url, headers={'X-Admin-Token': TOKEN})
+    assert again.get_data() == result.get_data()
+    assert not [name for name in os.listdir(profiler.directory) if not name.endswith('.result')]
+
+
+def test_result_requires_token_and_known_session(profiler, app_client):
+    session = profiler.trigger(0.05)['session']
+    assert app_client.get(f'/api/v1/admin/profile/{session}').status_code == 403
+    assert app_client.get('/api/v1/admin/profile/../../etc', headers={'X-Admin-Token': TOKEN}).status_code == 404
+    unknown = 'f' * 32
+    assert app_client.get(f'/api/v1/admin/profile/{unknown}', headers={'X-Admin-Token': TOKEN}).status_code == 404
+
+
+def test_seen_triggers_are_pruned(profiler):
+    sessions = [profiler.trigger(0.01)['session'] for _ in range(3)]
+    time.sleep(0.2)
+    assert len(profiler._seen) == 3
+    for session in sessions:
+        assert 'stacks' in profiler.collect(session)
+    time.sleep(0.1)
+    assert len(profiler._seen) == 0
+
+
+def test_old_files_are_swept(profiler, monkeypatch):
+    session = profiler.trigger(0.01)['session']
+    time.sleep(0.2)
+    profiler.collect(session)
+    monkeypatch.setattr(Config, 'PROFILER_RESULT_TTL', 0)
+    time.sleep(0.01)
+    latest = profiler.trigger(0.01)['session']
+    assert profiler.collect(session) is None
+    assert profiler.collect(latest) is not None
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from app.config import Config
+from app.ratelimit import UpstreamGovernor, UpstreamThrottled, background
+
+
+def test_limits_concurrency_per_class():
+    governor = UpstreamGovernor(rate=0, max_in_flight=10, class_limits={'submit': 1, 'read': 10, 'poll': 10},
+                                acquire_timeout=0.1)
+    governor.acquire('submit')
+    with pytest.raises(UpstreamThrottled) as excinfo:
+        governor.acquire('submit')
+    assert excinfo.value.retry_after >= 1
+    # Outra classe não é afetada pelo limite de submissões
+    governor.acquire('read')
+    governor.release('submit')
+    governor.acquire('submit', timeout=0.1)
+    assert governor.stats()['in_flight'] == {'submit': 1, 'read': 1, 'poll': 0}
+
+
+def test_rate_limit_spaces_admissions():
+    governor = UpstreamGovernor(rate=20, burst=1, max_in_flight=10, class_rates={}, acquire_timeout=5)
+    started = time.monotonic()
+    for _ in range(5):
+        with governor.slot('read'):
+            pass
+    # A rajada cobre a primeira; as demais esperam 1/20 s cada
+    assert time.monotonic() - started >= 4 / 20 * 0.9
+
+
+def test_foreground_reads_pass_background_polls():
+    governor = UpstreamGovernor(rate=0, max_in_flight=1, acquire_timeout=5)
+    governor.acquire('read')
+    order = []
+
+    def call(endpoint_class, in_background):
+        if in_background:
+            with background():
+                governor.acquire(endpoint_class)
+        else:
+            governor.acquire(endpoint_class)
+        order.append(endpoint_class)
+        governor.release(endpoint_class)
+
+    poll = threading.Thread(target=call, args=('poll', True))
+    poll.start()
+    time.sleep(0.05)
+    read = threading.Thread(target=call, args=('read', False))
+    read.start()
+    time.sleep(0.05)
+    governor.release('read')
+    poll.join(2)
+    read.join(2)
+    assert order == ['read', 'poll']
+
+
+def test_queued_calls_are_admitted_in_arrival_order():
+    governor = UpstreamGovernor(rate=0, max_in_flight=1, acquire_timeout=5)
+    governor.acquire('read')
+    order = []
+
+    def call(index):
+        with governor.slot('read'):
+            order.append(index)
+
+    threads = []
+    for index in range(20):
+        threads.append(threading.Thread(target=call, args=(index,)))
+        threads[-1].start()
+        time.sleep(0.005)
+    assert governor.stats()['waiting']['read'] == 20
+    governor.release('read')
+    for thread in threads:
+        thread.join(2)
+    # Cada saída acorda só a próxima da fila, que segue a ordem de chegada
+    assert order == list(range(20))
+    assert governor.stats()['waiting']['read'] == 0
+
+
+def test_pause_holds_every_class():
+    governor = UpstreamGovernor(rate=0, max_in_flight=10, acquire_timeout=0.05)
+    governor.pause(1)
+    with pytest.raises(UpstreamThrottled) as excinfo:
+        governor.acquire('read')
+    assert excinfo.value.retry_after > 0.5
+    assert governor.stats()['counters']['pauses'] == 1
+
+
+def test_asgi_submissions_go_through_governor(mock, monkeypatch):
+    from app import asgi, ratelimit
+
+    monkeypatch.setattr(ratelimit, '_governor', UpstreamGovernor(
+        rate=0, max_in_flight=10, class_limits={'submit': 0, 'read': 10, 'poll': 10}, acquire_timeout=0.05))
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/v1/run-task', 'query_string': b'', 'headers': []}
+    body = json.dumps({'task': 'teste', 'wait_for_completion': True}).encode('utf-8')
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    assert messages[0]['status'] == 429
+    assert mock.calls('run-task') == 0
+
+
+def _asgi_call(method: str, path: str, body: dict = None):
+    from app import asgi
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'headers': []}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps(body).encode('utf-8') if body else b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    return messages[0]['status'], dict(messages[0]['headers'])
+
+
+def test_asgi_reads_retry_throttled_calls_and_answer_429(mock, monkeypatch):
+    from app import asgi
+
+    monkeypatch.setattr(asgi, 'async_browser_api', asgi.AsyncBrowserUseAPI())
+    task_id = mock.create_task()
+    mock.settings.throttle_rate = 1.0
+    mock.settings.retry_after = 0.01
+    status, headers = _asgi_call('GET', f'/api/v1/task/{task_id}/events')
+    assert status == 429
+    assert headers[b'retry-after'] == b'1'
+    assert mock.calls('throttled') == 1 + Config.UPSTREAM_MAX_RETRIES
+
+
+def test_asgi_submission_retries_throttled_calls_and_answer_429(mock, monkeypatch):
+    from app import asgi
+
+    monkeypatch.setattr(asgi, 'async_browser_api', asgi.AsyncBrowserUseAPI())
+    mock.settings.throttle_rate = 1.0
+    mock.settings.retry_after = 0.01
+    status, headers = _asgi_call('POST', '/api/v1/run-task', {'task': 'teste', 'wait_for_completion': True})
+    assert status == 429
+    assert headers[b'retry-after'] == b'1'
+    assert mock.calls('throttled') == 1 + Config.UPSTREAM_MAX_RETRIES
+
+
+def test_asgi_submission_moves_to_another_key_on_429(mock, tmp_path):
+    from app.asgi import AsyncBrowserUseAPI
+    from app.credentials import CredentialPool
+
+    pool = CredentialPool(['chave-a', 'chave-b'], path=str(tmp_path / 'credentials.db'))
+    first, second = list(pool)
+    mock.settings.per_key = True
+    mock.settings.rate_limit = 0.001
+    # Esgota a cota da primeira chave, a escolhida quando as duas estão livres
+    requests.post(f'{mock.url}/run-task', json={'task': 'teste'}, headers=first.headers)
+    result = asyncio.run(AsyncBrowserUseAPI(credentials=pool).run_task({'task': 'teste'}))
+    assert mock.calls('throttled') == 1
+    assert pool.pinned(result['id']) is second
+    assert first.counters['throttled'] == 1 and first.pending == 0 and second.pending == 0
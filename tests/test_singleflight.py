@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        gate.wait(1)
+        return {'status': 'running'}
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, 'task:1', fetch) for _ in range(8)]
+        time.sleep(0.05)
+        gate.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result == {'status': 'running'} for result in results)
+    assert flight.stats() == {'in_flight': 0, 'leaders': 1, 'followers': 7}
+
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+    gate = threading.Event()
+
+    def failing():
+        gate.wait(1)
+        raise ValueError('upstream')
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, 'k', failing) for _ in range(4)]
+        time.sleep(0.05)
+        gate.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.do('k', lambda: 'ok') == 'ok'
+
+
+def test_async_cancelled_follower_does_not_cancel_leader():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'ok'
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do('k', fetch))
+        follower = asyncio.ensure_future(flight.do('k', fetch))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(scenario()) == 'ok'
+    assert len(calls) == 1
+
+
+def test_concurrent_reads_reach_upstream_once(mock, client):
+    mock.settings.latency = 0.1
+    task_id = mock.create_task()
+    with ThreadPoolExecutor(6) as pool:
+        list(pool.map(lambda _: client.get_task(task_id), range(6)))
+    assert mock.calls('task') == 1
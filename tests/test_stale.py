@@ -0,0 +1,114 @@
+import time
+
+import pytest
+import requests
+
+from app import api, stale
+from app.config import Config
+from app.stale import StaleStore, is_degraded
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(response=response)
+
+
+def test_degraded_classification():
+    assert is_degraded(requests.exceptions.ConnectionError())
+    assert is_degraded(_http_error(503)) and is_degraded(_http_error(429))
+    assert not is_degraded(_http_error(404))
+    assert not is_degraded(ValueError())
+
+
+def test_store_bounds_entries_and_age(monkeypatch):
+    store = StaleStore(enabled=True, max_entries=2, max_bytes=10_000)
+    store.put('a', {'n': 1})
+    store.put('b', {'n': 2})
+    store.put('c', {'n': 3})
+    assert store.get('a') is None
+    value, age = store.get('c')
+    assert value == {'n': 3} and age < 1
+    monkeypatch.setattr(Config, 'STALE_MAX_AGE', 0)
+    time.sleep(0.01)
+    assert store.get('c') is None
+
+
+def test_refresh_runs_once_per_interval():
+    store = StaleStore(enabled=True)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'fresh': True}
+
+    assert store.refresh('k', fetch)
+    assert not store.refresh('k', fetch)
+    deadline = time.time() + 2
+    while store.get('k') is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert store.get('k')[0] == {'fresh': True}
+    assert len(calls) == 1
+
+
+@pytest.fixture
+def degrade(mock, monkeypatch):
+    monkeypatch.setattr(Config, 'UPSTREAM_MAX_RETRIES', 0)
+
+    def apply():
+        mock.settings.error_rate = 1.0
+        mock.settings.error_status = 503
+
+    return apply
+
+
+def test_user_reads_fall_back_to_last_good_response(mock, client, degrade):
+    task_id = mock.create_task()
+    fresh = client.get_task(task_id)
+    degrade()
+    client.cache.delete(f'task:{task_id}')
+    stale.reset()
+    assert client.get_task(task_id) == fresh
+    assert stale.served_age() is not None
+
+
+def test_task_route_marks_stale_response(mock, app_client, degrade):
+    task_id = mock.create_task()
+    assert app_client.get(f'/api/v1/task/{task_id}').status_code == 200
+    degrade()
+    api.browser_api.cache.delete(f'task:{task_id}')
+    response = app_client.get(f'/api/v1/task/{task_id}')
+    assert response.status_code == 200
+    assert response.headers['X-Stale'] == 'true'
+    assert 'Age' in response.headers
+
+
+def test_finished_artifact_is_served_from_disk_while_degraded(mock, app_client, degrade, tmp_path, monkeypatch):
+    from app.artifacts import ArtifactStore
+
+    store = ArtifactStore(str(tmp_path / 'artifacts'), enabled=True)
+    monkeypatch.setattr(api, 'artifact_store', store)
+    api.browser_api.artifacts = store
+    mock.settings.task_duration = 0.05
+    task_id = mock.create_task()
+    time.sleep(0.1)
+    first = app_client.get(f'/api/v1/task/{task_id}/screenshots')
+    assert first.status_code == 200
+    degrade()
+    for _ in range(Config.CIRCUIT_FAILURE_THRESHOLD + 1):
+        response = app_client.get(f'/api/v1/task/{task_id}/screenshots')
+        assert response.status_code == 200
+        assert response.headers['X-Artifact-Source'] == 'disk'
+        assert response.get_data() == first.get_data()
+
+
+def test_background_reads_do_not_get_stale_data(mock, client, degrade):
+    from app.ratelimit import background
+
+    task_id = mock.create_task()
+    client.get_task(task_id)
+    degrade()
+    client.cache.delete(f'task:{task_id}')
+    with background():
+        with pytest.raises(requests.exceptions.RequestException):
+            client.get_task(task_id)
@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from app import api
+from app.config import Config
+from app.task_index import TaskIndex
+from benchmarks import mock_upstream
+
+
+@pytest.fixture
+def make_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'TASK_INDEX_PAGE_SIZE', 2)
+
+    def make(client):
+        index = TaskIndex(client, path=str(tmp_path / 'tasks.db'), enabled=True)
+        # Sem a thread de sincronização periódica: os testes sincronizam explicitamente
+        index._started = True
+        return index
+
+    return make
+
+
+def _age(task_id: str, seconds: float) -> None:
+    """Recua no tempo a criação de uma task do mock"""
+    task = mock_upstream._tasks[task_id]
+    task['started'] -= seconds
+    task['created_at'] = mock_upstream._iso(task['started'])
+
+
+def _statuses(index):
+    return {task['id']: task['status'] for task in index.query(limit=100)['tasks']}
+
+
+def test_incremental_sync_pages_past_unchanged_pages(mock, client, make_index):
+    mock.settings.task_duration = 0.3
+    ids = [mock.create_task() for _ in range(4)]
+    index = make_index(client)
+    index.sync(full=True)
+    assert set(_statuses(index).values()) == {'running'}
+
+    time.sleep(0.4)
+    # A primeira página já está atualizada no índice (leituras de detalhes); as seguintes não
+    for task_id in ids[2:]:
+        index.observe(client.get_task(task_id, use_cache=False))
+    index.sync()
+    assert set(_statuses(index).values()) == {'finished'}
+
+
+def test_incremental_sync_stops_behind_watermark(mock, client, make_index):
+    mock.settings.task_duration = 0.05
+    ids = [mock.create_task() for _ in range(6)]
+    for task_id in ids[:4]:
+        _age(task_id, 3600)
+    time.sleep(0.1)
+    index = make_index(client)
+    index.sync(full=True)
+    full_calls = mock.calls('tasks')
+    assert full_calls == 4
+
+    index.sync()
+    # Só a página recente e a primeira inteiramente anterior à marca d'água
+    assert mock.calls('tasks') - full_calls == 2
+
+
+class UndatedClient:
+    """Listagem de um upstream que não informa datas"""
+
+    def __init__(self, client):
+        self.client = client
+        self.credentials = client.credentials
+
+    def list_tasks(self, **kwargs):
+        page = self.client.list_tasks(**kwargs)
+        undated = ('created_at', 'started_at', 'updated_at', 'finished_at')
+        return {'tasks': [{k: v for k, v in task.items() if k not in undated} for task in page['tasks']]}
+
+
+def test_incremental_sync_without_dates_stops_at_unchanged_page(mock, client, make_index):
+    mock.settings.task_duration = 0.05
+    for _ in range(6):
+        mock.create_task()
+    time.sleep(0.1)
+    index = make_index(UndatedClient(client))
+    index.sync(full=True)
+    full_calls = mock.calls('tasks')
+    assert full_calls == 4
+
+    index.sync()
+    # Sem marca d'água: a primeira página sem mudanças encerra a sincronização
+    assert mock.calls('tasks') - full_calls == 1
+
+
+def test_sync_reads_listing_uncached(mock, client, make_index):
+    index = make_index(client)
+    mock.create_task()
+    index.sync(full=True)
+    mock.create_task()
+    # Dentro do TTL do cache da listagem, a segunda task ainda aparece
+    index.sync()
+    assert len(_statuses(index)) == 2
+
+
+@pytest.fixture
+def indexed_app(app_client, make_index, monkeypatch):
+    index = make_index(api.browser_api)
+    monkeypatch.setattr(api, 'task_index', index)
+    return app_client, index
+
+
+def test_warming_index_falls_through_to_upstream(mock, indexed_app):
+    app_client, index = indexed_app
+    task_id = mock.create_task()
+    response = app_client.get('/api/v1/tasks')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [task['id'] for task in body['tasks']] == [task_id]
+    assert body['index']['warming'] is True
+
+    filtered = app_client.get('/api/v1/tasks?status=running')
+    assert filtered.status_code == 503
+    assert 'Retry-After' in filtered.headers
+
+
+def test_warm_index_serves_filters(mock, indexed_app):
+    app_client, index = indexed_app
+    task_id = mock.create_task()
+    index.sync(full=True)
+    calls = mock.calls('tasks')
+    body = app_client.get('/api/v1/tasks?status=running').get_json()
+    assert [task['id'] for task in body['tasks']] == [task_id]
+    assert body['index']['warming'] is False
+    assert mock.calls('tasks') == calls
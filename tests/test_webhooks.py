@@ -0,0 +1,97 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.api import TaskPoller
+from app.config import Config
+from app.webhooks import WebhookDispatcher
+
+
+@pytest.fixture
+def dispatcher(client, monkeypatch):
+    monkeypatch.setattr(Config, 'WEBHOOK_RETRY_DELAY', 0.01)
+    monkeypatch.setattr(Config, 'WEBHOOK_MAX_ATTEMPTS', 3)
+    return WebhookDispatcher(TaskPoller(client))
+
+
+def _wait_outcome(dispatcher, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        recent = dispatcher.stats()['recent']
+        if recent:
+            return recent[-1]
+        time.sleep(0.02)
+    raise AssertionError('nenhuma entrega concluída')
+
+
+def test_delivers_result_to_sink(mock, dispatcher):
+    mock.settings.task_duration = 0.2
+    task_id = mock.create_task()
+    dispatcher.register(task_id, f'{mock.url}/_sink')
+    outcome = _wait_outcome(dispatcher)
+    assert outcome['outcome'] == 'delivered' and outcome['attempts'] == 1
+    received = mock.sink()
+    assert len(received) == 1
+    assert received[0]['body']['event'] == 'task.completed'
+    assert received[0]['body']['result']['status'] == 'finished'
+
+
+def test_receiver_rejection_is_not_retried(mock, dispatcher):
+    mock.settings.task_duration = 0.1
+    dispatcher.register(mock.create_task(), f'{mock.url}/_sink?status=410')
+    outcome = _wait_outcome(dispatcher)
+    assert outcome['outcome'] == 'failed'
+    assert outcome['attempts'] == 1 and outcome['http_status'] == 410
+    assert len(mock.sink()) == 1
+
+
+def test_receiver_unavailable_is_retried(mock, dispatcher):
+    mock.settings.task_duration = 0.1
+    dispatcher.register(mock.create_task(), f'{mock.url}/_sink?status=503')
+    outcome = _wait_outcome(dispatcher)
+    assert outcome['outcome'] == 'failed'
+    assert outcome['attempts'] == Config.WEBHOOK_MAX_ATTEMPTS
+    assert len(mock.sink()) == Config.WEBHOOK_MAX_ATTEMPTS
+
+
+def test_unknown_task_reports_error_without_watching_until_deadline(mock, dispatcher):
+    dispatcher.register('task_inexistente', f'{mock.url}/_sink')
+    outcome = _wait_outcome(dispatcher)
+    assert outcome['event'] == 'task.error'
+    assert dispatcher.stats()['watching'] == 0
+    assert mock.calls('status') + mock.calls('task') <= 2
+
+
+def _asgi_run_task(body: dict):
+    from app import asgi
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/v1/run-task', 'query_string': b'', 'headers': []}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps(body).encode('utf-8'), 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    return messages[0]['status'], json.loads(b''.join(m.get('body', b'') for m in messages[1:]))
+
+
+def test_asgi_wait_registers_callback(mock):
+    mock.settings.task_duration = 0.2
+    status, payload = _asgi_run_task({'task': 'teste', 'wait_for_completion': True, 'timeout': 10,
+                                      'callback_url': f'{mock.url}/_sink'})
+    assert status == 200 and payload['status'] == 'completed'
+    deadline = time.time() + 5
+    while not mock.sink() and time.time() < deadline:
+        time.sleep(0.02)
+    assert mock.sink()[0]['body']['task_id'] == payload['task_id']
+
+
+def test_asgi_wait_validates_callback(mock):
+    status, payload = _asgi_run_task({'task': 'teste', 'wait_for_completion': True, 'callback_url': 'ftp://x'})
+    assert status == 400
+    assert mock.calls('run-task') == 0